@@ -1,14 +1,31 @@
 import os
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.http import HttpResponse
 
+from events import metrics, querycheck, replica
+
 class DisableCacheMiddleware:
     """Middleware to disable caching for development."""
+    # Async-capable, so ASGI requests to async views never hop to a thread here
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        response = self.get_response(request)
-        
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
         # Only apply in development (DEBUG=True)
         if os.environ.get('DEBUG', 'False') == 'True':
             if request.path.startswith('/static/'):
@@ -17,3 +34,76 @@ class DisableCacheMiddleware:
                 response['Expires'] = '0'
         
         return response
+
+
+class ReplicaStickinessMiddleware:
+    """Tracks database writes per request for read-your-writes on the replica (events/replica.py)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = replica.begin_request(request)
+        return replica.end_request(token, self.get_response(request))
+
+    async def __acall__(self, request):
+        token = replica.begin_request(request)
+        return replica.end_request(token, await self.get_response(request))
+
+
+class InstrumentationMiddleware:
+    """Times each request (wall, DB, templates) into Server-Timing and events.metrics."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = metrics.begin()
+        return metrics.finish(token, request, self.get_response(request))
+
+    async def __acall__(self, request):
+        token = metrics.begin()
+        return metrics.finish(token, request, await self.get_response(request))
+
+
+class QueryInspectionMiddleware:
+    """N+1 reports and per-view query budgets in development and tests (events/querycheck.py)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.QUERY_INSPECTION == querycheck.OFF:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = querycheck.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            querycheck.finish(token, request)
+        return response
+
+    async def __acall__(self, request):
+        token = querycheck.begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            querycheck.finish(token, request)
+        return response
@@ -19,7 +19,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'college_events.middleware.InstrumentationMiddleware',  # outermost, so it times everything below
+    'college_events.middleware.QueryInspectionMiddleware',  # N+1 reports and query budgets (dev/tests)
     'django.middleware.security.SecurityMiddleware',
+    'college_events.middleware.ReplicaStickinessMiddleware',  # read-your-writes for the replica
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -33,7 +36,8 @@ ROOT_URLCONF = 'college_events.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's backend plus per-request render timing (events/metrics.py)
+        'BACKEND': 'events.metrics.TimedDjangoTemplates',
         # If you have global templates outside apps, add their path here:
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
@@ -49,13 +53,83 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'college_events.wsgi.application'
 
+# SQLite profile: 'development' (SQLite defaults) or 'production', which
+# applies the pragmas below to every new connection and keeps connections
+# open between requests so they are paid once per connection, not per request.
+DB_PROFILE = os.environ.get('DB_PROFILE', 'development' if DEBUG else 'production')
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',        # readers no longer block the writer (or each other)
+    'synchronous': 'NORMAL',      # fsync at checkpoints only; safe with WAL
+    'busy_timeout': 5000,         # ms to wait for the write lock before "database is locked"
+    'mmap_size': 256 * 2 ** 20,   # read pages through a 256 MiB memory map
+    'cache_size': -32000,         # 32 MB page cache per connection (negative = KiB)
+    'temp_store': 'MEMORY',       # sorts and temp indexes in RAM
+}
+DB_PROFILES = {
+    'development': {},
+    'production': {
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # BEGIN IMMEDIATE takes the write lock up front, where busy_timeout
+            # applies; a deferred transaction upgrading from read to write
+            # fails at once with "database is locked" instead of waiting.
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+    },
+}
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        **DB_PROFILES[DB_PROFILE],
     }
 }
 
+# Read replica for the read-only views (see events/replica.py). Locally it is
+# a second, read-only connection to the same SQLite file; point
+# DATABASE_REPLICA_NAME at a replicated copy (e.g. from Litestream) otherwise.
+REPLICA_DATABASE = 'replica' if os.environ.get('DATABASE_REPLICA', 'False') == 'True' else None
+REPLICA_STICKY_SECONDS = 10  # how long a browser reads from the primary after a write
+if REPLICA_DATABASE:
+    DATABASES[REPLICA_DATABASE] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DATABASE_REPLICA_NAME', f"file:{DATABASES['default']['NAME']}?mode=ro"),
+        'OPTIONS': {
+            # journal_mode and synchronous are the writer's business
+            'init_command': ';'.join(['PRAGMA query_only=1'] + [
+                f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()
+                if name not in ('journal_mode', 'synchronous')
+            ]),
+        },
+        'CONN_MAX_AGE': DATABASES['default'].get('CONN_MAX_AGE', 0),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['events.replica.ReplicaRouter']
+
+# Cache backend: 'locmem' (per process, the default), 'file' (shared by the
+# processes on one host) or 'redis' (any server speaking the Redis protocol,
+# e.g. Redis, Valkey or KeyDB; needs the `redis` package).
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'college-events',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', BASE_DIR / 'cache'),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://127.0.0.1:6379/0'),
+    },
+}
+CACHES = {
+    'default': {**_CACHE_BACKENDS[CACHE_BACKEND], 'KEY_PREFIX': 'college-events'},
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -84,4 +158,53 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Authentication settings
 LOGIN_URL = '/admin-login/'
 LOGIN_REDIRECT_URL = '/admin-panel/'
-LOGOUT_REDIRECT_URL = '/'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/'
+# Write-behind registration ingestion for registration-opening bursts (see
+# events/ingest.py). Off by default. With the 'thread' writer each process
+# flushes the queue itself; set 'command' when a separate
+# `manage.py flush_registration_queue` worker runs instead.
+REGISTRATION_INGEST = os.environ.get('REGISTRATION_INGEST', 'False') == 'True'
+REGISTRATION_INGEST_WRITER = os.environ.get('REGISTRATION_INGEST_WRITER', 'thread')
+REGISTRATION_QUEUE_PATH = os.environ.get('REGISTRATION_QUEUE_PATH', BASE_DIR / 'registration_queue.sqlite3')
+REGISTRATION_INGEST_BATCH = 200
+REGISTRATION_INGEST_INTERVAL = 0.5  # seconds the writer sleeps once the queue is empty
+
+# Background jobs (events/jobs.py), e.g. confirmation emails. With the 'thread'
+# runner each process runs its own worker; set 'command' when a separate
+# `manage.py run_jobs` worker runs instead.
+JOB_RUNNER = os.environ.get('JOB_RUNNER', 'thread')
+JOB_THREADS = int(os.environ.get('JOB_THREADS', '4'))
+JOB_BATCH_SIZE = 50
+JOB_POLL_INTERVAL = 1.0   # seconds an idle worker waits before looking again
+JOB_MAX_ATTEMPTS = 5
+JOB_BACKOFF_BASE = 10     # seconds before the first retry; doubles per attempt
+JOB_BACKOFF_MAX = 3600
+
+# Outgoing email. In development messages are written to files under
+# sent_emails/ instead of being sent.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.filebased.EmailBackend' if DEBUG
+                               else 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = os.environ.get('EMAIL_FILE_PATH', BASE_DIR / 'sent_emails')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'False') == 'True'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'CollegeEvents <no-reply@collegeevents.local>')
+# Absolute links in emails
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
+
+# Ticket QR codes (events/tickets.py), rendered on first request and kept on disk
+TICKET_QR_CACHE_DIR = os.environ.get('TICKET_QR_CACHE_DIR', BASE_DIR / 'qr_cache')
+TICKET_QR_CACHE_MAX_BYTES = int(os.environ.get('TICKET_QR_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+TICKET_QR_BOX_SIZE = 8    # pixels per QR module
+
+# Request metrics (events/metrics.py): samples kept per URL name for the
+# percentiles, and an optional bearer token for scraping /api/metrics/.
+METRICS_WINDOW = 1000
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# N+1 detection and the query budgets in events/urls.py (events/querycheck.py):
+# 'off', 'warn' (log) or 'raise'. The test runner always uses 'raise'.
+QUERY_INSPECTION = os.environ.get('QUERY_INSPECTION', 'warn' if DEBUG else 'off')
+TEST_RUNNER = 'events.testing.QueryBudgetTestRunner'
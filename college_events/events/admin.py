@@ -1,9 +1,28 @@
-from django.contrib import admin
-from .models import Event, Registration
+import io
+
+from django import forms
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+
+from . import search
+from .imports import import_registrations
+from .models import Event, EventFull, Job, Registration, WaitlistEntry
+
+
+class RegistrationImportForm(forms.Form):
+    csv_file = forms.FileField(label='CSV file')
+    event = forms.ModelChoiceField(
+        queryset=Event.objects.order_by('-date'), required=False,
+        help_text='Leave empty to read an event_id column from the file.',
+    )
+
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
-    list_display = ['name', 'date', 'time', 'venue']
+    list_display = ['name', 'date', 'time', 'venue', 'registration_count', 'capacity']
     list_filter = ['date']
     search_fields = ['name', 'venue', 'description']
     date_hierarchy = 'date'
@@ -13,7 +32,77 @@ class EventAdmin(admin.ModelAdmin):
 class RegistrationAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'mobile', 'event', 'course', 'branch', 'timestamp']
     list_filter = ['event', 'course', 'timestamp']
-    search_fields = ['name', 'email', 'mobile', 'event__name']
+    # Searched through events.search.registrations (see get_search_results)
+    search_fields = ['name', 'email', 'mobile']
+    search_help_text = 'Name or surname prefix, email, mobile number or ticket id (TKT-001-0042).'
     date_hierarchy = 'timestamp'
     readonly_fields = ['timestamp']
-    ordering = ['-timestamp']
\ No newline at end of file
+    ordering = ['-timestamp']
+    change_list_template = 'admin/events/registration/change_list.html'
+
+    def get_search_results(self, request, queryset, search_term):
+        # Indexed prefix lookups instead of an icontains scan over every column
+        if not search_term.strip():
+            return queryset, False
+        return search.registrations(search_term, queryset), False
+
+    def get_urls(self):
+        custom = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='events_registration_import'),
+        ]
+        return custom + super().get_urls()
+
+    def import_view(self, request):
+        """Upload a CSV of registrations and show the per-row report."""
+        if not self.has_add_permission(request):
+            return redirect('admin:events_registration_changelist')
+
+        report = None
+        form = RegistrationImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+            try:
+                report = import_registrations(upload, event=form.cleaned_data['event'])
+            except (ValueError, UnicodeDecodeError) as e:
+                form.add_error('csv_file', str(e))
+            except EventFull as e:
+                # Seats ran out between the capacity check and the insert (a concurrent registration)
+                messages.error(request, f'{e}. Earlier batches of the file were imported; check the list '
+                                        f'before uploading it again.')
+            else:
+                messages.success(request, (
+                    f"{report['created']} registrations imported, {report['duplicates']} duplicates, "
+                    f"{len(report['errors'])} rows rejected."
+                ))
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import registrations',
+            'form': form,
+            'report': report,
+        }
+        return TemplateResponse(request, 'admin/events/registration/import_form.html', context)
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ['name', 'email', 'event', 'seq', 'status', 'joined_at']
+    list_filter = ['status', 'event']
+    search_fields = ['name', 'email', 'event__name']
+    readonly_fields = ['seq', 'joined_at']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_at', 'key', 'last_error']
+    list_filter = ['status', 'name']
+    search_fields = ['key']
+    readonly_fields = ['claimed_by', 'claimed_at', 'created_at', 'finished_at']
+    actions = ['retry']
+
+    @admin.action(description='Retry selected failed jobs now')
+    def retry(self, request, queryset):
+        count = queryset.filter(status=Job.FAILED).update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now(), claimed_by='', finished_at=None)
+        self.message_user(request, f'Queued {count} failed job(s) to run again.', messages.SUCCESS)
@@ -0,0 +1,197 @@
+"""Helpers shared by the ``bench_*`` management commands.
+
+Benchmarks never touch the configured database: ``scratch_database()`` points
+the default connection at a throwaway, fully migrated SQLite file (the same
+machinery the test runner uses) and removes it afterwards. Inside it, jobs
+stay queued (JOB_RUNNER='command') and mail goes to the locmem backend, so no
+worker thread competes with the measured writers or emails seeded students.
+"""
+import datetime
+import os
+import random
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import override_settings
+
+from .models import YEAR_CHOICES, Event, Registration, StudentProfile
+
+COURSES = ['B.Tech', 'M.Tech', 'BCA', 'MCA', 'BSc', 'MBA']
+BRANCHES = ['Computer Science', 'Information Technology', 'Electronics', 'Mechanical', 'Civil']
+FIRST_NAMES = ['Aarav', 'Priya', 'Rahul', 'Ananya', 'Vikram', 'Sneha', 'Arjun', 'Kavya', 'Rohan', 'Isha',
+               'Aditya', 'Meera', 'Karan', 'Diya', 'Nikhil', 'Pooja', 'Siddharth', 'Riya', 'Manav', 'Tanvi']
+LAST_NAMES = ['Sharma', 'Verma', 'Patel', 'Iyer', 'Reddy', 'Nair', 'Gupta', 'Singh', 'Mehta', 'Joshi',
+              'Kulkarni', 'Das', 'Chopra', 'Menon', 'Bose', 'Rao', 'Pillai', 'Agarwal', 'Khan', 'Desai']
+
+# Vocabulary for seeded event text, so search benchmarks have realistic words to match
+TOPICS = ['Robotics', 'Machine Learning', 'Web Development', 'Cyber Security', 'Photography', 'Drama',
+          'Music', 'Startup', 'Quantum Computing', 'Chess', 'Debate', 'Cloud', 'Design', 'Football',
+          'Literature', 'Blockchain', 'Dance', 'Entrepreneurship', 'Astronomy', 'Data Science']
+KINDS = ['Workshop', 'Hackathon', 'Seminar', 'Fest', 'Bootcamp', 'Meetup', 'Championship', 'Symposium',
+         'Masterclass', 'Quiz']
+VENUES = ['Main Auditorium', 'Seminar Hall', 'Computer Lab Complex', 'Conference Center', 'Sports Complex',
+          'College Ground', 'Library Hall', 'Innovation Hub', 'Open Air Theatre', 'Lecture Theatre']
+
+
+@contextmanager
+def scratch_database(keep=False):
+    """Run the enclosed block against a fresh on-disk SQLite database."""
+    tmpdir = tempfile.mkdtemp(prefix='events-bench-')
+    path = os.path.join(tmpdir, 'bench.sqlite3')
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = path
+    quiet = override_settings(JOB_RUNNER='command', EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    quiet.enable()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield path
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keep)
+        quiet.disable()
+        if not keep:
+            try:
+                os.rmdir(tmpdir)
+            except OSError:
+                pass
+
+
+def seed_events(count, start=None, rng=random):
+    """Bulk-insert ``count`` events spread a year either side of ``start``."""
+    start = start or datetime.date.today()
+    events = []
+    for n in range(count):
+        topic, kind = rng.choice(TOPICS), rng.choice(KINDS)
+        extra = rng.sample(TOPICS, 2)
+        events.append(Event(
+            name=f'{topic} {kind} {n}',
+            description=(f'A {kind.lower()} on {topic.lower()} for every branch, with sessions on '
+                         f'{extra[0].lower()} and {extra[1].lower()}. Benchmark event number {n}.'),
+            date=start + datetime.timedelta(days=rng.randint(-365, 365)),
+            venue=f'{rng.choice(VENUES)} {n % 20}',
+        ))
+    return Event.objects.bulk_create(events, batch_size=1000)
+
+
+def seed_registrations(events, per_event, rng=random, batch_size=2000, users=None):
+    """Bulk-insert ``per_event`` registrations for each event.
+
+    With ``users``, each registration is linked to a randomly chosen one.
+    """
+    batch = []
+    for event in events:
+        for n in range(per_event):
+            batch.append(Registration(
+                event=event,
+                user=rng.choice(users) if users else None,
+                name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                email=f'student{n}@e{event.pk}.example.com',
+                mobile=f'9{rng.randrange(10 ** 9):09d}',
+                course=rng.choice(COURSES),
+                branch=rng.choice(BRANCHES),
+            ))
+            if len(batch) >= batch_size:
+                Registration.objects.bulk_create(batch)
+                batch = []
+    if batch:
+        Registration.objects.bulk_create(batch)
+
+
+def seed_students(count, rng=random, password='student123', batch_size=2000):
+    """Bulk-insert ``count`` student accounts, each with a StudentProfile.
+
+    Every account gets the same ``password`` (hashed once), so benchmarks
+    can log in as any of them. Returns the users.
+    """
+    hashed = make_password(password)
+    first = User.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    users = User.objects.bulk_create([
+        User(username=f'student{first + n}', email=f'student{first + n}@students.example.com',
+             first_name='Student', last_name=str(first + n), password=hashed)
+        for n in range(count)
+    ], batch_size=batch_size)
+    # SQLite returns the new primary keys from bulk_create
+    StudentProfile.objects.bulk_create([
+        StudentProfile(
+            user=user, mobile=f'9{rng.randrange(10 ** 9):09d}', course=rng.choice(COURSES),
+            branch=rng.choice(BRANCHES), year=rng.choice(YEAR_CHOICES)[0],
+        )
+        for user in users
+    ], batch_size=batch_size)
+    return users
+
+
+def popularity_weights(count, skew=1.1):
+    """Zipf-like weights: the k-th most popular event draws ~1/k**skew of the interest."""
+    return [1 / (rank + 1) ** skew for rank in range(count)]
+
+
+def seed_skewed_registrations(events, students, count, rng=random, skew=1.1, batch_size=2000):
+    """Bulk-insert up to ``count`` student registrations with skewed event popularity.
+
+    Events are shuffled and then ranked, so popularity is unrelated to date.
+    A student registers for an event at most once; draws that repeat a
+    pair are skipped, so a tiny dataset may get fewer than ``count``.
+    Returns the number created.
+    """
+    ranked = rng.sample(list(events), len(events))
+    weights = popularity_weights(len(ranked), skew)
+    profiles = {p.user_id: p for p in StudentProfile.objects.filter(user__in=students)}
+    taken, batch, created = set(), [], 0
+    for _ in range(count * 2):
+        if created + len(batch) >= count:
+            break
+        event = rng.choices(ranked, weights)[0]
+        student = rng.choice(students)
+        if (event.pk, student.pk) in taken:
+            continue
+        taken.add((event.pk, student.pk))
+        profile = profiles.get(student.pk)
+        batch.append(Registration(
+            event=event, user=student, name=student.get_full_name(), email=student.email,
+            mobile=profile.mobile if profile else '9876543210',
+            course=profile.course if profile else rng.choice(COURSES),
+            branch=profile.branch if profile else rng.choice(BRANCHES),
+        ))
+        if len(batch) >= batch_size:
+            Registration.objects.bulk_create(batch)
+            created, batch = created + len(batch), []
+    if batch:
+        Registration.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def summarize(samples):
+    """Latency summary (milliseconds) for a list of durations in seconds."""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p50_ms': round(pct(50), 3),
+        'p95_ms': round(pct(95), 3),
+        'p99_ms': round(pct(99), 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+@contextmanager
+def timer():
+    """``with timer() as t: ...`` then read ``t.elapsed`` (seconds)."""
+    class _Timer:
+        elapsed = 0.0
+    t = _Timer()
+    start = time.perf_counter()
+    try:
+        yield t
+    finally:
+        t.elapsed = time.perf_counter() - start
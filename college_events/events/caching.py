@@ -0,0 +1,167 @@
+"""Cached read models for the public pages.
+
+Every entry is keyed by the current date and a public version token, so the
+switch from "upcoming" to "completed" at midnight gets a fresh key even
+though nothing was written, and a committed write to Event/Registration
+(see events.signals) retires every entry at once by bumping the token.
+
+Rebuilds are coalesced: the first request to miss takes a short lock
+(``cache.add``) and rebuilds; concurrent misses get the previous value for
+the same day if there is one, or wait for the builder, instead of all
+hitting the database together.
+"""
+import asyncio
+import datetime
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Event
+
+HOMEPAGE_STATS_TIMEOUT = 60 * 10
+PUBLIC_EVENTS_TIMEOUT = 60 * 10
+FEATURED_EVENTS_LIMIT = 3
+EVENT_FILTERS = ('upcoming', 'completed', 'all')
+
+VERSION_KEY = 'events:public:version'
+BUILD_LOCK_TIMEOUT = 10   # seconds before a crashed builder's lock expires
+BUILD_WAIT = 2.0          # seconds a coalesced request waits for the builder
+BUILD_POLL = 0.02
+
+
+def _seconds_until_midnight(now=None):
+    now = now or datetime.datetime.now()
+    midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+def public_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_public():
+    """Retire every public entry (a new token, not a counter, so eviction can't reuse one)."""
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _keys(name, today, version):
+    return f'events:{name}:{today.isoformat()}:{version}', f'events:{name}:latest'
+
+
+def _entries(key, latest_key, today, value, timeout):
+    timeout = min(timeout, _seconds_until_midnight())
+    return {key: value, latest_key: (today, value)}, timeout
+
+
+def get_or_build(name, build, timeout, today=None, stale_ok=True):
+    """Return the cached ``build()`` result for ``name``, rebuilding at most once at a time.
+
+    With ``stale_ok=False`` a coalesced request waits for the fresh value
+    instead of taking the previous one (for responses that carry an ETag).
+    """
+    today = today or datetime.date.today()
+    key, latest_key = _keys(name, today, public_version())
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    locked = cache.add(lock_key, 1, BUILD_LOCK_TIMEOUT)
+    if not locked:
+        stale = cache.get(latest_key) if stale_ok else None
+        if stale is not None and stale[0] == today:
+            return stale[1]
+        deadline = time.monotonic() + BUILD_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(BUILD_POLL)
+            value = cache.get(key)
+            if value is not None:
+                return value
+        # The builder is stuck or gone; build without the lock rather than fail
+    try:
+        value = build()
+        cache.set_many(*_entries(key, latest_key, today, value, timeout))
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
+
+
+async def aget_or_build(name, build, timeout, today=None, stale_ok=True):
+    """get_or_build() for async views; ``build`` is a coroutine function."""
+    today = today or datetime.date.today()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(VERSION_KEY)
+    key, latest_key = _keys(name, today, version)
+    value = await cache.aget(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    locked = await cache.aadd(lock_key, 1, BUILD_LOCK_TIMEOUT)
+    if not locked:
+        stale = await cache.aget(latest_key) if stale_ok else None
+        if stale is not None and stale[0] == today:
+            return stale[1]
+        deadline = time.monotonic() + BUILD_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(BUILD_POLL)
+            value = await cache.aget(key)
+            if value is not None:
+                return value
+    try:
+        value = await build()
+        await cache.aset_many(*_entries(key, latest_key, today, value, timeout))
+    finally:
+        if locked:
+            await cache.adelete(lock_key)
+    return value
+
+
+def homepage_stats(today=None):
+    """Counters and featured events for the homepage, cached until the next write or midnight."""
+    today = today or datetime.date.today()
+
+    def build():
+        # One conditional-aggregate query for all four counters
+        stats = Event.objects.aggregate(
+            total_events=Count('id'),
+            upcoming_count=Count('id', filter=Q(date__gte=today)),
+            completed_count=Count('id', filter=Q(date__lt=today)),
+            total_registrations=Coalesce(Sum('registration_count'), 0),
+        )
+        stats['featured_events'] = list(
+            Event.objects.filter(date__gte=today).order_by('date')[:FEATURED_EVENTS_LIMIT]
+        )
+        return stats
+
+    return get_or_build('homepage', build, HOMEPAGE_STATS_TIMEOUT, today)
+
+
+def public_events(event_filter, today=None):
+    """Events for 'upcoming', 'completed' or 'all' as a cached list."""
+    today = today or datetime.date.today()
+    event_filter = event_filter if event_filter in EVENT_FILTERS else 'all'
+    return get_or_build(
+        f'list:{event_filter}', lambda: list(Event.objects.for_filter(event_filter, today)),
+        PUBLIC_EVENTS_TIMEOUT, today,
+    )
+
+
+async def apublic_events(event_filter, today=None, stale_ok=True):
+    """public_events() for async views (shares the same cache entries)."""
+    today = today or datetime.date.today()
+    event_filter = event_filter if event_filter in EVENT_FILTERS else 'all'
+
+    async def build():
+        return [event async for event in Event.objects.for_filter(event_filter, today).aiterator()]
+
+    return await aget_or_build(f'list:{event_filter}', build, PUBLIC_EVENTS_TIMEOUT, today, stale_ok)
@@ -0,0 +1,153 @@
+"""Gate check-in: ticket lookup, idempotent admission and offline batch sync.
+
+A scanned ticket is a signed token (see events.tickets): a forged or
+guessed one is rejected before any query, and a genuine one carries the
+registration's primary key, so validating it is a single indexed lookup. Admission is
+one INSERT guarded by the unique ``Attendance.registration`` column: any
+number of gates can scan the same ticket concurrently and exactly one row
+wins; everyone else is told who got there first.
+
+When scans from different gates disagree (e.g. a scanner that was offline
+uploads later), the earliest ``scanned_at`` is kept as the admission.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import tickets
+from .models import Attendance, Registration, format_ticket_id
+
+CHECKED_IN = 'checked_in'
+ALREADY_CHECKED_IN = 'already_checked_in'
+INVALID = 'invalid'
+
+
+def _parse_scanned_at(value):
+    if not value:
+        return timezone.now()
+    dt = parse_datetime(value) if isinstance(value, str) else value
+    if dt is None:
+        raise ValueError(f'Invalid scanned_at: {value!r}')
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt, timezone.get_current_timezone())
+    return dt
+
+
+def _result(status, ticket_id, reg=None, attendance=None):
+    result = {'status': status, 'ticket_id': ticket_id}
+    if reg is not None:
+        result.update({'name': reg['name'], 'event': reg['event__name']})
+    if attendance is not None:
+        result.update({
+            'gate': attendance.gate,
+            'scanned_at': attendance.scanned_at.isoformat(),
+        })
+    return result
+
+
+def check_in(token, gate='', scanned_at=None):
+    """Admit one ticket. Safe to repeat: a second scan reports the first one."""
+    parsed = tickets.verify(token)
+    if parsed is None:
+        return _result(INVALID, token)
+    event_id, reg_id = parsed
+    ticket_id = format_ticket_id(event_id, reg_id)
+
+    reg = Registration.objects.filter(pk=reg_id, event_id=event_id).values(
+        'id', 'event_id', 'name', 'event__name'
+    ).first()
+    if reg is None:
+        return _result(INVALID, ticket_id)
+
+    scanned_at = _parse_scanned_at(scanned_at)
+    try:
+        with transaction.atomic():
+            attendance = Attendance.objects.create(
+                registration_id=reg_id, event_id=event_id, gate=gate, scanned_at=scanned_at,
+            )
+        return _result(CHECKED_IN, ticket_id, reg, attendance)
+    except IntegrityError:
+        pass
+
+    # Another scan won the insert; keep whichever happened first
+    Attendance.objects.filter(registration_id=reg_id, scanned_at__gt=scanned_at).update(
+        gate=gate, scanned_at=scanned_at,
+    )
+    attendance = Attendance.objects.get(registration_id=reg_id)
+    return _result(ALREADY_CHECKED_IN, ticket_id, reg, attendance)
+
+
+def check_in_batch(scans, default_gate=''):
+    """Apply a list of queued scans (dicts with ticket_id, gate, scanned_at).
+
+    ``ticket_id`` is the signed token from the pass; results name the plain id.
+
+    Lookups and inserts are set-based, so the cost is a handful of queries
+    plus one conditional UPDATE per already admitted ticket whose stored
+    admission is later than the batch's scan (rare: an offline scanner
+    uploading after a live gate admitted the same ticket).
+    Results are returned in input order; for each ticket the earliest scan
+    (across this batch and what is already stored) is the admission and
+    every other scan of it reports ``already_checked_in``.
+    """
+    results = [None] * len(scans)
+    wanted = {}  # reg_id -> [(scanned_at, gate, index, ticket_id), ...]
+    event_of = {}
+
+    for index, scan in enumerate(scans):
+        ticket_id = scan.get('ticket_id', '')
+        parsed = tickets.verify(ticket_id)
+        try:
+            scanned_at = _parse_scanned_at(scan.get('scanned_at'))
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            results[index] = _result(INVALID, ticket_id)
+            continue
+        event_id, reg_id = parsed
+        ticket_id = format_ticket_id(event_id, reg_id)
+        event_of[reg_id] = event_id
+        wanted.setdefault(reg_id, []).append(
+            (scanned_at, scan.get('gate') or default_gate, index, ticket_id)
+        )
+
+    regs = {
+        reg['id']: reg for reg in Registration.objects.filter(pk__in=wanted).values(
+            'id', 'event_id', 'name', 'event__name'
+        )
+    }
+    for reg_id in list(wanted):
+        reg = regs.get(reg_id)
+        if reg is None or reg['event_id'] != event_of[reg_id]:
+            for _, _, index, ticket_id in wanted.pop(reg_id):
+                results[index] = _result(INVALID, ticket_id)
+
+    earliest = {
+        reg_id: min(reg_scans, key=lambda s: (s[0], s[2]))
+        for reg_id, reg_scans in wanted.items()
+    }
+    already = dict(Attendance.objects.filter(registration_id__in=wanted)
+                   .values_list('registration_id', 'scanned_at'))
+    # Writes go first so the transaction takes the write lock up front
+    # instead of upgrading from a read lock (which SQLite cannot wait on)
+    with transaction.atomic():
+        for reg_id, stored_at in already.items():
+            scanned_at, gate, _, _ = earliest[reg_id]
+            if scanned_at >= stored_at:
+                continue  # the usual re-upload: nothing earlier to record
+            Attendance.objects.filter(registration_id=reg_id, scanned_at__gt=scanned_at).update(
+                gate=gate, scanned_at=scanned_at,
+            )
+        Attendance.objects.bulk_create([
+            Attendance(registration_id=reg_id, event_id=event_of[reg_id], gate=gate, scanned_at=scanned_at)
+            for reg_id, (scanned_at, gate, _, _) in earliest.items() if reg_id not in already
+        ], ignore_conflicts=True)
+        stored = Attendance.objects.in_bulk(list(wanted), field_name='registration_id')
+
+    for reg_id, reg_scans in wanted.items():
+        attendance = stored[reg_id]
+        admitted_index = earliest[reg_id][2] if reg_id not in already else None
+        for _, _, index, ticket_id in reg_scans:
+            status = CHECKED_IN if index == admitted_index else ALREADY_CHECKED_IN
+            results[index] = _result(status, ticket_id, regs[reg_id], attendance)
+    return results
@@ -0,0 +1,27 @@
+"""System checks for database objects the ORM doesn't know about."""
+from django.core.checks import Error, Tags, register
+
+from . import search
+
+
+@register(Tags.database)
+def check_fts_triggers(app_configs, databases=None, **kwargs):
+    """The FTS5 sync triggers from migration 0014 must still exist.
+
+    Django rebuilds a SQLite table for many ALTERs (AddField, AlterField...)
+    and drops its triggers without a word; the index would then silently go
+    stale. Runs with ``manage.py check --database default`` and when
+    ``migrate`` starts.
+    """
+    errors = []
+    for alias in databases or []:
+        missing = search.missing_fts_triggers(alias)
+        if missing:
+            errors.append(Error(
+                f'Event search index triggers are missing on database {alias!r}: {", ".join(missing)}.',
+                hint=('A migration rebuilt events_event. Add a migration that re-runs the trigger '
+                      "statements of 0014_event_search's CREATE_SQL, then rebuild the index with "
+                      f"INSERT INTO {search.FTS_TABLE}({search.FTS_TABLE}) VALUES ('rebuild')."),
+                id='events.E001',
+            ))
+    return errors
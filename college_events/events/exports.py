@@ -0,0 +1,221 @@
+"""Streaming CSV / XLSX exports of registrations.
+
+Rows are pulled from the database in chunks and written out as they arrive,
+so memory use stays flat no matter how many registrations an export covers.
+Output is grouped per event exactly like the admin panel's JS export: one
+block (CSV) or one worksheet (XLSX) per event, newest registration first.
+"""
+import csv
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+from django.db.models import Max
+
+from .models import Event, format_ticket_id
+
+EXPORT_HEADERS = [
+    'Ticket ID', 'Student Name', 'Email', 'Course', 'Branch', 'Mobile',
+    'Registration Date', 'Event', 'Event Date', 'Venue',
+]
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def event_groups(registrations):
+    """Events present in ``registrations``, most recently registered-for first."""
+    latest = (
+        registrations.order_by()
+        .values('event_id')
+        .annotate(latest=Max('timestamp'))
+        .order_by('-latest')
+    )
+    event_ids = [row['event_id'] for row in latest]
+    events = Event.objects.in_bulk(event_ids)
+    return [events[eid] for eid in event_ids]
+
+
+def event_rows(registrations, event):
+    """Export rows for one event, fetched lazily in chunks."""
+    rows = registrations.filter(event=event).values_list(
+        'id', 'name', 'email', 'course', 'branch', 'mobile', 'timestamp',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    event_date = event.date.strftime('%Y-%m-%d')
+    for reg_id, name, email, course, branch, mobile, timestamp in rows:
+        yield [
+            format_ticket_id(event.id, reg_id), name, email, course, branch, mobile,
+            timestamp.strftime('%Y-%m-%d %H:%M:%S'), event.name, event_date, event.venue,
+        ]
+
+
+class _Echo:
+    """File-like object whose write() hands the data straight back."""
+    def write(self, value):
+        return value
+
+
+def stream_csv(registrations):
+    """Yield CSV text line by line, grouped per event."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADERS)
+    for event in event_groups(registrations):
+        for row in event_rows(registrations, event):
+            yield writer.writerow(row)
+
+
+# ── XLSX ──────────────────────────────────────────────────────────
+# A minimal SpreadsheetML package written straight into a zip stream. Cells
+# use inline strings, so there is no shared-string table to hold in memory.
+
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+_CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{sheets}'
+    '</Types>'
+)
+_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>'
+)
+_WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}'
+    '<Relationship Id="rIdStyles" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+_STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+    '<cellXfs count="2"><xf xfId="0"/><xf xfId="0" fontId="1" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+class _ChunkSink:
+    """Unseekable write target that collects what zipfile writes until drained."""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _xlsx_row(values, style=None):
+    style_attr = f' s="{style}"' if style else ''
+    cells = ''.join(
+        f'<c t="inlineStr"{style_attr}><is><t>{escape(_INVALID_XML_CHARS.sub("", str(v)))}</t></is></c>'
+        for v in values
+    )
+    return f'<row>{cells}</row>'
+
+
+def sheet_title(name, taken):
+    """Excel-safe, unique sheet name (31 chars max, like the JS export)."""
+    base = _INVALID_SHEET_CHARS.sub(' ', name).strip() or 'Event'
+    title = base[:31]
+    n = 2
+    while title.lower() in taken:
+        suffix = f' ({n})'
+        title = base[:31 - len(suffix)] + suffix
+        n += 1
+    taken.add(title.lower())
+    return title
+
+
+def stream_xlsx(registrations, rows_per_chunk=500):
+    """Yield an .xlsx workbook as bytes, one worksheet per event."""
+    sink = _ChunkSink()
+    titles, taken = [], set()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for n, event in enumerate(event_groups(registrations), start=1):
+            titles.append(sheet_title(event.name, taken))
+            with zf.open(f'xl/worksheets/sheet{n}.xml', 'w') as sheet:
+                sheet.write((_SHEET_HEAD + _xlsx_row(EXPORT_HEADERS, style=1)).encode())
+                buffer = []
+                for row in event_rows(registrations, event):
+                    buffer.append(_xlsx_row(row))
+                    if len(buffer) >= rows_per_chunk:
+                        sheet.write(''.join(buffer).encode())
+                        buffer = []
+                        yield sink.drain()
+                sheet.write((''.join(buffer) + _SHEET_TAIL).encode())
+            yield sink.drain()
+
+        if not titles:
+            # A workbook needs at least one sheet to open
+            titles.append('Registrations')
+            zf.writestr('xl/worksheets/sheet1.xml', _SHEET_HEAD + _xlsx_row(EXPORT_HEADERS, style=1) + _SHEET_TAIL)
+
+        count = range(1, len(titles) + 1)
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES_XML.format(
+            sheets=''.join(_SHEET_CONTENT_TYPE.format(n=n) for n in count)))
+        zf.writestr('_rels/.rels', _ROOT_RELS_XML)
+        zf.writestr('xl/workbook.xml', _WORKBOOK_XML.format(sheets=''.join(
+            f'<sheet name={quoteattr(title)} sheetId="{n}" r:id="rId{n}"/>'
+            for n, title in zip(count, titles))))
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS_XML.format(sheets=''.join(
+            f'<Relationship Id="rId{n}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{n}.xml"/>'
+            for n in count)))
+        zf.writestr('xl/styles.xml', _STYLES_XML)
+    yield sink.drain()
+
+
+def stream_export(registrations, fmt):
+    """Dispatch to the streaming writer for ``fmt`` ('csv' or 'xlsx')."""
+    if fmt == 'xlsx':
+        return stream_xlsx(registrations)
+    if fmt == 'csv':
+        return stream_csv(registrations)
+    raise ValueError(f'Unsupported export format: {fmt}')
@@ -0,0 +1,155 @@
+"""Bulk registration import from CSV (walk-in and departmental lists).
+
+The file is streamed in batches. Each batch is validated column by column,
+checked against existing registrations with one query, and written with a
+single ``bulk_create(ignore_conflicts=True)`` against the unique
+``(event, email)`` constraint. Every rejected row is reported with its line
+number and the reasons, so the sheet can be fixed and re-uploaded as is.
+"""
+import csv
+import re
+from itertools import islice
+
+from django.db import transaction
+
+from .models import Event, Registration
+
+IMPORT_COLUMNS = ['name', 'email', 'mobile', 'course', 'branch']
+IMPORT_BATCH_SIZE = 5000
+
+MOBILE_RE = re.compile(r'^\d{10}$')
+# Deliberately loose — the same shape the registration form's type="email" accepts
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+HEADER_ALIASES = {
+    'student name': 'name', 'full name': 'name', 'e-mail': 'email',
+    'mobile number': 'mobile', 'phone': 'mobile', 'event id': 'event_id', 'event': 'event_id',
+}
+
+
+def _normalise_header(header):
+    key = (header or '').strip().lower()
+    return HEADER_ALIASES.get(key, key.replace(' ', '_'))
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _validate_batch(rows, event_id, known_events):
+    """Return ``(valid, errors)``; each column is checked in one pass over the batch."""
+    errors = {}
+
+    def fail(line, message):
+        errors.setdefault(line, []).append(message)
+
+    for column in IMPORT_COLUMNS:
+        for line, row in rows:
+            if not row[column]:
+                fail(line, f'{column} is required')
+
+    for line, row in rows:
+        if row['mobile'] and not MOBILE_RE.match(row['mobile']):
+            fail(line, 'mobile must be a 10-digit number')
+    for line, row in rows:
+        if row['email'] and not EMAIL_RE.match(row['email']):
+            fail(line, 'email is not valid')
+
+    if event_id is None:
+        for line, row in rows:
+            raw = row.get('event_id', '')
+            row['event_id'] = int(raw) if raw.isdigit() else None
+            if row['event_id'] not in known_events:
+                fail(line, f'unknown event {raw!r}' if raw else 'event_id is required')
+    else:
+        for _, row in rows:
+            row['event_id'] = event_id
+
+    valid = [(line, row) for line, row in rows if line not in errors]
+    return valid, errors
+
+
+def _insert(registrations):
+    """bulk_create the rows, skipping conflicts; returns how many were inserted."""
+    if not registrations:
+        return 0
+    existing = Registration.objects.filter(
+        event_id__in={reg.event_id for reg in registrations},
+        email__in={reg.email for reg in registrations},
+    )
+    with transaction.atomic():
+        before = existing.count()
+        Registration.objects.bulk_create(registrations, ignore_conflicts=True)
+        return existing.count() - before
+
+
+def import_registrations(fileobj, event=None, batch_size=IMPORT_BATCH_SIZE):
+    """Import registrations from a CSV text stream.
+
+    Columns: name, email, mobile, course, branch, plus event_id when no
+    ``event`` is given. Returns a report dict with ``rows``, ``created``,
+    ``duplicates`` and ``errors`` (a list of ``{'line': n, 'errors': [...]}``).
+    """
+    reader = csv.reader(fileobj)
+    header = [_normalise_header(h) for h in next(reader, [])]
+    missing = [c for c in IMPORT_COLUMNS + ([] if event else ['event_id']) if c not in header]
+    if missing:
+        raise ValueError(f'Missing column(s): {", ".join(missing)}')
+
+    event_id = event.pk if isinstance(event, Event) else event
+    known_events = set(Event.objects.values_list('pk', flat=True)) if event_id is None else {event_id}
+    report = {'rows': 0, 'created': 0, 'duplicates': 0, 'errors': []}
+
+    lines = (
+        (line, {key: (values[i] if i < len(values) else '').strip() for i, key in enumerate(header)})
+        for line, values in enumerate(reader, start=2)
+        if any(v.strip() for v in values)
+    )
+    for batch in _batches(lines, batch_size):
+        report['rows'] += len(batch)
+        valid, errors = _validate_batch(batch, event_id, known_events)
+
+        # Drop rows already registered, or repeated earlier in the file
+        pairs = {(row['event_id'], row['email']) for _, row in valid}
+        taken = set(Registration.objects.filter(
+            event_id__in={e for e, _ in pairs}, email__in={m for _, m in pairs},
+        ).values_list('event_id', 'email'))
+        # Seats left on limited events; rows past capacity are rejected, not oversold
+        seats = {
+            pk: capacity - taken_seats for pk, capacity, taken_seats in Event.objects.filter(
+                pk__in={e for e, _ in pairs}, capacity__isnull=False,
+            ).values_list('pk', 'capacity', 'registration_count')
+        }
+        to_create = []
+        for line, row in valid:
+            key = (row['event_id'], row['email'])
+            if key in taken:
+                errors.setdefault(line, []).append('already registered for this event')
+                report['duplicates'] += 1
+                continue
+            if key[0] in seats:
+                if seats[key[0]] <= 0:
+                    errors.setdefault(line, []).append('event is full')
+                    continue
+                seats[key[0]] -= 1
+            taken.add(key)
+            to_create.append(Registration(**{k: row[k] for k in IMPORT_COLUMNS}, event_id=row['event_id']))
+
+        # ignore_conflicts covers registrations that land between the check and
+        # the insert; those rows are skipped, so count what actually got written
+        inserted = _insert(to_create)
+        report['created'] += inserted
+        report['duplicates'] += len(to_create) - inserted
+        report['errors'].extend({'line': line, 'errors': msgs} for line, msgs in sorted(errors.items()))
+
+    return report
+
+
+def write_error_report(report, fileobj):
+    """Write the per-row error list from ``import_registrations`` as CSV."""
+    writer = csv.writer(fileobj)
+    writer.writerow(['line', 'errors'])
+    for entry in report['errors']:
+        writer.writerow([entry['line'], '; '.join(entry['errors'])])
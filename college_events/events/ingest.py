@@ -0,0 +1,238 @@
+"""Write-behind registration ingestion (``settings.REGISTRATION_INGEST``).
+
+During a registration burst every POST to ``register`` would otherwise take
+the main database's write lock. In ingestion mode a validated registration
+is appended to a small local SQLite queue (its own file, WAL journal,
+synchronous=FULL) and the student gets a provisional token straight away.
+A background writer claims queued rows in batches and applies each batch to
+the main database in one transaction, recording a per-row outcome that the
+status endpoint reports.
+
+Duplicates are caught three times: against existing registrations before
+queueing (in the view), by a partial unique index over the rows still
+pending, and by the ``(event, email)`` constraint when the batch is written.
+"""
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, close_old_connections, transaction
+
+from . import tickets, waitlist
+from .models import Event, EventFull, Registration, format_ticket_id
+
+logger = logging.getLogger(__name__)
+
+QUEUED, FLUSHING = 'queued', 'flushing'
+ACCEPTED, WAITLISTED, DUPLICATE, REJECTED = 'accepted', 'waitlisted', 'duplicate', 'rejected'
+
+REGISTRATION_FIELDS = ['name', 'email', 'mobile', 'course', 'branch']
+# A claimed batch still unfinished after this many seconds is assumed abandoned
+CLAIM_TIMEOUT = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    token           TEXT NOT NULL UNIQUE,
+    event_id        INTEGER NOT NULL,
+    user_id         INTEGER,
+    name            TEXT NOT NULL,
+    email           TEXT NOT NULL,
+    mobile          TEXT NOT NULL,
+    course          TEXT NOT NULL,
+    branch          TEXT NOT NULL,
+    queued_at       REAL NOT NULL,
+    status          TEXT NOT NULL DEFAULT 'queued',
+    claimed_at      REAL,
+    registration_id INTEGER,
+    position        INTEGER,
+    error           TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS pending_event_email ON pending (event_id, email)
+    WHERE status IN ('queued', 'flushing');
+CREATE INDEX IF NOT EXISTS pending_status ON pending (status, id);
+"""
+
+_local = threading.local()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _queue(create=False):
+    """This thread's connection to the queue file (autocommit mode).
+
+    Only enqueue() creates the file; before that (e.g. with ingestion off)
+    the readers get None and treat the queue as empty.
+    """
+    path = str(settings.REGISTRATION_QUEUE_PATH)
+    if getattr(_local, 'path', None) != path:
+        if not create and not os.path.exists(path):
+            return None
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        # An acknowledged registration must survive a power cut, not just a crash
+        conn.execute('PRAGMA synchronous=FULL')
+        conn.executescript(SCHEMA)
+        _local.conn, _local.path = conn, path
+    return _local.conn
+
+
+class _immediate:
+    """``with _immediate(conn):`` a write transaction that takes the lock up front."""
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+
+def enqueue(event_id, user_id=None, **fields):
+    """Append a validated registration; returns its provisional token.
+
+    Raises IntegrityError when the same email is already pending for the event.
+    """
+    token = 'PRV-' + secrets.token_urlsafe(12)
+    try:
+        _queue(create=True).execute(
+            'INSERT INTO pending (token, event_id, user_id, name, email, mobile, course, branch, queued_at)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (token, event_id, user_id, *(fields[f] for f in REGISTRATION_FIELDS), time.time()),
+        )
+    except sqlite3.IntegrityError as e:
+        raise IntegrityError(str(e)) from e
+    ensure_writer()
+    return token
+
+
+def status(token):
+    """Outcome for a provisional token, or None if it is unknown."""
+    conn = _queue()
+    row = conn and conn.execute('SELECT * FROM pending WHERE token = ?', (token,)).fetchone()
+    if row is None:
+        return None
+    if row['status'] in (QUEUED, FLUSHING):
+        ensure_writer()  # e.g. rows left over from before a restart
+        return {'status': QUEUED}
+    result = {'status': row['status']}
+    if row['registration_id']:
+        result['ticket_id'] = format_ticket_id(row['event_id'], row['registration_id'])
+        # The signed value the pass and its QR code carry (see events.tickets)
+        result['ticket_token'] = tickets.sign(row['event_id'], row['registration_id'])
+    if row['position']:
+        result['position'] = row['position']
+    if row['error']:
+        result['error'] = row['error']
+    return result
+
+
+def _claim(conn, limit):
+    now = time.time()
+    with _immediate(conn):
+        conn.execute("UPDATE pending SET status = 'queued' WHERE status = 'flushing' AND claimed_at < ?",
+                     (now - CLAIM_TIMEOUT,))
+        rows = conn.execute("SELECT * FROM pending WHERE status = 'queued' ORDER BY id LIMIT ?",
+                            (limit,)).fetchall()
+        conn.executemany("UPDATE pending SET status = 'flushing', claimed_at = ? WHERE id = ?",
+                         [(now, row['id']) for row in rows])
+    return rows
+
+
+def _apply(row, events, users):
+    """Write one queued row; returns ``(status, registration_id, position, error)``."""
+    if row['event_id'] not in events:
+        return REJECTED, None, None, 'This event no longer exists.'
+    fields = {f: row[f] for f in REGISTRATION_FIELDS}
+    user_id = row['user_id'] if row['user_id'] in users else None
+    try:
+        reg = Registration.objects.create(event_id=row['event_id'], user_id=user_id, **fields)
+        return ACCEPTED, reg.pk, None, None
+    except EventFull:
+        try:
+            entry, promoted = waitlist.join(row['event_id'], user_id=user_id, **fields)
+        except IntegrityError:
+            return DUPLICATE, None, None, 'Already on the waitlist for this event.'
+        if not promoted:
+            return WAITLISTED, None, waitlist.position(entry), None
+    except IntegrityError:
+        pass
+
+    # Either promoted off the waitlist, or the (event, email) pair exists:
+    # our own earlier write (a batch re-run after a crash) counts as accepted
+    existing = Registration.objects.filter(event_id=row['event_id'], email=row['email']).values(
+        'pk', 'name', 'mobile').first()
+    if existing and (existing['name'], existing['mobile']) == (row['name'], row['mobile']):
+        return ACCEPTED, existing['pk'], None, None
+    return DUPLICATE, None, None, 'This email is already registered for this event.'
+
+
+def flush(batch_size=None):
+    """Apply one batch of queued registrations; returns how many rows it took."""
+    conn = _queue()
+    if conn is None:
+        return 0
+    rows = _claim(conn, batch_size or settings.REGISTRATION_INGEST_BATCH)
+    if not rows:
+        return 0
+    try:
+        events = set(Event.objects.filter(pk__in={r['event_id'] for r in rows}).values_list('pk', flat=True))
+        users = set(User.objects.filter(pk__in={r['user_id'] for r in rows}).values_list('pk', flat=True))
+        # One transaction (one lock, one fsync) for the whole batch; each row
+        # runs in its own savepoint so a duplicate doesn't undo its neighbours
+        with transaction.atomic():
+            outcomes = [_apply(row, events, users) for row in rows]
+    except Exception:
+        with _immediate(conn):
+            conn.executemany("UPDATE pending SET status = 'queued', claimed_at = NULL WHERE id = ?",
+                             [(row['id'],) for row in rows])
+        raise
+    with _immediate(conn):
+        conn.executemany(
+            'UPDATE pending SET status = ?, registration_id = ?, position = ?, error = ? WHERE id = ?',
+            [(*outcome, row['id']) for row, outcome in zip(rows, outcomes)],
+        )
+    return len(rows)
+
+
+def prune(days):
+    """Forget finished rows older than ``days``; returns how many were removed."""
+    if _queue() is None:
+        return 0
+    with _immediate(_queue()) as conn:
+        return conn.execute("DELETE FROM pending WHERE status NOT IN ('queued', 'flushing') AND queued_at < ?",
+                            (time.time() - days * 86400,)).rowcount
+
+
+def run_writer(interval=None, batch_size=None, stop=None):
+    """Drain the queue, sleep ``interval`` seconds, repeat until ``stop`` is set."""
+    interval = settings.REGISTRATION_INGEST_INTERVAL if interval is None else interval
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            while flush(batch_size):
+                pass
+        except Exception:
+            logger.exception('Flushing the registration queue failed; will retry')
+        finally:
+            close_old_connections()
+        stop.wait(interval)
+
+
+def ensure_writer():
+    """Start the in-process writer thread if this process is meant to run one."""
+    global _writer
+    if settings.REGISTRATION_INGEST_WRITER != 'thread':
+        return
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=run_writer, name='registration-writer', daemon=True)
+            _writer.start()
@@ -0,0 +1,195 @@
+"""Background jobs for slow side effects (confirmation emails and the like).
+
+A job is a ``Job`` row in the main database, written in the same
+transaction as whatever caused it: a rolled-back registration never sends
+its email, and a committed one always has its job. Workers claim due jobs,
+run their handlers in a thread pool and record the outcome. A failed
+attempt is retried with exponential backoff (plus jitter) until the job's
+``max_attempts``, after which it stays ``failed`` for an admin to look at.
+
+With ``settings.JOB_RUNNER = 'thread'`` each process runs a worker thread
+that is woken as soon as a job commits; with 'command' a separate
+``manage.py run_jobs`` does the work.
+
+Delivery is at least once: a worker that dies mid-job leaves its claim to
+expire after CLAIM_TIMEOUT, and the job runs again. Handlers should
+tolerate a repeat; ``key`` only stops the same job being queued twice.
+"""
+import logging
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# A claimed job still unfinished after this many seconds is assumed abandoned
+CLAIM_TIMEOUT = 300
+
+HANDLERS = {}   # job name -> callable(**payload)
+
+_worker = None
+_worker_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def task(name):
+    """Register the decorated function as the handler for jobs called ``name``."""
+    def register(fn):
+        HANDLERS[name] = fn
+        return fn
+    return register
+
+
+def enqueue(name, key=None, delay=0, max_attempts=None, **payload):
+    """Queue ``name(**payload)``; returns the Job (the existing one if ``key`` is taken).
+
+    Call it inside the transaction that makes the side effect necessary.
+    """
+    if name not in HANDLERS:
+        raise ValueError(f'No job handler registered for {name!r}.')
+    fields = {
+        'name': name,
+        'payload': payload,
+        'key': key,
+        'run_at': timezone.now() + timedelta(seconds=delay),
+        'max_attempts': max_attempts or settings.JOB_MAX_ATTEMPTS,
+    }
+    try:
+        with transaction.atomic():
+            job = Job.objects.create(**fields)
+    except IntegrityError:
+        if key is None:
+            raise
+        return Job.objects.get(key=key)
+    transaction.on_commit(wake)
+    return job
+
+
+def enqueue_many(name, payloads, delay=0, max_attempts=None):
+    """Queue one ``name`` job per ``{key: payload}`` item with a single INSERT.
+
+    Keys that are already taken are skipped. For rows written with
+    bulk_create(), which sends no post_save.
+    """
+    if name not in HANDLERS:
+        raise ValueError(f'No job handler registered for {name!r}.')
+    run_at = timezone.now() + timedelta(seconds=delay)
+    Job.objects.bulk_create([
+        Job(name=name, payload=payload, key=key, run_at=run_at,
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS)
+        for key, payload in payloads.items()
+    ], ignore_conflicts=True)
+    transaction.on_commit(wake)
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying after the ``attempts``-th failure."""
+    delay = min(settings.JOB_BACKOFF_MAX, settings.JOB_BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim(limit):
+    """Mark up to ``limit`` due jobs as running for this caller; returns them."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        Job.objects.filter(status=Job.RUNNING, claimed_at__lt=now - timedelta(seconds=CLAIM_TIMEOUT)).update(
+            status=Job.QUEUED, claimed_by='')
+        due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+        ids = list(due.values_list('pk', flat=True)[:limit])
+        # Re-checking the status makes a concurrent claimer's rows drop out
+        Job.objects.filter(pk__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING, claimed_by=token, claimed_at=now, attempts=F('attempts') + 1)
+    return list(Job.objects.filter(claimed_by=token, status=Job.RUNNING))
+
+
+def run(job):
+    """Run one claimed job and record how it went."""
+    mine = Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by, status=Job.RUNNING)
+    try:
+        handler = HANDLERS[job.name]
+        handler(**job.payload)
+    except Exception as e:
+        logger.warning('Job %s failed (attempt %d of %d)', job, job.attempts, job.max_attempts, exc_info=True)
+        error = f'{type(e).__name__}: {e}'
+        if job.attempts >= job.max_attempts:
+            mine.update(status=Job.FAILED, last_error=error, finished_at=timezone.now())
+        else:
+            retry_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+            mine.update(status=Job.QUEUED, last_error=error, run_at=retry_at, claimed_by='')
+        return False
+    mine.update(status=Job.DONE, finished_at=timezone.now())
+    return True
+
+
+def _run_in_thread(job):
+    try:
+        return run(job)
+    finally:
+        # Pool threads otherwise keep a connection each
+        close_old_connections()
+
+
+def run_pending(batch_size=None, executor=None):
+    """Claim one batch of due jobs and run them (on ``executor``'s threads if given).
+
+    Returns how many jobs were claimed.
+    """
+    jobs = claim(batch_size or settings.JOB_BATCH_SIZE)
+    if executor is None:
+        for job in jobs:
+            run(job)
+    else:
+        list(executor.map(_run_in_thread, jobs))
+    return len(jobs)
+
+
+def prune(days):
+    """Delete finished jobs older than ``days``; returns how many were removed."""
+    cutoff = timezone.now() - timedelta(days=days)
+    return Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()[0]
+
+
+def run_worker(threads=None, interval=None, batch_size=None, stop=None):
+    """Run due jobs, wait up to ``interval`` seconds (or until woken), repeat until ``stop`` is set."""
+    interval = settings.JOB_POLL_INTERVAL if interval is None else interval
+    stop = stop or threading.Event()
+    with ThreadPoolExecutor(max_workers=threads or settings.JOB_THREADS,
+                            thread_name_prefix='job') as pool:
+        while not stop.is_set():
+            # Cleared first, so a job committed while this pass runs still wakes the next one
+            _wake.clear()
+            try:
+                while run_pending(batch_size=batch_size, executor=pool):
+                    pass
+            except Exception:
+                logger.exception('Running background jobs failed; will retry')
+            finally:
+                close_old_connections()
+            _wake.wait(interval)
+
+
+def wake():
+    """Nudge this process's worker to look for jobs now (after a commit)."""
+    ensure_worker()
+    _wake.set()
+
+
+def ensure_worker():
+    """Start the in-process worker thread if this process is meant to run one."""
+    global _worker
+    if settings.JOB_RUNNER != 'thread':
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=run_worker, name='job-worker', daemon=True)
+            _worker.start()
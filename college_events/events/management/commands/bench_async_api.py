@@ -0,0 +1,138 @@
+import asyncio
+import datetime
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.test import Client, override_settings
+from django.urls import path
+
+from events import benchmarking, views
+from events.models import Event, Registration, StudentProfile
+
+
+# The synchronous implementations the async views replaced, kept as the
+# baseline. Under ASGI each one runs through sync_to_async(thread_sensitive=True).
+
+def sync_get_events_api(request):
+    events = Event.objects.for_filter(request.GET.get('filter', 'all'), datetime.date.today()).values(
+        'id', 'name', 'description', 'date', 'time', 'venue', 'image', 'registration_count', 'capacity'
+    )
+    events_list = list(events)
+    for event in events_list:
+        event['date'] = event['date'].strftime('%Y-%m-%d')
+        event['time'] = event['time'].strftime('%H:%M') if event['time'] else None
+    return JsonResponse(events_list, safe=False)
+
+
+def sync_student_profile_api(request):
+    user = request.user
+    profile = StudentProfile.objects.filter(user=user).first()
+    return JsonResponse({
+        'authenticated': True, 'name': user.get_full_name() or user.username, 'email': user.email,
+        'mobile': profile.mobile if profile else '', 'course': profile.course if profile else '',
+    })
+
+
+def sync_api_check_registration(request):
+    return JsonResponse({'registered': Registration.objects.filter(
+        event_id=request.GET.get('event_id'), user=request.user).exists()})
+
+
+def sync_api_my_registrations(request):
+    registrations = list(Registration.objects.filter(user=request.user).values(
+        'id', 'event_id', 'name', 'email', 'mobile', 'course', 'branch'))
+    return JsonResponse({'registered_event_ids': [r['event_id'] for r in registrations],
+                         'registrations': registrations})
+
+
+ENDPOINTS = {
+    'get_events_api': (sync_get_events_api, views.get_events_api, 'filter=upcoming'),
+    'student_profile_api': (sync_student_profile_api, views.student_profile_api, ''),
+    'api_check_registration': (sync_api_check_registration, views.api_check_registration, 'event_id={event}'),
+    'api_my_registrations': (sync_api_my_registrations, views.api_my_registrations, ''),
+}
+
+# The benchmark serves this module as ROOT_URLCONF: /sync/<name>/ and /async/<name>/
+urlpatterns = [
+    path(f'{kind}/{name}/', view)
+    for name, (sync_view, async_view, _) in ENDPOINTS.items()
+    for kind, view in (('sync', sync_view), ('async', async_view))
+]
+
+
+async def _asgi_get(app, path, query, cookie):
+    """One GET through the ASGI application; returns the status code."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    body = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    status = []
+
+    async def receive():
+        if body:
+            return body.pop()
+        await asyncio.Event().wait()  # no disconnect; Django cancels this when done
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+class Command(BaseCommand):
+    help = 'Compare the sync and async JSON API views under concurrent ASGI load (uses a scratch database).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint and mode.')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--events', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with benchmarking.scratch_database(), override_settings(ROOT_URLCONF=__name__, ALLOWED_HOSTS=['localhost']):
+            events = benchmarking.seed_events(options['events'], rng=rng)
+            student = User.objects.create_user('bench-student', email='bench@example.com', password='x')
+            StudentProfile.objects.create(user=student, mobile='9876543210', course='BCA')
+            benchmarking.seed_registrations(rng.sample(events, 20), 1, rng=rng, users=[student])
+
+            client = Client()
+            client.force_login(student)
+            cookie = f'sessionid={client.cookies["sessionid"].value}'
+
+            app = get_asgi_application()
+            self.stdout.write(f'{options["requests"]} requests per endpoint, {options["concurrency"]} concurrent\n')
+            for name, (_, _, query) in ENDPOINTS.items():
+                query = query.format(event=events[0].pk)
+                results = {kind: asyncio.run(self._load(app, f'/{kind}/{name}/', query, cookie, options))
+                           for kind in ('sync', 'async')}
+                sync_rps, async_rps = results['sync'][0], results['async'][0]
+                self.stdout.write(f'{name}: sync {sync_rps:,.0f} req/s (p99 {results["sync"][1]["p99_ms"]} ms), '
+                                  f'async {async_rps:,.0f} req/s (p99 {results["async"][1]["p99_ms"]} ms), '
+                                  f'x{async_rps / sync_rps:.2f}')
+
+    async def _load(self, app, path, query, cookie, options):
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        latencies = []
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                status = await _asgi_get(app, path, query, cookie)
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    raise RuntimeError(f'{path} returned {status}')
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(options['requests'])))
+        elapsed = time.perf_counter() - start
+        return options['requests'] / elapsed, benchmarking.summarize(latencies)
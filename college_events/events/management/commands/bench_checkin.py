@@ -0,0 +1,103 @@
+import random
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from events import benchmarking, checkin
+from events.benchmarking import timer
+from events.models import Attendance, Event
+from events.tickets import sign as sign_ticket
+
+
+class Command(BaseCommand):
+    help = 'Benchmark gate check-in throughput with several concurrent gates (uses a scratch database).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=5000)
+        parser.add_argument('--gates', type=int, default=8)
+        parser.add_argument('--rescan', type=float, default=0.2,
+                            help='Fraction of tickets scanned again at a second gate.')
+        parser.add_argument('--batch-size', type=int, default=250,
+                            help='Scans per upload in the offline-sync phase.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        gates = options['gates']
+
+        with benchmarking.scratch_database():
+            event = Event.objects.create(name='Gate Bench', description='-', date='2030-01-01', venue='Arena')
+            benchmarking.seed_registrations([event], options['tickets'], rng=rng)
+            tickets = [sign_ticket(event.id, pk) for pk in event.registrations.values_list('pk', flat=True)]
+
+            scans = tickets + rng.sample(tickets, int(len(tickets) * options['rescan']))
+            rng.shuffle(scans)
+            lanes = [scans[g::gates] for g in range(gates)]
+
+            self.stdout.write(f'{len(tickets)} tickets, {len(scans)} scans over {gates} gates\n')
+            self._live_phase(lanes, len(tickets))
+            Attendance.objects.all().delete()
+            self._batch_phase(lanes, len(tickets), options['batch_size'])
+
+    def _report(self, label, scans, elapsed, latencies, admitted, expected, errors):
+        stats = benchmarking.summarize(latencies)
+        self.stdout.write(
+            f'{label}: {scans / elapsed:,.0f} scans/s '
+            f'(p50 {stats.get("p50_ms", 0)} ms, p95 {stats.get("p95_ms", 0)} ms, '
+            f'p99 {stats.get("p99_ms", 0)} ms), {errors} errors'
+        )
+        style = self.style.SUCCESS if admitted == expected else self.style.ERROR
+        self.stdout.write(style(f'  admitted {admitted} / {expected} tickets'))
+
+    def _run_gates(self, lanes, work):
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def gate(n, lane):
+            local, failed = work(f'gate-{n}', lane)
+            with lock:
+                latencies.extend(local)
+                errors.append(failed)
+            connection.close()
+
+        threads = [threading.Thread(target=gate, args=(n, lane)) for n, lane in enumerate(lanes)]
+        with timer() as t:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return t.elapsed, latencies, sum(errors)
+
+    def _live_phase(self, lanes, expected):
+        def work(gate, lane):
+            local, failed = [], 0
+            for ticket in lane:
+                with timer() as t:
+                    try:
+                        checkin.check_in(ticket, gate=gate)
+                    except OperationalError:
+                        failed += 1
+                local.append(t.elapsed)
+            return local, failed
+
+        elapsed, latencies, errors = self._run_gates(lanes, work)
+        self._report('live scans', sum(map(len, lanes)), elapsed, latencies,
+                     Attendance.objects.count(), expected, errors)
+
+    def _batch_phase(self, lanes, expected, batch_size):
+        def work(gate, lane):
+            local, failed = [], 0
+            for start in range(0, len(lane), batch_size):
+                batch = [{'ticket_id': ticket, 'gate': gate} for ticket in lane[start:start + batch_size]]
+                with timer() as t:
+                    try:
+                        checkin.check_in_batch(batch)
+                    except OperationalError:
+                        failed += 1
+                local.append(t.elapsed)
+            return local, failed
+
+        elapsed, latencies, errors = self._run_gates(lanes, work)
+        self._report(f'offline sync (batches of {batch_size})', sum(map(len, lanes)), elapsed,
+                     latencies, Attendance.objects.count(), expected, errors)
@@ -0,0 +1,58 @@
+import datetime
+import random
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+
+from events import benchmarking
+from events.models import Event
+
+UNCACHED = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = 'Time completed_events.html and homepage.html with and without event card fragment caching (uses a scratch database).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=300)
+        parser.add_argument('--renders', type=int, default=30, help='Timed renders per page and mode.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with benchmarking.scratch_database():
+            benchmarking.seed_events(options['events'], rng=rng)
+            today = datetime.date.today()
+            request = RequestFactory().get('/')
+            request.user = AnonymousUser()
+            pages = {
+                'completed_events.html': {'events': list(Event.objects.filter(date__lt=today).order_by('-date'))},
+                'homepage.html': {'featured_events': list(Event.objects.filter(date__gte=today).order_by('date')[:3]),
+                                  'total_events': options['events']},
+            }
+            self.stdout.write(f'{options["events"]} events, {options["renders"]} renders per page\n')
+            for page, context in pages.items():
+                def render():
+                    return render_to_string(f'events/{page}', context, request)
+
+                with override_settings(CACHES=UNCACHED):
+                    uncached = self._time(render, options['renders'])
+                cache.clear()
+                with benchmarking.timer() as cold:
+                    render()
+                cached = self._time(render, options['renders'])
+                self.stdout.write(
+                    f'{page}: uncached p50 {uncached["p50_ms"]} ms, first cached render {cold.elapsed * 1000:.3f} ms, '
+                    f'cached p50 {cached["p50_ms"]} ms, x{uncached["p50_ms"] / cached["p50_ms"]:.2f}'
+                )
+
+    def _time(self, render, count):
+        samples = []
+        for _ in range(count):
+            with benchmarking.timer() as t:
+                render()
+            samples.append(t.elapsed)
+        return benchmarking.summarize(samples)
@@ -0,0 +1,94 @@
+import datetime
+import random
+import statistics
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from events import benchmarking
+from events.benchmarking import timer
+from events.models import Event, Registration
+
+
+class Command(BaseCommand):
+    help = ('Seed a large scratch SQLite database and show EXPLAIN QUERY PLAN and timings '
+            'for the hot view queries without and with the indexes from migration 0011.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=2000)
+        parser.add_argument('--per-event', type=int, default=100)
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with benchmarking.scratch_database():
+            self.stdout.write('Seeding...')
+            users = User.objects.bulk_create(
+                [User(username=f'bench{n}') for n in range(options['users'])], batch_size=1000,
+            )
+            events = benchmarking.seed_events(options['events'], rng=rng)
+            benchmarking.seed_registrations(events, options['per_event'], rng=rng, users=users)
+            self.stdout.write(f'{Event.objects.count()} events, {Registration.objects.count()} registrations\n')
+
+            queries = self._queries(rng.choice(events), rng.choice(users))
+            indexes = Event._meta.indexes + Registration._meta.indexes
+
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(self._model_for(index), index)
+            before = self._measure(queries, options['repeat'], 'WITHOUT hot-query indexes')
+
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.add_index(self._model_for(index), index)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            after = self._measure(queries, options['repeat'], 'WITH hot-query indexes')
+
+            self.stdout.write('\nSummary (median ms):')
+            for label in queries:
+                speedup = before[label] / after[label] if after[label] else float('inf')
+                self.stdout.write(f'  {label:<34} {before[label]:>9.3f} -> {after[label]:>9.3f}  ({speedup:.1f}x)')
+
+    @staticmethod
+    def _model_for(index):
+        return Event if index in Event._meta.indexes else Registration
+
+    @staticmethod
+    def _queries(event, user):
+        today = datetime.date.today()
+        return {
+            'event_list (upcoming)': lambda: Event.objects.filter(date__gte=today).order_by('date'),
+            'completed_events': lambda: Event.objects.filter(date__lt=today).order_by('-date'),
+            # The columns the get_events_api version-stamp aggregate reads
+            'get_events_api version stamp': lambda: Event.objects.filter(date__gte=today).order_by()
+                .values_list('updated_at', 'registration_count'),
+            'student_dashboard': lambda: Registration.objects.filter(user=user)
+                .select_related('event').order_by('-timestamp'),
+            'register duplicate check': lambda: Registration.objects.filter(
+                event=event, email='student1@e%d.example.com' % event.pk),
+            'admin registrations page': lambda: Registration.objects.filtered()
+                .values('id', 'name', 'timestamp', 'event__name')[:500],
+            'admin registrations, one event': lambda: Registration.objects.filtered(event=event.pk)
+                .values('id', 'name', 'timestamp')[:500],
+        }
+
+    def _measure(self, queries, repeat, heading):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {heading} =='))
+        medians = {}
+        for label, make_qs in queries.items():
+            qs = make_qs()
+            plan = qs.explain()
+            samples = []
+            for _ in range(repeat):
+                with timer() as t:
+                    list(make_qs())
+                samples.append(t.elapsed)
+            medians[label] = statistics.median(samples) * 1000
+            self.stdout.write(f'\n{label}: median {medians[label]:.3f} ms')
+            for line in plan.splitlines():
+                self.stdout.write(f'    {line}')
+        return medians
@@ -0,0 +1,89 @@
+import random
+import threading
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, OperationalError, connection
+
+from events import benchmarking
+from events.benchmarking import timer
+from events.models import Event, EventFull, Registration
+
+
+class Command(BaseCommand):
+    help = 'Hammer one limited-capacity event from many threads and check it is never oversold (uses a scratch database).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--capacity', type=int, default=300)
+        parser.add_argument('--attempts', type=int, default=2000)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--duplicates', type=float, default=0.1,
+                            help='Fraction of attempts that resubmit an email already tried.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        threads = options['threads']
+        attempts = options['attempts']
+
+        emails = [f'student{n}@example.com' for n in range(attempts)]
+        emails += rng.sample(emails, int(attempts * options['duplicates']))
+        rng.shuffle(emails)
+        lanes = [emails[t::threads] for t in range(threads)]
+
+        with benchmarking.scratch_database():
+            event = Event.objects.create(
+                name='Popular Workshop', description='-', date='2030-01-01', venue='Lab 1',
+                capacity=options['capacity'],
+            )
+            outcomes, latencies = Counter(), []
+            lock = threading.Lock()
+
+            def worker(lane):
+                local, seen = Counter(), []
+                for email in lane:
+                    with timer() as t:
+                        try:
+                            Registration.objects.create(
+                                event_id=event.pk, name='Load Test', email=email,
+                                mobile='9876543210', course='BCA', branch='Civil',
+                            )
+                            local['registered'] += 1
+                        except EventFull:
+                            local['full'] += 1
+                        except IntegrityError:
+                            local['duplicate'] += 1
+                        except OperationalError:
+                            local['error'] += 1
+                    seen.append(t.elapsed)
+                with lock:
+                    outcomes.update(local)
+                    latencies.extend(seen)
+                connection.close()
+
+            workers = [threading.Thread(target=worker, args=(lane,)) for lane in lanes]
+            with timer() as elapsed:
+                for thread in workers:
+                    thread.start()
+                for thread in workers:
+                    thread.join()
+
+            event.refresh_from_db()
+            rows = Registration.objects.filter(event=event).count()
+
+        stats = benchmarking.summarize(latencies)
+        self.stdout.write(
+            f'{len(emails)} attempts over {threads} threads in {elapsed.elapsed:.2f}s '
+            f'({len(emails) / elapsed.elapsed:,.0f}/s, p50 {stats["p50_ms"]} ms, p99 {stats["p99_ms"]} ms)'
+        )
+        self.stdout.write(
+            f'  registered {outcomes["registered"]}, full {outcomes["full"]}, '
+            f'duplicate {outcomes["duplicate"]}, errors {outcomes["error"]}'
+        )
+        expected = min(options['capacity'], attempts)
+        if not (rows == event.registration_count == outcomes['registered'] == expected):
+            raise CommandError(
+                f'Seat count mismatch: {rows} rows, counter {event.registration_count}, '
+                f'{outcomes["registered"]} accepted, capacity {options["capacity"]}'
+            )
+        self.stdout.write(self.style.SUCCESS(f'  exactly {rows} / {options["capacity"]} seats taken'))
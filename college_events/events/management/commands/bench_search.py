@@ -0,0 +1,94 @@
+import datetime
+import random
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+from events import benchmarking, caching, search
+from events.benchmarking import timer
+from events.models import Event, Registration, format_ticket_id
+
+QUERIES = ['robotics', 'machine learn', 'hackathon', 'seminar hall', 'quantum sym', 'da', 'chess quiz 42']
+REGISTRATION_QUERIES = ['rah', 'rahul sh', 'kulkarni', 'student42@', '98765', 'zz']
+
+
+class Command(BaseCommand):
+    help = ('Seed a scratch database with many events and registrations, then time a first page of '
+            'results for the FTS5 event index (migration 0014) against the LIKE fallback, and for the '
+            'indexed registration search (migration 0015) against the icontains scan it replaced.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=100000)
+        parser.add_argument('--registrations', type=int, default=200000,
+                            help='Spread over the first 2000 events.')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--filter', default='upcoming', choices=caching.EVENT_FILTERS)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with benchmarking.scratch_database():
+            if not search.fts_available('default'):
+                raise CommandError('This SQLite build has no FTS5; only the LIKE fallback is available.')
+
+            self.stdout.write(f'Seeding {options["events"]} events (the index is filled by triggers)...')
+            with timer() as t:
+                events = benchmarking.seed_events(options['events'], rng=rng)
+            self.stdout.write(f'  {t.elapsed:.1f}s, {options["events"] / t.elapsed:.0f} events/s')
+
+            # Index upkeep on the write path: a text edit re-indexes, a counter bump does not
+            event = rng.choice(events)
+            text_edit = self._median(lambda: Event.objects.filter(pk=event.pk).update(
+                venue=f'Innovation Hub {rng.randrange(100)}'), options['repeat'])
+            counter_bump = self._median(lambda: Event.objects.filter(pk=event.pk).update(
+                registration_count=rng.randrange(100)), options['repeat'])
+            self.stdout.write(f'  update with re-index {text_edit:.3f} ms, counter update {counter_bump:.3f} ms\n')
+
+            per_event = max(1, options['registrations'] // min(2000, len(events)))
+            self.stdout.write(f'Seeding {per_event * min(2000, len(events))} registrations...')
+            benchmarking.seed_registrations(events[:2000], per_event, rng=rng)
+
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            today = datetime.date.today()
+            self.stdout.write(f'First page of {search.SEARCH_PAGE_SIZE}, filter={options["filter"]} (median ms):')
+            self.stdout.write(f'  {"query":<16} {"hits":>5} {"FTS5":>9} {"LIKE":>9}  speedup')
+            for query in QUERIES:
+                words = search.terms(query)
+                hits = len(search._fts_search('default', words, options['filter'], today, 0,
+                                              search.SEARCH_PAGE_SIZE))
+                fts = self._median(lambda: search._fts_search(
+                    'default', words, options['filter'], today, 0, search.SEARCH_PAGE_SIZE), options['repeat'])
+                like = self._median(lambda: search._like_search(
+                    'default', words, options['filter'], today, 0, search.SEARCH_PAGE_SIZE), options['repeat'])
+                self.stdout.write(f'  {query:<16} {hits:>5} {fts:>9.3f} {like:>9.3f}  {like / fts:.1f}x')
+
+            reg = Registration.objects.order_by('?').first()
+            limit = search.REGISTRATION_SEARCH_LIMIT
+            self.stdout.write(f'\nRegistration search, first page of {limit} (median ms):')
+            self.stdout.write(f'  {"query":<16} {"hits":>5} {"indexed":>9} {"icontains":>9}  speedup')
+            for query in REGISTRATION_QUERIES + [format_ticket_id(reg.event_id, reg.pk)]:
+                def indexed():
+                    return search.first_registrations(query, Registration.objects.select_related('event'), limit)
+
+                def scan():
+                    return list(Registration.objects.filtered().filter(
+                        Q(name__icontains=query) | Q(email__icontains=query)
+                        | Q(mobile__icontains=query) | Q(event__name__icontains=query)
+                    ).select_related('event')[:limit])
+
+                hits = len(indexed())
+                fast, slow = self._median(indexed, options['repeat']), self._median(scan, options['repeat'])
+                self.stdout.write(f'  {query:<16} {hits:>5} {fast:>9.3f} {slow:>9.3f}  {slow / fast:.1f}x')
+
+    @staticmethod
+    def _median(fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            with timer() as t:
+                fn()
+            samples.append(t.elapsed * 1000)
+        return statistics.median(samples)
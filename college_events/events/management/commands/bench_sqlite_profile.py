@@ -0,0 +1,105 @@
+import datetime
+import itertools
+import random
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection
+
+from events import benchmarking
+from events.models import Event, Registration
+
+PROFILE_KEYS = ['OPTIONS', 'CONN_MAX_AGE', 'CONN_HEALTH_CHECKS']
+DEVELOPMENT = {'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}
+
+
+class Command(BaseCommand):
+    help = ('Mixed read/write load against the development and production SQLite profiles '
+            '(settings.DB_PROFILE); each profile gets its own scratch database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run.')
+        parser.add_argument('--events', type=int, default=300)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        production = {**DEVELOPMENT, **settings.DB_PROFILES['production']}
+        self.stdout.write(f'{options["readers"]} readers + {options["writers"]} writers, '
+                          f'{options["seconds"]:g}s per profile\n')
+        for name, profile in (('development', DEVELOPMENT), ('production', production)):
+            result = self._run(profile, options)
+            reads, writes = result['reads'], result['writes']
+            self.stdout.write(
+                f'{name}: reads {reads["count"] / options["seconds"]:,.0f}/s (p99 {reads.get("p99_ms")} ms), '
+                f'writes {writes["count"] / options["seconds"]:,.0f}/s (p99 {writes.get("p99_ms")} ms), '
+                f'"database is locked" errors {result["errors"]}'
+            )
+
+    def _run(self, profile, options):
+        rng = random.Random(options['seed'])
+        # The scratch database and every thread's connection read this dict
+        saved = {key: connection.settings_dict.get(key) for key in PROFILE_KEYS}
+        connection.close()
+        connection.settings_dict.update(profile)
+        try:
+            with benchmarking.scratch_database():
+                events = benchmarking.seed_events(options['events'], rng=rng)
+                benchmarking.seed_registrations(events, 20, rng=rng)
+                return self._load(events, options)
+        finally:
+            connection.settings_dict.update(saved)
+            connection.close()
+
+    def _load(self, events, options):
+        today = datetime.date.today()
+        stop = threading.Event()
+        samples = {'reads': [], 'writes': []}
+        errors = Counter()
+        lock = threading.Lock()
+        serial = itertools.count()
+
+        def read(rng):
+            event = rng.choice(events)
+            list(Event.objects.for_filter(rng.choice(['upcoming', 'completed']), today)[:50])
+            list(Registration.objects.filter(event_id=event.pk).values('name', 'email')[:50])
+
+        def write(rng):
+            n = next(serial)
+            Registration.objects.create(
+                event_id=rng.choice(events).pk, name='Load Test', email=f'load{n}@example.com',
+                mobile='9876543210', course='BCA', branch='Civil',
+            )
+
+        def worker(kind, op, seed):
+            rng, seen, failed = random.Random(seed), [], 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    op(rng)
+                    seen.append(time.perf_counter() - start)
+                except OperationalError:
+                    failed += 1
+                # What request_finished does: honours CONN_MAX_AGE
+                close_old_connections()
+            connection.close()
+            with lock:
+                samples[kind].extend(seen)
+                errors[kind] += failed
+
+        threads = [threading.Thread(target=worker, args=('reads', read, n)) for n in range(options['readers'])]
+        threads += [threading.Thread(target=worker, args=('writes', write, -n - 1))
+                    for n in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return {'reads': benchmarking.summarize(samples['reads']),
+                'writes': benchmarking.summarize(samples['writes']),
+                'errors': sum(errors.values())}
@@ -0,0 +1,219 @@
+import datetime
+import json
+import logging
+import platform
+import random
+import re
+import sys
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import URLPattern, reverse
+
+from events import benchmarking, tickets, urls
+from events.models import Event, Registration
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+# URLs that would end the benchmark's sessions or delete its fixtures
+SKIPPED = {
+    'admin_logout': 'ends the admin session',
+    'student_logout': 'ends the student session',
+    'delete_event_api': 'deletes the event under test',
+    'cancel_registration': "deletes the student's registration",
+    'leave_waitlist': 'removes a waitlist entry',
+}
+
+
+def _requests(fx):
+    """URL name -> ``(role, method, url kwargs, build)``; ``build(i)`` returns the GET query or POST data.
+
+    POST bodies given as a dict are form-encoded; a string is sent as JSON.
+    """
+    today = datetime.date.today()
+    event_json = json.dumps({'name': 'Bench Event', 'description': 'Created by bench_urls.',
+                             'date': (today + datetime.timedelta(days=30)).isoformat(), 'venue': 'Lab 2'})
+    return {
+        'homepage': ('anon', 'get', {}, None),
+        'event_list': ('anon', 'get', {}, None),
+        'completed_events': ('anon', 'get', {}, None),
+        'about': ('anon', 'get', {}, None),
+        'contact': ('anon', 'get', {}, None),
+        'register': ('anon', 'post', {'event_id': fx['event'].pk}, lambda i: {
+            'name': 'Bench Walk-in', 'email': f'bench{i}@walkin.example.com', 'mobile': '9876543210',
+            'course': 'BCA', 'branch': 'Civil',
+        }),
+        'admin_login': ('anon', 'get', {}, None),
+        'admin_panel': ('admin', 'get', {}, None),
+        'student_signup': ('anon', 'get', {}, None),
+        'student_login': ('anon', 'get', {}, None),
+        'student_dashboard': ('student', 'get', {}, None),
+        'student_update_profile': ('student', 'post', {}, lambda i: {'bio': f'Benchmark run {i}'}),
+        'update_registration': ('student', 'post', {'reg_id': fx['registration'].pk}, lambda i: {
+            'mobile': f'98765{i % 100000:05d}',
+        }),
+        'get_events_api': ('anon', 'get', {}, lambda i: {'filter': 'upcoming'}),
+        'search_events_api': ('anon', 'get', {}, lambda i: {'q': ('tech', 'work sho', 'hall', 'fest 2')[i % 4], 'filter': 'upcoming'}),
+        'get_registrations_api': ('admin', 'get', {}, lambda i: {'limit': 500}),
+        'search_registrations_api': ('admin', 'get', {}, lambda i: {'q': ('rah', 'sharma', '98765', 'priya@')[i % 4]}),
+        'export_registrations_api': ('admin', 'get', {}, lambda i: {'format': 'csv', 'event': fx['event'].pk}),
+        'create_event_api': ('admin', 'post', {}, lambda i: event_json),
+        'update_event_api': ('admin', 'post', {'event_id': fx['event'].pk}, lambda i: json.dumps({'venue': 'Hall 1'})),
+        'student_profile_api': ('student', 'get', {}, None),
+        'bootstrap_api': ('student', 'get', {}, None),
+        'api_my_registrations': ('student', 'get', {}, None),
+        'api_registration_history': ('student', 'get', {}, None),
+        'api_check_registration': ('student', 'get', {}, lambda i: {'event_id': fx['event'].pk}),
+        'registration_status_api': ('anon', 'get', {'token': 'PRV-unknown'}, None),
+        'checkin_api': ('admin', 'post', {}, lambda i: json.dumps({'ticket_id': fx['tickets'][i % len(fx['tickets'])]})),
+        'checkin_batch_api': ('admin', 'post', {}, lambda i: json.dumps({
+            'scans': [{'ticket_id': t} for t in fx['tickets'][:100]],
+        })),
+        'scanner_keys_api': ('admin', 'get', {}, None),
+        'ticket_qr': ('anon', 'get', {'token': fx['tickets'][0]}, None),
+        'metrics_api': ('admin', 'get', {}, None),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Drive every URL in events/urls.py through the test client and report throughput, latency '
+            'percentiles and query counts as JSON. Seeds a scratch database unless --existing is given.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help='Timed requests per URL.')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--only', default='', help='Comma-separated URL names to run.')
+        parser.add_argument('--events', type=int, default=500)
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--registrations', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--existing', action='store_true',
+                            help='Use the configured database as it is (e.g. after seed_data); POSTs write to it.')
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout.')
+
+    def handle(self, *args, **options):
+        # Expected 4xx responses (e.g. an unknown status token) would log on every request
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        # Query inspection walks the stack on every query; keep it out of the timings
+        with override_settings(QUERY_INSPECTION='off', ALLOWED_HOSTS=['testserver']):
+            if options['existing']:
+                report = self._run(options)
+            else:
+                with benchmarking.scratch_database():
+                    rng = random.Random(options['seed'])
+                    events = benchmarking.seed_events(options['events'], rng=rng)
+                    students = benchmarking.seed_students(options['students'], rng=rng)
+                    benchmarking.seed_skewed_registrations(events, students, options['registrations'], rng=rng)
+                    report = self._run(options)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fileobj:
+                fileobj.write(output + '\n')
+            self.stderr.write(f'Wrote {options["output"]}')
+        else:
+            self.stdout.write(output)
+
+    def _fixtures(self):
+        today = datetime.date.today()
+        registration = (Registration.objects.filter(user__isnull=False, event__date__gte=today)
+                        .select_related('user').order_by('-event__registration_count', 'pk').first())
+        if registration is None:
+            raise CommandError('Need at least one student registration for an upcoming event; run seed_data first.')
+        signed = [tickets.sign(event_id, pk) for pk, event_id in
+                   Registration.objects.filter(event=registration.event_id).values_list('pk', 'event_id')[:500]]
+        admin = User.objects.filter(username='bench-admin').first() or User.objects.create_user(
+            'bench-admin', password='bench-admin', is_staff=True)
+        return {
+            'event': Event.objects.get(pk=registration.event_id),
+            'registration': registration,
+            'student': registration.user,
+            'admin': admin,
+            'tickets': signed,
+        }
+
+    def _run(self, options):
+        cache.clear()
+        fx = self._fixtures()
+        clients = {'anon': Client(), 'student': Client(), 'admin': Client()}
+        clients['student'].force_login(fx['student'])
+        clients['admin'].force_login(fx['admin'])
+
+        specs = _requests(fx)
+        only = {name for name in options['only'].split(',') if name}
+        results, skipped = {}, {}
+        for pattern in urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            name = pattern.name
+            if only and name not in only:
+                continue
+            if name in SKIPPED or name not in specs:
+                skipped[name] = SKIPPED.get(name, 'no request defined in bench_urls')
+                continue
+            results[name] = self._bench(clients, name, *specs[name], options)
+            self.stderr.write(f'{name}: {results[name]["throughput_rps"]} req/s, '
+                              f'p95 {results[name]["latency"]["p95_ms"]} ms')
+
+        return {
+            'meta': {
+                'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'python': sys.version.split()[0],
+                'django': django.get_version(),
+                'platform': platform.platform(),
+                'db_profile': settings.DB_PROFILE,
+                'cache_backend': settings.CACHE_BACKEND,
+                'requests_per_url': options['requests'],
+                'dataset': {
+                    'existing': options['existing'],
+                    'seed': options['seed'],
+                    'events': Event.objects.count(),
+                    'registrations': Registration.objects.count(),
+                    'students': User.objects.filter(student_profile__isnull=False).count(),
+                },
+            },
+            'results': results,
+            'skipped': skipped,
+        }
+
+    def _bench(self, clients, name, role, method, url_kwargs, build, options):
+        client = clients[role]
+        path = reverse(name, kwargs=url_kwargs)
+        latencies, queries, statuses = [], [], {}
+        for i in range(options['warmup'] + options['requests']):
+            payload = build(i) if build else None
+            with benchmarking.timer() as t:
+                if method == 'get':
+                    response = client.get(path, payload)
+                elif isinstance(payload, str):
+                    response = client.post(path, payload, content_type='application/json')
+                else:
+                    response = client.post(path, payload, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            if i < options['warmup']:
+                continue
+            latencies.append(t.elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            match = QUERIES_RE.search(response.get('Server-Timing', ''))
+            if match:
+                queries.append(int(match.group(1)))
+
+        return {
+            'method': method.upper(),
+            'path': path,
+            'role': role,
+            'statuses': {str(code): count for code, count in sorted(statuses.items())},
+            'throughput_rps': round(len(latencies) / sum(latencies), 1),
+            'latency': benchmarking.summarize(latencies),
+            'queries': {
+                'min': min(queries, default=None),
+                'max': max(queries, default=None),
+                'mean': round(sum(queries) / len(queries), 2) if queries else None,
+                'budget': urls.QUERY_BUDGETS.get(name),
+            },
+        }
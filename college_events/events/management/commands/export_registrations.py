@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events import exports
+from events.models import Registration
+
+
+class Command(BaseCommand):
+    help = 'Write registrations to a CSV or XLSX file, grouped per event (for scheduled dumps).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Destination file path.')
+        parser.add_argument('--format', choices=sorted(exports.CONTENT_TYPES),
+                            help='Defaults to the output file extension.')
+        parser.add_argument('--event', type=int, help='Only export this event id.')
+        parser.add_argument('--course', help='Only export this course.')
+        parser.add_argument('--branch', help='Only export this branch.')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['format'] or output.rsplit('.', 1)[-1].lower()
+        if fmt not in exports.CONTENT_TYPES:
+            raise CommandError('Cannot tell the format from the file name; pass --format csv|xlsx.')
+
+        registrations = Registration.objects.filtered(
+            event=options['event'], course=options['course'], branch=options['branch'],
+        )
+        if fmt == 'csv':
+            with open(output, 'w', newline='', encoding='utf-8') as f:
+                for chunk in exports.stream_csv(registrations):
+                    f.write(chunk)
+        else:
+            with open(output, 'wb') as f:
+                for chunk in exports.stream_xlsx(registrations):
+                    f.write(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f'Exported registrations to {output}'))
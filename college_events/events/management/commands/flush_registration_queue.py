@@ -0,0 +1,36 @@
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from events import ingest
+
+
+class Command(BaseCommand):
+    help = 'Write queued registrations (REGISTRATION_INGEST mode) to the database in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit.')
+        parser.add_argument('--batch-size', type=int, default=settings.REGISTRATION_INGEST_BATCH)
+        parser.add_argument('--interval', type=float, default=settings.REGISTRATION_INGEST_INTERVAL)
+        parser.add_argument('--prune-days', type=float, default=7,
+                            help='Forget finished rows older than this many days (checked at start).')
+
+    def handle(self, *args, **options):
+        pruned = ingest.prune(options['prune_days'])
+        if pruned:
+            self.stdout.write(f'Pruned {pruned} finished rows.')
+
+        if options['once']:
+            total = 0
+            while flushed := ingest.flush(options['batch_size']):
+                total += flushed
+            self.stdout.write(self.style.SUCCESS(f'Flushed {total} queued registrations.'))
+            return
+
+        self.stdout.write(f'Flushing {settings.REGISTRATION_QUEUE_PATH} every {options["interval"]}s (Ctrl+C to stop)')
+        stop = threading.Event()
+        try:
+            ingest.run_writer(interval=options['interval'], batch_size=options['batch_size'], stop=stop)
+        except KeyboardInterrupt:
+            stop.set()
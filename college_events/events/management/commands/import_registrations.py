@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events.imports import IMPORT_BATCH_SIZE, import_registrations, write_error_report
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Bulk-import registrations from a CSV file (name, email, mobile, course, branch[, event_id]).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument('--event', type=int,
+                            help='Register every row for this event id (otherwise read event_id per row).')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--report', help='Write rejected rows and reasons to this CSV file.')
+
+    def handle(self, *args, **options):
+        event = None
+        if options['event'] is not None:
+            try:
+                event = Event.objects.get(pk=options['event'])
+            except Event.DoesNotExist:
+                raise CommandError(f'Event {options["event"]} does not exist.')
+
+        with open(options['csv_file'], newline='', encoding='utf-8-sig') as f:
+            try:
+                report = import_registrations(f, event=event, batch_size=options['batch_size'])
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} created, {report['duplicates']} duplicates, "
+            f"{len(report['errors'])} rejected of {report['rows']} rows."
+        ))
+        if options['report']:
+            with open(options['report'], 'w', newline='', encoding='utf-8') as f:
+                write_error_report(report, f)
+        else:
+            for entry in report['errors'][:20]:
+                self.stdout.write(f"  line {entry['line']}: {'; '.join(entry['errors'])}")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Find events whose registration_count has drifted from the Registration table and fix them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it.')
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Event.objects.annotate(actual=Count('registrations'))
+            .exclude(registration_count=F('actual'))
+            .values_list('id', 'name', 'registration_count', 'actual')
+        )
+        for event_id, name, stored, actual in drifted:
+            self.stdout.write(f'#{event_id} {name}: stored {stored}, actual {actual}')
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('All registration counts are in sync.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drifted)} event(s) drifted (dry run, nothing changed).'))
+        else:
+            Event.objects.filter(pk__in=[row[0] for row in drifted]).sync_registration_counts()
+            self.stdout.write(self.style.SUCCESS(f'Reconciled {len(drifted)} event(s).'))
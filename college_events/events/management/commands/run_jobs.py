@@ -0,0 +1,40 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from events import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (confirmation emails) when JOB_RUNNER is "command".'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run every due job once and exit.')
+        parser.add_argument('--threads', type=int, default=settings.JOB_THREADS)
+        parser.add_argument('--batch-size', type=int, default=settings.JOB_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=settings.JOB_POLL_INTERVAL)
+        parser.add_argument('--prune-days', type=float, default=7,
+                            help='Delete finished jobs older than this many days (checked at start).')
+
+    def handle(self, *args, **options):
+        pruned = jobs.prune(options['prune_days'])
+        if pruned:
+            self.stdout.write(f'Pruned {pruned} finished jobs.')
+
+        if options['once']:
+            total = 0
+            with ThreadPoolExecutor(max_workers=options['threads'], thread_name_prefix='job') as pool:
+                while claimed := jobs.run_pending(options['batch_size'], executor=pool):
+                    total += claimed
+            self.stdout.write(self.style.SUCCESS(f'Ran {total} jobs.'))
+            return
+
+        self.stdout.write(f'Running jobs on {options["threads"]} threads (Ctrl+C to stop)')
+        stop = threading.Event()
+        try:
+            jobs.run_worker(threads=options['threads'], interval=options['interval'],
+                            batch_size=options['batch_size'], stop=stop)
+        except KeyboardInterrupt:
+            stop.set()
@@ -0,0 +1,174 @@
+"""Per-request timing: wall time, DB time, query count, template time, response size.
+
+``InstrumentationMiddleware`` (college_events/middleware.py) opens a
+``RequestStats`` for each request in a context variable. Queries are timed
+by an execute wrapper installed on every database connection, templates by
+the ``TimedDjangoTemplates`` backend; both find the current request through
+the context variable, so the async views' ORM calls (run in executor
+threads) are counted too.
+
+Each finished request adds a ``Server-Timing`` header and feeds rolling
+windows of the last ``settings.METRICS_WINDOW`` samples per URL name, from
+which ``render_prometheus()`` reports p50/p95/p99. The windows live in the
+process that served the requests; every worker keeps its own.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+QUANTILES = (0.5, 0.95, 0.99)
+UNRESOLVED = '<unresolved>'
+
+# metric name -> help text
+METRICS = {
+    'request_seconds': 'Wall time spent handling the request.',
+    'db_seconds': 'Time spent in database queries.',
+    'db_queries': 'Database queries per request.',
+    'template_seconds': 'Time spent rendering templates.',
+    'response_bytes': 'Response body size (non-streaming responses).',
+}
+
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+        self.rendering = False   # only the outermost template render is timed
+
+    def server_timing(self, wall):
+        return (f'app;dur={wall * 1000:.1f}, db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries", '
+                f'tpl;dur={self.template_time * 1000:.1f}')
+
+
+class Registry:
+    """Rolling sample windows plus lifetime sums and counts, per URL name."""
+
+    def __init__(self, window):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))   # (metric, view) -> samples
+        self.totals = defaultdict(lambda: [0, 0.0])                    # (metric, view) -> [count, sum]
+
+    def observe(self, view, values):
+        with self.lock:
+            for metric, value in values.items():
+                self.samples[metric, view].append(value)
+                total = self.totals[metric, view]
+                total[0] += 1
+                total[1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return ({key: sorted(samples) for key, samples in self.samples.items()},
+                    {key: tuple(total) for key, total in self.totals.items()})
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.totals.clear()
+
+
+registry = Registry(settings.METRICS_WINDOW)
+
+
+def begin():
+    return _current.set(RequestStats())
+
+
+def finish(token, request, response):
+    """Close the request's stats: record them and add the Server-Timing header."""
+    stats = _current.get()
+    _current.reset(token)
+    wall = time.perf_counter() - stats.started
+    values = {
+        'request_seconds': wall,
+        'db_seconds': stats.db_time,
+        'db_queries': stats.queries,
+        'template_seconds': stats.template_time,
+    }
+    if not response.streaming:
+        values['response_bytes'] = len(response.content)
+    match = getattr(request, 'resolver_match', None)
+    registry.observe(match.view_name if match else UNRESOLVED, values)
+    response['Server-Timing'] = stats.server_timing(wall)
+    return response
+
+
+def _time_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - start
+        stats.queries += 1
+
+
+def install_query_timer(sender, connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+connection_created.connect(install_query_timer)
+
+
+class _TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None or stats.rendering:
+            return super().render(context, request)
+        stats.rendering = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - start
+            stats.rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing each top-level render for RequestStats."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name).template, self)
+
+
+def _quantile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format (as summaries)."""
+    samples, totals = registry.snapshot()
+    lines = []
+    for metric, help_text in METRICS.items():
+        name = f'college_events_{metric}'
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} summary']
+        for (sample_metric, view), ordered in sorted(samples.items()):
+            if sample_metric != metric or not ordered:
+                continue
+            label = f'view="{_label(view)}"'
+            for q in QUANTILES:
+                lines.append(f'{name}{{{label},quantile="{q}"}} {_quantile(ordered, q):.6g}')
+            count, total = totals[metric, view]
+            lines.append(f'{name}_sum{{{label}}} {total:.6g}')
+            lines.append(f'{name}_count{{{label}}} {count}')
+    return '\n'.join(lines) + '\n'
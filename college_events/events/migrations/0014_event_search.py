@@ -0,0 +1,82 @@
+from django.db import migrations, OperationalError
+
+FTS_TABLE = 'events_event_fts'
+
+# External-content index over the Event text columns; the triggers keep it in
+# step with every write, bulk_create() and queryset.update() included. The
+# update trigger only fires when a text column actually changes, so the
+# registration_count bumps never touch the index.
+# A later migration that makes SQLite rebuild events_event (AddField,
+# AlterField, ...) drops these triggers: it must re-run the trigger statements
+# and the 'rebuild'. The events.E001 system check reports them missing.
+CREATE_SQL = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        name, description, venue,
+        content='events_event', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    # bm25 column weights: name, description, venue
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 1.0, 4.0)')",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON events_event BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description, venue)
+        VALUES (new.id, new.name, new.description, new.venue);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON events_event BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, venue)
+        VALUES ('delete', old.id, old.name, old.description, old.venue);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF name, description, venue ON events_event
+    WHEN old.name IS NOT new.name OR old.description IS NOT new.description OR old.venue IS NOT new.venue
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, venue)
+        VALUES ('delete', old.id, old.name, old.description, old.venue);
+        INSERT INTO {FTS_TABLE}(rowid, name, description, venue)
+        VALUES (new.id, new.name, new.description, new.venue);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def fts5_supported(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)')
+            cursor.execute('DROP TABLE temp.fts5_probe')
+    except OperationalError:
+        return False
+    return True
+
+
+def create_index(apps, schema_editor):
+    # Without FTS5 events.search falls back to LIKE matching
+    if not fts5_supported(schema_editor.connection):
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql, params=None)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_waitlist'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
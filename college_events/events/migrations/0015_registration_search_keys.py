@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:51
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_search_keys(apps, schema_editor):
+    # A frozen copy of models.search_keys()
+    Registration = apps.get_model('events', 'Registration')
+    batch = []
+    for reg in Registration.objects.only('name', 'email', 'mobile').iterator(chunk_size=2000):
+        words = reg.name.lower().split()
+        reg.name_key = ' '.join(words)
+        reg.surname_key = ' '.join(words[-1:] + words[:-1])
+        reg.email_key = reg.email.strip().lower()
+        reg.mobile_key = re.sub(r'\D', '', reg.mobile)
+        batch.append(reg)
+        if len(batch) == 2000:
+            Registration.objects.bulk_update(batch, ['name_key', 'surname_key', 'email_key', 'mobile_key'])
+            batch = []
+    Registration.objects.bulk_update(batch, ['name_key', 'surname_key', 'email_key', 'mobile_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0014_event_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registration',
+            name='email_key',
+            field=models.CharField(default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='registration',
+            name='mobile_key',
+            field=models.CharField(default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='registration',
+            name='name_key',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='registration',
+            name='surname_key',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_search_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='registration',
+            index=models.Index(fields=['name_key'], name='reg_name_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registration',
+            index=models.Index(fields=['surname_key'], name='reg_surname_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registration',
+            index=models.Index(fields=['email_key'], name='reg_email_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registration',
+            index=models.Index(fields=['mobile_key'], name='reg_mobile_key_idx'),
+        ),
+    ]
@@ -1,5 +1,10 @@
-from django.db import models
+import re
+
+from django.db import models, router, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 COURSE_CHOICES = [
@@ -46,6 +51,43 @@ class StudentProfile(models.Model):
         return name[:2].upper()
 
 
+class EventFull(Exception):
+    """A registration would take an event past its capacity."""
+
+
+class EventQuerySet(models.QuerySet):
+    def allocate_seat(self, event_id):
+        """Take one seat on ``event_id``; returns False when the event is full.
+
+        The capacity check and the increment are one conditional UPDATE on the
+        event's row, so concurrent registrations can never oversell it.
+        """
+        return bool(
+            self.filter(pk=event_id)
+            .filter(Q(capacity__isnull=True) | Q(registration_count__lt=F('capacity')))
+            .update(registration_count=F('registration_count') + 1)
+        )
+
+    def for_filter(self, event_filter, today):
+        """Events for the public ``filter`` param: 'upcoming', 'completed' or 'all'."""
+        if event_filter == 'upcoming':
+            return self.filter(date__gte=today).order_by('date')
+        if event_filter == 'completed':
+            return self.filter(date__lt=today).order_by('-date')
+        return self.all()
+
+    def over_capacity(self):
+        return self.filter(capacity__isnull=False, registration_count__gt=F('capacity'))
+
+    def sync_registration_counts(self):
+        """Recompute registration_count from the Registration rows; returns events updated."""
+        actual = (
+            Registration.objects.filter(event=OuterRef('pk'))
+            .order_by().values('event').annotate(n=Count('pk')).values('n')
+        )
+        return self.update(registration_count=Coalesce(Subquery(actual), 0))
+
+
 class Event(models.Model):
     name        = models.CharField(max_length=100)
     description = models.TextField()
@@ -56,6 +98,18 @@ class Event(models.Model):
         max_length=500, blank=True,
         default='https://images.unsplash.com/photo-1540575467063-178a50c2df87?auto=format&fit=crop&w=800'
     )
+    # Denormalised count of Registration rows, kept in step by events.signals
+    # and RegistrationQuerySet.bulk_create (see reconcile_registration_counts)
+    registration_count = models.PositiveIntegerField(default=0, editable=False)
+    # Seats on offer (null = unlimited); taken by EventQuerySet.allocate_seat
+    capacity    = models.PositiveIntegerField(null=True, blank=True)
+    # Waitlist sequence numbers: the last one handed out, and the last one
+    # promoted off the front (see events.waitlist)
+    waitlist_tail = models.PositiveIntegerField(default=0, editable=False)
+    waitlist_head = models.PositiveIntegerField(default=0, editable=False)
+    updated_at  = models.DateTimeField(auto_now=True)
+
+    objects = EventQuerySet.as_manager()
 
     @property
     def get_image_url(self):
@@ -76,28 +130,247 @@ class Event(models.Model):
             
         return url
 
+    @property
+    def seats_left(self):
+        """Remaining seats, or None when the event has no capacity limit."""
+        if self.capacity is None:
+            return None
+        return max(self.capacity - self.registration_count, 0)
+
+    @property
+    def cache_version(self):
+        """Stamp for cached renderings of this event (see the cards in events/includes/).
+
+        ``updated_at`` moves on every save; the registration counter is
+        bumped with an UPDATE that bypasses it, so it is part of the stamp.
+        """
+        return f'{self.updated_at.timestamp():.6f}-{self.registration_count}'
+
     def __str__(self):
         return self.name
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            # Upcoming/completed range scans in either order; also covers the
+            # events API version stamp (count, max updated_at, summed counts)
+            models.Index(fields=['date', 'updated_at', 'registration_count'], name='event_date_cover_idx'),
+        ]
+
+
+def format_ticket_id(event_id, reg_id):
+    """Human-readable ticket id printed on passes and read by the scanner."""
+    return f"TKT-{event_id:03d}-{reg_id:04d}"
+
+
+def search_keys(name, email, mobile):
+    """Normalised copies of a registration's name, email and mobile for the admin search.
+
+    ``surname_key`` puts the last word first, so a surname prefix is also an
+    indexed prefix match (see events.search.registrations).
+    """
+    words = name.lower().split()
+    return {
+        'name_key':    ' '.join(words),
+        'surname_key': ' '.join(words[-1:] + words[:-1]),
+        'email_key':   email.strip().lower(),
+        'mobile_key':  re.sub(r'\D', '', mobile),
+    }
+
+
+SEARCH_KEY_FIELDS = ('name_key', 'surname_key', 'email_key', 'mobile_key')
+
+
+class RegistrationQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create() that also refreshes the touched events' registration_count.
+
+        bulk_create sends no signals, so the counters are recomputed from the
+        table in the same transaction (this stays exact with ignore_conflicts)
+        and the public caches are dropped on commit, as signals.py does.
+        Raises EventFull (and writes nothing) if an event ends up over capacity.
+        """
+        from . import caching
+        objs = list(objs)
+        for obj in objs:
+            obj.set_search_keys()
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            events = Event.objects.using(self.db).filter(pk__in={obj.event_id for obj in objs})
+            events.sync_registration_counts()
+            full = list(events.over_capacity().values_list('name', flat=True))
+            if full:
+                raise EventFull(f'Not enough seats left for: {", ".join(full)}')
+            transaction.on_commit(caching.invalidate_public, using=self.db)
+        return created
+
+    def filtered(self, event=None, course=None, branch=None):
+        """Newest-first registrations narrowed by the admin panel filters."""
+        qs = self.order_by('-timestamp', '-id')
+        if event:
+            qs = qs.filter(event_id=event)
+        if course:
+            qs = qs.filter(course=course)
+        if branch:
+            qs = qs.filter(branch=branch)
+        return qs
 
 
 class Registration(models.Model):
-    event     = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='registrations')
+    # Both foreign keys are the leading column of a composite index in Meta,
+    # so their standalone single-column indexes would be redundant
+    event     = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='registrations',
+                                  db_index=False)
     # Optional link to a student account (null = guest registration)
     user      = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
-                                  related_name='registrations')
+                                  related_name='registrations', db_index=False)
     name      = models.CharField(max_length=100)
     email     = models.EmailField()
     mobile    = models.CharField(max_length=10)
     course    = models.CharField(max_length=100)
     branch    = models.CharField(max_length=100)
     timestamp = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Indexed lookup keys for the admin search, derived from the fields above
+    # on every save() and bulk_create() (see search_keys)
+    name_key    = models.CharField(max_length=100, editable=False, default='')
+    surname_key = models.CharField(max_length=100, editable=False, default='')
+    email_key   = models.CharField(max_length=254, editable=False, default='')
+    mobile_key  = models.CharField(max_length=20, editable=False, default='')
+
+    objects = RegistrationQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the event we were loaded with so a move can fix both counters
+        instance._loaded_event_id = instance.__dict__.get('event_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Run the post_save seat allocation in the same transaction as the
+        # write, so EventFull from the signal rolls the new row back too
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        self.set_search_keys()
+        if kwargs.get('update_fields') is not None and {'name', 'email', 'mobile'} & set(kwargs['update_fields']):
+            kwargs['update_fields'] = {*kwargs['update_fields'], *SEARCH_KEY_FIELDS}
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+        self._loaded_event_id = self.event_id
+
+    def set_search_keys(self):
+        for field, value in search_keys(self.name, self.email, self.mobile).items():
+            setattr(self, field, value)
 
     def __str__(self):
         return f"{self.name} — {self.event.name}"
 
     class Meta:
         ordering = ['-timestamp']
+        # Also the index behind the duplicate check on (event, email)
         unique_together = ['event', 'email']
+        indexes = [
+            # Admin list / keyset pagination, newest first
+            models.Index(fields=['-timestamp', '-id'], name='reg_timestamp_idx'),
+            # Admin list filtered to one event, and the per-event export
+            models.Index(fields=['event', '-timestamp', '-id'], name='reg_event_timestamp_idx'),
+            # Student dashboard and "my registrations"
+            models.Index(fields=['user', '-timestamp'], name='reg_user_timestamp_idx'),
+            # Admin search: prefix ranges on the normalised keys
+            models.Index(fields=['name_key'], name='reg_name_key_idx'),
+            models.Index(fields=['surname_key'], name='reg_surname_key_idx'),
+            models.Index(fields=['email_key'], name='reg_email_key_idx'),
+            models.Index(fields=['mobile_key'], name='reg_mobile_key_idx'),
+        ]
+
+
+class Attendance(models.Model):
+    """Gate check-in for a registration — at most one per ticket."""
+    registration = models.OneToOneField(Registration, on_delete=models.CASCADE, related_name='attendance')
+    event        = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='attendances')
+    gate         = models.CharField(max_length=50, blank=True)
+    # When the ticket was scanned at the gate (the scanner's clock for offline uploads)
+    scanned_at   = models.DateTimeField()
+    recorded_at  = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.registration_id} @ {self.gate or 'gate'}"
+
+    class Meta:
+        ordering = ['-scanned_at']
+
+
+class WaitlistEntry(models.Model):
+    """A student queued for a full event, in join order (``seq``).
+
+    Promoted entries are deleted; withdrawn ones stay behind as tombstones
+    until the head of the queue passes them, so a position is
+    ``seq - head - withdrawn entries in between`` (see events.waitlist).
+    """
+    WAITING   = 'waiting'
+    WITHDRAWN = 'withdrawn'
+    STATUS_CHOICES = [(WAITING, 'Waiting'), (WITHDRAWN, 'Withdrawn')]
+
+    event     = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='waitlist', db_index=False)
+    user      = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name='waitlist_entries')
+    seq       = models.PositiveIntegerField()
+    status    = models.CharField(max_length=10, choices=STATUS_CHOICES, default=WAITING)
+    name      = models.CharField(max_length=100)
+    email     = models.EmailField()
+    mobile    = models.CharField(max_length=10)
+    course    = models.CharField(max_length=100)
+    branch    = models.CharField(max_length=100)
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} — {self.event.name} (#{self.seq})"
+
+    class Meta:
+        ordering = ['event', 'seq']
+        constraints = [
+            # Withdrawn tombstones don't block joining again (at the back)
+            models.UniqueConstraint(fields=['event', 'email'], condition=Q(status='waiting'),
+                                    name='waitlist_event_email_waiting_uniq'),
+        ]
+        indexes = [
+            # Next-in-line lookups and the withdrawn-ahead count for positions
+            models.Index(fields=['event', 'status', 'seq'], name='waitlist_event_status_seq_idx'),
+        ]
+
+
+class Job(models.Model):
+    """A background job: a named handler and its keyword arguments (see events.jobs).
+
+    ``key`` is an optional idempotency key; a second job with the same key
+    is never created.
+    """
+    QUEUED  = 'queued'
+    RUNNING = 'running'
+    DONE    = 'done'
+    FAILED  = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    name         = models.CharField(max_length=100)
+    payload      = models.JSONField(default=dict, blank=True)
+    key          = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    status       = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts     = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at       = models.DateTimeField(default=timezone.now)
+    # Set by the worker that claimed the job, so a late finish can't clobber a re-claim
+    claimed_by   = models.CharField(max_length=32, blank=True)
+    claimed_at   = models.DateTimeField(null=True, blank=True)
+    last_error   = models.TextField(blank=True)
+    created_at   = models.DateTimeField(auto_now_add=True)
+    finished_at  = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Due-job scan for the workers, and the stale-claim sweep
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
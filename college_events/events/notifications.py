@@ -0,0 +1,42 @@
+"""Emails sent from background jobs (see events.jobs)."""
+from django.conf import settings
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from . import jobs, tickets
+from .models import Registration, format_ticket_id
+
+REGISTRATION_CONFIRMATION = 'registration_confirmation'
+
+
+@jobs.task(REGISTRATION_CONFIRMATION)
+def send_registration_confirmation(registration_id):
+    registration = Registration.objects.select_related('event').filter(pk=registration_id).first()
+    if registration is None:
+        return   # cancelled before the job ran
+    event = registration.event
+    body = render_to_string('events/emails/registration_confirmation.txt', {
+        'registration':  registration,
+        'event':         event,
+        'ticket_id':     format_ticket_id(event.pk, registration.pk),
+        'qr_url':        settings.SITE_URL + reverse('ticket_qr', args=[tickets.sign(event.pk, registration.pk)]),
+        'dashboard_url': settings.SITE_URL + reverse('student_dashboard'),
+    })
+    send_mail(f'Registration confirmed: {event.name}', body, None, [registration.email])
+
+
+def _key(registration_id):
+    return f'{REGISTRATION_CONFIRMATION}:{registration_id}'
+
+
+def queue_registration_confirmation(registration):
+    """Queue the confirmation email for a new registration (once per registration)."""
+    return jobs.enqueue(REGISTRATION_CONFIRMATION, key=_key(registration.pk), registration_id=registration.pk)
+
+
+def queue_registration_confirmations(registration_ids):
+    """Queue confirmation emails for registrations inserted in bulk, e.g. promoted off a waitlist."""
+    jobs.enqueue_many(REGISTRATION_CONFIRMATION, {
+        _key(registration_id): {'registration_id': registration_id} for registration_id in registration_ids
+    })
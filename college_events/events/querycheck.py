@@ -0,0 +1,115 @@
+"""N+1 detection and per-view query budgets (development and tests).
+
+With ``settings.QUERY_INSPECTION`` set to 'warn' or 'raise',
+``QueryInspectionMiddleware`` records the shape of every query a request
+runs (its SQL with the parameters left out and ``IN`` lists collapsed)
+together with the first line of project code that caused it (an async
+view's ORM calls run in an executor thread whose stack may hold none). A
+shape repeated ``REPEAT_THRESHOLD`` times or more from one call site is
+reported as a likely N+1.
+
+Views named in ``events.urls.QUERY_BUDGETS`` must also stay within their
+query budget. 'warn' logs an overrun; 'raise' (what the test runner sets,
+see events.testing) raises QueryBudgetExceeded, so the test that made the
+request fails.
+"""
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+from . import metrics, replica
+
+logger = logging.getLogger(__name__)
+
+OFF, WARN, RAISE = 'off', 'warn', 'raise'
+REPEAT_THRESHOLD = 3
+# Transaction bookkeeping the ORM issues around atomic blocks, not view queries
+IGNORED_PREFIXES = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+NUMBER_RE = re.compile(r'\b\d+\b')
+
+# Frames skipped when looking for the call site: this module and the other execute wrappers
+WRAPPER_FILES = {__file__, metrics.__file__, replica.__file__}
+
+_current = ContextVar('query_inspection', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def shape(sql):
+    """The query with literal values and IN-list lengths stripped."""
+    return NUMBER_RE.sub('N', IN_LIST_RE.sub('(%s, ...)', sql))
+
+
+def call_site():
+    """``path:line in function`` of the innermost project frame outside the query wrappers."""
+    root = str(settings.BASE_DIR) + os.sep
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(root) and filename not in WRAPPER_FILES and 'site-packages' not in filename:
+            return f'{os.path.relpath(filename, root)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return '<outside project code>'
+
+
+def _inspect_query(execute, sql, params, many, context):
+    queries = _current.get()
+    if queries is not None and not sql.lstrip().upper().startswith(IGNORED_PREFIXES):
+        queries.append((shape(sql), call_site()))
+    return execute(sql, params, many, context)
+
+
+def install_inspector(sender, connection, **kwargs):
+    if settings.QUERY_INSPECTION != OFF and _inspect_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_inspect_query)
+
+
+connection_created.connect(install_inspector)
+
+
+def begin():
+    return _current.set([])
+
+
+def repeated(queries):
+    """``[(count, shape, call_site), ...]`` for the shapes run REPEAT_THRESHOLD+ times from one place."""
+    return [(count, sql, site) for (sql, site), count in Counter(queries).most_common()
+            if count >= REPEAT_THRESHOLD]
+
+
+def budget_for(request):
+    from .urls import QUERY_BUDGETS
+    match = getattr(request, 'resolver_match', None)
+    if match is None or match.namespace:
+        return None
+    return QUERY_BUDGETS.get(match.url_name)
+
+
+def finish(token, request):
+    """Report N+1 patterns and enforce the view's budget for the request just served."""
+    queries = _current.get()
+    _current.reset(token)
+    view = getattr(request.resolver_match, 'view_name', request.path)
+    suspects = repeated(queries)
+    for count, sql, site in suspects:
+        logger.warning('Possible N+1 in %s: %d x %s at %s', view, count, sql, site)
+
+    budget = budget_for(request)
+    if budget is None or len(queries) <= budget:
+        return
+    message = f'{view} ran {len(queries)} queries; its budget is {budget}.'
+    if suspects:
+        message += ' Repeated: ' + '; '.join(f'{count} x {sql} at {site}' for count, sql, site in suspects)
+    if settings.QUERY_INSPECTION == RAISE:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -0,0 +1,138 @@
+"""Read replica routing (``settings.REPLICA_DATABASE``).
+
+Views decorated with ``@read_replica`` read from the replica alias; every
+write, and every read anywhere else, stays on ``default``. A request that
+actually writes (runs an INSERT, UPDATE or DELETE, noticed by a connection
+execute wrapper) gets a short-lived cookie, and while it is present the same browser
+reads from the primary again, so a student who has just registered sees
+their own registration whatever the replica lag.
+
+Sessions always use the primary: they are written on login and read on
+every request, and would otherwise pin everyone to it. For the same reason
+session writes don't count as writes here.
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+STICKY_COOKIE = 'db_primary'
+PRIMARY_ONLY_APPS = {'sessions'}
+PRIMARY_ONLY_TABLES = ('"django_session"',)
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+# Set by @read_replica for the duration of a view
+_reading = ContextVar('replica_reading', default=False)
+# Set by ReplicaStickinessMiddleware for the duration of a request
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+class RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned   # this browser wrote recently; read from the primary
+        self.wrote = False
+
+
+def alias():
+    """The replica alias, or None when no replica is configured."""
+    return getattr(settings, 'REPLICA_DATABASE', None)
+
+
+def begin_request(request):
+    """Start tracking a request; returns the token for end_request()."""
+    return _request_state.set(RequestState(pinned=STICKY_COOKIE in request.COOKIES))
+
+
+def end_request(token, response):
+    """Stop tracking; after a write, pin the browser to the primary for a while."""
+    state = _request_state.get()
+    _request_state.reset(token)
+    if state.wrote and alias():
+        response.set_cookie(STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                            httponly=True, samesite='Lax')
+    return response
+
+
+def _note_write(execute, sql, params, many, context):
+    # Asking the router for a write database isn't enough: get_or_create()
+    # does that on every call, even when the row exists
+    state = _request_state.get()
+    if (state is not None and not state.wrote and sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS)
+            and not any(table in sql for table in PRIMARY_ONLY_TABLES)):
+        state.wrote = True
+    return execute(sql, params, many, context)
+
+
+def install_write_tracker(sender, connection, **kwargs):
+    if _note_write not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_note_write)
+
+
+connection_created.connect(install_write_tracker)
+
+
+def _replica_allowed():
+    state = _request_state.get()
+    return bool(alias()) and not (state and state.pinned)
+
+
+def _iterate_reading(iterator):
+    """Re-enter replica reads around each chunk of a streaming response."""
+    iterator = iter(iterator)
+    while True:
+        token = _reading.set(True)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _reading.reset(token)
+        yield chunk
+
+
+def read_replica(view):
+    """Serve a read-only view from the replica (unless this browser just wrote)."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            token = _reading.set(_replica_allowed())
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _reading.reset(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        allowed = _replica_allowed()
+        token = _reading.set(allowed)
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            _reading.reset(token)
+        # Streamed rows are fetched after the view returns
+        if allowed and response.streaming:
+            response.streaming_content = _iterate_reading(response.streaming_content)
+        return response
+    return wrapper
+
+
+class ReplicaRouter:
+    """Database router behind ``@read_replica``; see the module docstring."""
+
+    def db_for_read(self, model, **hints):
+        if _reading.get() and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            return alias()
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == alias():
+            return False
+        return None
@@ -0,0 +1,191 @@
+"""Server-side search: events for the public pages, registrations for admins.
+
+Event search covers name, description and venue.
+
+Migration 0014 builds ``events_event_fts``, an FTS5 index kept current by
+triggers on events_event. Every search term is matched as a prefix, so
+"hack fes" finds "Hackathon Fest" while the user is still typing. Results
+are ranked by bm25, with name matches above venue matches above description
+matches.
+
+On databases without FTS5 the migration creates nothing, and search() falls
+back to case-insensitive substring matching. That fallback ranks name
+matches first, then the soonest events.
+
+Django rebuilds a SQLite table (and drops its triggers) for many ALTERs,
+e.g. AddField or AlterField. A migration that does that to events_event
+must re-create 0014's triggers and rebuild the index; the events.E001
+system check (events/checks.py) reports missing ones.
+
+Registration search (``registrations()``, for the Django admin and the
+admin panel) only uses indexed lookups. A ticket id becomes a primary key
+lookup; emails, mobile numbers and names become prefix ranges on the
+normalised ``*_key`` columns (see models.search_keys).
+"""
+import datetime
+import re
+
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from . import tickets
+from .models import Event, Registration, search_keys
+
+FTS_TABLE = 'events_event_fts'
+FTS_TRIGGERS = [f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au']
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+MAX_TERMS = 8
+
+TERM_RE = re.compile(r'\w+')
+MOBILE_QUERY_RE = re.compile(r'^[\d\s+()-]+$')
+# Sorts after every character, so [prefix, prefix + PREFIX_END) is a prefix range
+PREFIX_END = '\U0010ffff'
+REGISTRATION_SEARCH_LIMIT = 50
+REGISTRATION_SEARCH_MAX_LIMIT = 200
+
+_fts_tables = {}   # database alias -> whether the FTS5 index exists
+
+
+def terms(query):
+    """The search words in ``query``, lower-cased, without FTS5 syntax."""
+    return [term.lower() for term in TERM_RE.findall(query)][:MAX_TERMS]
+
+
+def match_expression(words):
+    """FTS5 MATCH string: every word as a quoted prefix, all required."""
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def fts_available(using):
+    if using not in _fts_tables:
+        connection = connections[using]
+        _fts_tables[using] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names(include_views=False)
+        )
+    return _fts_tables[using]
+
+
+def missing_fts_triggers(using):
+    """Names of 0014's sync triggers absent from a database that has the index."""
+    if not fts_available(using):
+        return []
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'events_event'")
+        present = {row[0] for row in cursor.fetchall()}
+    return [name for name in FTS_TRIGGERS if name not in present]
+
+
+def _date_clause(event_filter, today):
+    if event_filter == 'upcoming':
+        return ' AND e.date >= %s', [today]
+    if event_filter == 'completed':
+        return ' AND e.date < %s', [today]
+    return '', []
+
+
+def _fts_search(using, words, event_filter, today, offset, limit):
+    clause, params = _date_clause(event_filter, today)
+    return list(Event.objects.db_manager(using).raw(
+        f'SELECT e.* FROM {FTS_TABLE} f JOIN events_event e ON e.id = f.rowid '
+        f'WHERE f.{FTS_TABLE} MATCH %s{clause} ORDER BY f.rank, e.date LIMIT %s OFFSET %s',
+        [match_expression(words), *params, limit, offset],
+    ))
+
+
+def _like_search(using, words, event_filter, today, offset, limit):
+    events = Event.objects.db_manager(using).for_filter(event_filter, today)
+    in_name = Q()
+    for word in words:
+        events = events.filter(
+            Q(name__icontains=word) | Q(description__icontains=word) | Q(venue__icontains=word)
+        )
+        in_name &= Q(name__icontains=word)
+    events = events.annotate(
+        name_match=Case(When(in_name, then=Value(1)), default=Value(0), output_field=IntegerField())
+    ).order_by('-name_match', 'date', 'id')
+    return list(events[offset:offset + limit])
+
+
+def search(query, event_filter='all', today=None, page=1, limit=SEARCH_PAGE_SIZE, using=None):
+    """One page of events matching ``query``, best first.
+
+    Returns ``(events, has_more)``; a query without any words matches nothing.
+    """
+    words = terms(query)
+    if not words:
+        return [], False
+    today = today or datetime.date.today()
+    using = using or Event.objects.db_manager().db
+    backend = _fts_search if fts_available(using) else _like_search
+    # One extra row tells us whether another page exists
+    events = backend(using, words, event_filter, today, (page - 1) * limit, limit + 1)
+    return events[:limit], len(events) > limit
+
+
+def _prefix(field, value):
+    """``field`` starts with ``value``, as a range the column's B-tree index can serve."""
+    return Q(**{f'{field}__gte': value, f'{field}__lt': value + PREFIX_END})
+
+
+def _registration_lookups(query):
+    """``(ticket, [(key field, prefix), ...])`` for an admin search query; either may be empty."""
+    query = query.strip()
+    # A pass's signed token (e.g. from a scanner) finds its ticket as well
+    ticket = tickets.parse_ticket_id(query.partition(':')[0])
+    if ticket:
+        return ticket, []
+    keys = search_keys(query, query, query)
+    if '@' in query:
+        return None, [('email_key', keys['email_key'])]
+    if MOBILE_QUERY_RE.match(query) and keys['mobile_key']:
+        # Mobile numbers are stored as the 10 local digits
+        digits = keys['mobile_key'][2:] if query.startswith('+91') else keys['mobile_key']
+        return None, [('mobile_key', digits)]
+    if not keys['name_key']:
+        return None, []
+    return None, [('name_key', keys['name_key']), ('surname_key', keys['name_key'])]
+
+
+def registrations(query, queryset=None):
+    """Registrations matching an admin search query, narrowing ``queryset`` (default: all).
+
+    ``TKT-<event>-<id>`` matches that ticket, text with an '@' an email
+    prefix, digits a mobile number prefix, and anything else a prefix of the
+    full name or of the surname.
+    """
+    queryset = Registration.objects.all() if queryset is None else queryset
+    ticket, lookups = _registration_lookups(query)
+    if ticket:
+        event_id, reg_id = ticket
+        return queryset.filter(pk=reg_id, event_id=event_id)
+    if not lookups:
+        return queryset.none()
+    condition = Q()
+    for field, prefix in lookups:
+        condition |= _prefix(field, prefix)
+    return queryset.filter(condition)
+
+
+def first_registrations(query, queryset=None, limit=REGISTRATION_SEARCH_LIMIT):
+    """Up to ``limit`` matches for a type-ahead query, in key order, as a list.
+
+    Same matching as registrations(), but each prefix range is read in its
+    own index's order and stops after ``limit`` rows, so the cost doesn't
+    grow with the number of matches (a common first name can match
+    thousands). Name matches come before surname-only matches. ``queryset``
+    may be a values() queryset if it includes 'id'.
+    """
+    queryset = Registration.objects.all() if queryset is None else queryset
+    ticket, lookups = _registration_lookups(query)
+    if ticket:
+        return list(registrations(query, queryset))
+    rows, seen = [], set()
+    for field, prefix in lookups:
+        for row in queryset.filter(_prefix(field, prefix)).order_by(field)[:limit]:
+            row_id = row['id'] if isinstance(row, dict) else row.pk
+            if row_id not in seen and len(rows) < limit:
+                seen.add(row_id)
+                rows.append(row)
+    return rows
@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import caching, notifications
+from .models import Event, EventFull, Registration
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=Registration)
+@receiver(post_delete, sender=Registration)
+def invalidate_public_caches(sender, **kwargs):
+    # Wait for the commit so a concurrent reader can't re-cache the old rows
+    transaction.on_commit(caching.invalidate_public)
+
+
+def _bump_registration_count(event_id, delta, using):
+    events = Event.objects.using(using).filter(pk=event_id)
+    if delta < 0:
+        events = events.filter(registration_count__gte=-delta)
+    events.update(registration_count=F('registration_count') + delta)
+
+
+def _take_seat(event_id, using):
+    # Registration.save() runs us inside its atomic block, so raising here
+    # discards the row that was just written
+    if not Event.objects.using(using).allocate_seat(event_id):
+        raise EventFull(f'Event {event_id} is full.')
+
+
+@receiver(post_save, sender=Registration)
+def count_saved_registration(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    if created:
+        _take_seat(instance.event_id, using)
+        return
+    loaded_event_id = getattr(instance, '_loaded_event_id', None)
+    if loaded_event_id is not None and loaded_event_id != instance.event_id:
+        _take_seat(instance.event_id, using)
+        _bump_registration_count(loaded_event_id, -1, using)
+
+
+@receiver(post_save, sender=Registration)
+def queue_confirmation_email(sender, instance, created, raw=False, **kwargs):
+    # Same transaction as the row: rolled back with it, e.g. on EventFull
+    if created and not raw:
+        notifications.queue_registration_confirmation(instance)
+
+
+@receiver(post_delete, sender=Registration)
+def count_deleted_registration(sender, instance, using=None, **kwargs):
+    # Sent inside the deletion's transaction, so the counter moves with the row
+    _bump_registration_count(instance.event_id, -1, using)
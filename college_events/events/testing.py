@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+from . import querycheck
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    """Django's runner with QUERY_INSPECTION='raise': a view over its query budget fails the test.
+
+    Background jobs are left queued (JOB_RUNNER='command'); tests run them with jobs.run_pending().
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.QUERY_INSPECTION = querycheck.RAISE
+        settings.JOB_RUNNER = 'command'
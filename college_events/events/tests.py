@@ -1,3 +1,1011 @@
-from django.test import TestCase
+import base64
+import datetime
+import hashlib
+import hmac
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.template.loader import render_to_string
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from college_events.middleware import ReplicaStickinessMiddleware
+
+from . import (
+    caching, checkin, checks, imports, ingest, jobs, metrics, notifications, querycheck, replica, search, tickets, views,
+    waitlist,
+)
+from .models import Attendance, Event, EventFull, Job, Registration, StudentProfile, WaitlistEntry, format_ticket_id
+from .urls import QUERY_BUDGETS
+
+
+def make_event(days_from_today=7, **kwargs):
+    defaults = {
+        'name': 'Hackathon',
+        'description': 'Build something in 24 hours.',
+        'date': datetime.date.today() + datetime.timedelta(days=days_from_today),
+        'venue': 'Main Hall',
+    }
+    defaults.update(kwargs)
+    return Event.objects.create(**defaults)
+
+
+def make_registration(event, n, **kwargs):
+    defaults = {
+        'name': f'Student {n}',
+        'email': f'student{n}@example.com',
+        'mobile': '9876543210',
+        'course': 'B.Tech',
+        'branch': 'Computer Science',
+    }
+    defaults.update(kwargs)
+    return Registration.objects.create(event=event, **defaults)
+
+
+class AdminTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user('admin', password='pass12345', is_staff=True)
+        self.client.force_login(self.admin)
+
+
+class RegistrationsApiTests(AdminTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event()
+        self.other = make_event(name='Robotics Workshop')
+        for n in range(7):
+            make_registration(self.event, n, branch='Civil' if n % 2 else 'Computer Science')
+        make_registration(self.other, 99)
+
+    def test_stream_returns_full_list(self):
+        response = self.client.get(reverse('get_registrations_api'))
+        self.assertTrue(response.streaming)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(rows), 8)
+        self.assertTrue(rows[0]['ticket_id'].startswith('TKT-'))
+
+    def test_keyset_pages_cover_every_row_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 3}
+            if cursor:
+                params['cursor'] = cursor
+            page = self.client.get(reverse('get_registrations_api'), params).json()
+            seen.extend(r['id'] for r in page['results'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 8)
+        self.assertEqual(len(set(seen)), 8)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_filters_are_applied(self):
+        page = self.client.get(reverse('get_registrations_api'), {
+            'limit': 50, 'event': self.event.id, 'branch': 'Civil',
+        }).json()
+        self.assertEqual(len(page['results']), 3)
+        self.assertTrue(all(r['event__id'] == self.event.id for r in page['results']))
+
+    def test_bad_cursor_is_rejected(self):
+        response = self.client.get(reverse('get_registrations_api'), {'cursor': '!!!'})
+        self.assertEqual(response.status_code, 400)
+
+
+class RegistrationExportTests(AdminTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event()
+        self.other = make_event(name='Robotics: Workshop')
+        make_registration(self.event, 1)
+        make_registration(self.other, 2)
+        make_registration(self.event, 3)
+
+    def test_csv_is_grouped_per_event(self):
+        response = self.client.get(reverse('export_registrations_api'), {'format': 'csv'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[0], 'Ticket ID')
+        events = [line.rsplit(',', 3)[1] for line in lines[1:]]
+        self.assertEqual(events, ['Hackathon', 'Hackathon', 'Robotics: Workshop'])
+
+    def test_xlsx_has_one_sheet_per_event(self):
+        response = self.client.get(reverse('export_registrations_api'), {'format': 'xlsx'})
+        self.assertIn('attachment', response['Content-Disposition'])
+        workbook = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIn('xl/worksheets/sheet2.xml', workbook.namelist())
+        self.assertIn('name="Robotics  Workshop"', workbook.read('xl/workbook.xml').decode())
+        self.assertEqual(workbook.read('xl/worksheets/sheet1.xml').decode().count('<row>'), 3)
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(reverse('export_registrations_api'), {'format': 'pdf'})
+        self.assertEqual(response.status_code, 400)
+
+
+class HomepageStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Event.objects.all().delete()  # drop the sample events seeded by migration 0002
+        self.upcoming = make_event()
+        self.past = make_event(days_from_today=-3, name='Old Fest')
+        make_registration(self.upcoming, 1)
+
+    def test_stats_come_from_cache_on_repeat_hits(self):
+        response = self.client.get(reverse('homepage'))
+        self.assertEqual(response.context['upcoming_count'], 1)
+        self.assertEqual(response.context['completed_count'], 1)
+        self.assertEqual(response.context['total_registrations'], 1)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('homepage'))
+
+    def test_writes_invalidate_the_cache(self):
+        self.client.get(reverse('homepage'))
+        with self.captureOnCommitCallbacks(execute=True):
+            make_registration(self.upcoming, 2)
+        response = self.client.get(reverse('homepage'))
+        self.assertEqual(response.context['total_registrations'], 2)
+
+    def test_midnight_rollover_uses_a_fresh_entry(self):
+        today = datetime.date.today()
+        caching.homepage_stats(today)
+        tomorrow_stats = caching.homepage_stats(today + datetime.timedelta(days=8))
+        self.assertEqual(tomorrow_stats['upcoming_count'], 0)
+        self.assertEqual(tomorrow_stats['completed_count'], 2)
+
+
+class RegistrationCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = make_event()
+
+    def count(self):
+        self.event.refresh_from_db()
+        return self.event.registration_count
+
+    def test_register_and_cancel_move_the_counter(self):
+        student = User.objects.create_user('stud', password='pass12345')
+        self.client.force_login(student)
+        self.client.post(reverse('register', args=[self.event.id]), {
+            'name': 'Asha', 'email': 'asha@example.com', 'mobile': '9876543210',
+            'course': 'BCA', 'branch': 'Civil',
+        })
+        self.assertEqual(self.count(), 1)
+        reg = Registration.objects.get(email='asha@example.com')
+        self.client.post(reverse('cancel_registration', args=[reg.id]))
+        self.assertEqual(self.count(), 0)
+
+    def test_bulk_create_and_queryset_delete(self):
+        Registration.objects.bulk_create([
+            Registration(event=self.event, name=f'S{n}', email=f's{n}@example.com',
+                         mobile='9876543210', course='BCA', branch='Civil')
+            for n in range(5)
+        ])
+        self.assertEqual(self.count(), 5)
+        Registration.objects.filter(email__in=['s0@example.com', 's1@example.com']).delete()
+        self.assertEqual(self.count(), 3)
+
+    def test_moving_a_registration_updates_both_events(self):
+        other = make_event(name='Other')
+        reg = make_registration(self.event, 1)
+        reg = Registration.objects.get(pk=reg.pk)
+        reg.event = other
+        reg.save()
+        other.refresh_from_db()
+        self.assertEqual((self.count(), other.registration_count), (0, 1))
+
+    def test_reconcile_command_fixes_drift(self):
+        make_registration(self.event, 1)
+        Event.objects.filter(pk=self.event.pk).update(registration_count=42)
+        call_command('reconcile_registration_counts', stdout=io.StringIO())
+        self.assertEqual(self.count(), 1)
+
+    def test_events_api_exposes_the_count(self):
+        make_registration(self.event, 1)
+        rows = self.client.get(reverse('get_events_api')).json()
+        self.assertEqual(next(r for r in rows if r['id'] == self.event.id)['registration_count'], 1)
+
+
+class ConditionalGetTests(AdminTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.event = make_event()
+
+    def test_events_api_returns_304_for_matching_etag(self):
+        url = reverse('get_events_api') + '?filter=upcoming'
+        first = self.client.get(url)
+        self.assertIn('stale-while-revalidate', first['Cache-Control'])
+        self.assertNotIn('no-store', first['Cache-Control'])
+        with self.assertNumQueries(1):  # just the version stamp
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+    def test_etag_changes_when_counts_change(self):
+        url = reverse('get_events_api')
+        etag = self.client.get(url)['ETag']
+        make_registration(self.event, 1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_registrations_api_is_private_and_conditional(self):
+        make_registration(self.event, 1)
+        url = reverse('get_registrations_api') + '?limit=10'
+        first = self.client.get(url)
+        self.assertIn('private', first['Cache-Control'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        Event.objects.filter(pk=self.event.pk).update(updated_at=timezone.now() + datetime.timedelta(seconds=5))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+
+class CheckInTests(AdminTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event()
+        self.reg = make_registration(self.event, 1)
+        self.ticket = tickets.sign(self.event.id, self.reg.id)
+
+    def post(self, name, payload):
+        return self.client.post(reverse(name), json.dumps(payload), content_type='application/json')
+
+    def test_check_in_is_idempotent(self):
+        first = self.post('checkin_api', {'ticket_id': self.ticket, 'gate': 'north'}).json()
+        again = self.post('checkin_api', {'ticket_id': self.ticket, 'gate': 'south'}).json()
+        self.assertEqual(first['status'], checkin.CHECKED_IN)
+        self.assertEqual(again['status'], checkin.ALREADY_CHECKED_IN)
+        self.assertEqual(again['gate'], 'north')
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_unknown_or_mismatched_ticket_is_invalid(self):
+        for ticket in [tickets.sign(999, 1), tickets.sign(self.event.id + 1, self.reg.id), 'garbage']:
+            response = self.post('checkin_api', {'ticket_id': ticket})
+            self.assertEqual(response.status_code, 404)
+
+    def test_unsigned_or_forged_ticket_is_rejected_without_a_query(self):
+        plain = format_ticket_id(self.event.id, self.reg.id)
+        forged = tickets.sign(self.event.id, self.reg.id + 1).replace(f'{self.reg.id + 1:04d}', f'{self.reg.id:04d}')
+        for ticket in [plain, forged, self.ticket[:-1]]:
+            with self.assertNumQueries(0):
+                self.assertEqual(checkin.check_in(ticket)['status'], checkin.INVALID)
+        self.assertEqual(checkin.check_in(self.ticket)['ticket_id'], plain)
+
+    def test_batch_sync_keeps_the_earliest_scan(self):
+        checkin.check_in(self.ticket, gate='live', scanned_at='2030-01-01T10:05:00+00:00')
+        other = make_registration(self.event, 2)
+        other_ticket = tickets.sign(self.event.id, other.id)
+        results = self.post('checkin_batch_api', {'gate': 'offline', 'scans': [
+            {'ticket_id': self.ticket, 'scanned_at': '2030-01-01T10:00:00+00:00'},
+            {'ticket_id': other_ticket, 'scanned_at': '2030-01-01T10:02:00+00:00'},
+            {'ticket_id': other_ticket, 'scanned_at': '2030-01-01T10:01:00+00:00'},
+            {'ticket_id': 'TKT-000-0000'},
+        ]}).json()['results']
+        self.assertEqual([r['status'] for r in results], [
+            checkin.ALREADY_CHECKED_IN, checkin.ALREADY_CHECKED_IN, checkin.CHECKED_IN, checkin.INVALID,
+        ])
+        self.assertEqual(Attendance.objects.get(registration=self.reg).gate, 'offline')
+        self.assertEqual(Attendance.objects.get(registration=other).scanned_at.minute, 1)
+
+
+class RegistrationImportTests(TestCase):
+    def setUp(self):
+        self.event = make_event()
+        make_registration(self.event, 1)
+
+    def run_import(self, text, **kwargs):
+        return imports.import_registrations(io.StringIO(text), **kwargs)
+
+    def test_rows_are_created_deduplicated_and_reported(self):
+        report = self.run_import(
+            'Name,Email,Mobile,Course,Branch,Event ID\n'
+            f'Asha,asha@example.com,9876543210,BCA,Civil,{self.event.id}\n'
+            f'Ravi,student1@example.com,9876543210,BCA,Civil,{self.event.id}\n'
+            f'Asha again,asha@example.com,9876543210,BCA,Civil,{self.event.id}\n'
+            'Meera,meera@example,12345,BCA,,9999\n'
+            '\n'
+            f'Kiran,kiran@example.com,9123456789,MCA,Mechanical,{self.event.id}\n',
+            batch_size=2,
+        )
+        self.assertEqual((report['rows'], report['created'], report['duplicates']), (5, 2, 2))
+        self.assertEqual([e['line'] for e in report['errors']], [3, 4, 5])
+        self.assertEqual(len(report['errors'][2]['errors']), 4)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registration_count, 3)
+
+    def test_rows_lost_to_a_concurrent_insert_are_not_counted_as_created(self):
+        real_insert = imports._insert
+
+        def racing_insert(registrations):
+            make_registration(self.event, 2, email='asha@example.com')   # lands after the duplicate check
+            return real_insert(registrations)
+
+        with mock.patch.object(imports, '_insert', racing_insert):
+            report = self.run_import(
+                'name,email,mobile,course,branch\n'
+                'Asha,asha@example.com,9876543210,BCA,Civil\n'
+                'Ravi,ravi@example.com,9876543210,BCA,Civil\n',
+                event=self.event,
+            )
+        self.assertEqual((report['created'], report['duplicates']), (1, 1))
+
+    def test_import_refreshes_the_cached_events_api(self):
+        cache.clear()
+        url = reverse('get_events_api')
+        before = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_import('name,email,mobile,course,branch\nAsha,asha@example.com,9876543210,BCA,Civil\n',
+                            event=self.event)
+        after = self.client.get(url, HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        count = {e['id']: e['registration_count'] for e in after.json()}[self.event.id]
+        self.assertEqual(count, 2)
+
+    def test_missing_columns_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.run_import('name,email\nAsha,asha@example.com\n', event=self.event)
+
+    def test_admin_upload(self):
+        admin = User.objects.create_superuser('root', password='pass12345')
+        self.client.force_login(admin)
+        upload = io.BytesIO(b'\xef\xbb\xbfname,email,mobile,course,branch\nAsha,asha@example.com,9876543210,BCA,Civil\n')
+        upload.name = 'walk-ins.csv'
+        response = self.client.post(reverse('admin:events_registration_import'), {
+            'csv_file': upload, 'event': self.event.id,
+        })
+        self.assertEqual(response.context['report']['created'], 1)
+        self.assertTrue(Registration.objects.filter(email='asha@example.com', event=self.event).exists())
+
+        upload.seek(0)
+        with mock.patch.object(imports.Registration.objects, 'bulk_create', side_effect=EventFull('Not enough seats')):
+            response = self.client.post(reverse('admin:events_registration_import'), {
+                'csv_file': upload, 'event': make_event(name='Other').id,
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Not enough seats', [str(m) for m in response.context['messages']][0])
+
+
+class CapacityTests(TestCase):
+    def setUp(self):
+        self.event = make_event(capacity=2)
+
+    def test_allocation_stops_at_capacity(self):
+        make_registration(self.event, 1)
+        make_registration(self.event, 2)
+        with self.assertRaises(EventFull):
+            make_registration(self.event, 3)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registration_count, 2)
+        self.assertEqual(self.event.registrations.count(), 2)
+
+    def test_register_view_waitlists_when_full_and_rejects_duplicates(self):
+        make_registration(self.event, 1)
+        post = {'name': 'Asha', 'mobile': '9876543210', 'course': 'BCA', 'branch': 'Civil'}
+        url = reverse('register', args=[self.event.id])
+        self.client.post(url, {**post, 'email': 'asha@example.com'})
+        full = self.client.post(url, {**post, 'email': 'ravi@example.com'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual((full.status_code, full.json()['position']), (202, 1))
+        again = self.client.post(url, {**post, 'email': 'asha@example.com'})
+        self.assertEqual(again.status_code, 409)
+        queued_twice = self.client.post(url, {**post, 'email': 'ravi@example.com'})
+        self.assertEqual(queued_twice.status_code, 409)
+
+    def test_bulk_paths_respect_capacity(self):
+        report = imports.import_registrations(io.StringIO(
+            'name,email,mobile,course,branch\n'
+            + ''.join(f'S{n},s{n}@example.com,9876543210,BCA,Civil\n' for n in range(3))
+        ), event=self.event)
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(report['errors'], [{'line': 4, 'errors': ['event is full']}])
+        with self.assertRaises(EventFull):
+            Registration.objects.bulk_create([Registration(
+                event=self.event, name='X', email='x@example.com', mobile='9876543210', course='BCA', branch='Civil',
+            )])
+        self.assertEqual(self.event.registrations.count(), 2)
+
+
+class WaitlistTests(AdminTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event(capacity=1)
+        self.student = User.objects.create_user('stud', password='pass12345')
+        self.reg = make_registration(self.event, 0, user=self.student)
+        self.entries = [
+            waitlist.join(self.event.id, name=f'W{n}', email=f'w{n}@example.com',
+                          mobile='9876543210', course='BCA', branch='Civil')[0]
+            for n in range(5)
+        ]
+
+    def positions(self):
+        return [waitlist.position(e) for e in WaitlistEntry.objects.filter(status=WaitlistEntry.WAITING)]
+
+    def test_positions_skip_withdrawn_entries(self):
+        self.assertEqual(self.positions(), [1, 2, 3, 4, 5])
+        waitlist.withdraw(self.entries[1])
+        self.assertEqual(self.positions(), [1, 2, 3, 4])
+
+    def test_cancellation_promotes_the_front_of_the_queue(self):
+        waitlist.withdraw(self.entries[0])
+        self.client.force_login(self.student)
+        self.client.post(reverse('cancel_registration', args=[self.reg.id]))
+        self.assertEqual(list(self.event.registrations.values_list('email', flat=True)), ['w1@example.com'])
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.registration_count, self.event.waitlist_head), (1, 2))
+        self.assertEqual(self.positions(), [1, 2, 3])
+        promoted = self.event.registrations.get()
+        self.assertTrue(Job.objects.filter(key=f'{notifications.REGISTRATION_CONFIRMATION}:{promoted.pk}').exists())
+        jobs.run_pending()
+        self.assertIn(['w1@example.com'], [message.to for message in mail.outbox])
+
+    def test_raising_capacity_promotes_in_one_batch(self):
+        Registration.objects.filter(pk=self.reg.pk).update(email='w2@example.com')  # w2 is already in
+        response = self.client.post(reverse('update_event_api', args=[self.event.id]),
+                                    json.dumps({'capacity': 4}), content_type='application/json')
+        self.assertEqual(response.json()['promoted'], 4)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registration_count, 4)
+        self.assertEqual(self.positions(), [1])
+
+
+class IngestQueueTests(TestCase):
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        overrides = override_settings(
+            REGISTRATION_INGEST=True, REGISTRATION_INGEST_WRITER='command',
+            REGISTRATION_QUEUE_PATH=f'{tmpdir}/queue.sqlite3',
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.event = make_event(capacity=2)
+        self.url = reverse('register', args=[self.event.id])
+
+    def register(self, email, name='Asha'):
+        return self.client.post(self.url, {
+            'name': name, 'email': email, 'mobile': '9876543210', 'course': 'BCA', 'branch': 'Civil',
+        }, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def status(self, response):
+        return self.client.get(response.json()['status_url']).json()
+
+    def test_queued_registration_is_confirmed_after_flush(self):
+        queued = self.register('asha@example.com')
+        self.assertEqual(queued.status_code, 202)
+        self.assertEqual(self.status(queued), {'status': ingest.QUEUED})
+        self.assertEqual(self.register('asha@example.com').status_code, 409)
+        self.assertFalse(self.event.registrations.exists())
+
+        self.assertEqual(ingest.flush(), 1)
+        reg = self.event.registrations.get()
+        token = tickets.sign(self.event.id, reg.id)
+        self.assertEqual(self.status(queued), {
+            'status': ingest.ACCEPTED, 'ticket_id': format_ticket_id(self.event.id, reg.id),
+            'ticket_token': token, 'qr_url': reverse('ticket_qr', args=[token]),
+        })
+
+    def test_batch_outcomes_for_full_events_and_duplicates(self):
+        make_registration(self.event, 1, email='taken@example.com', name='Someone Else')
+        responses = [self.register(email) for email in ['a@example.com', 'b@example.com']]
+        # Slips past the view's check, e.g. registered directly while queued
+        token = ingest.enqueue(self.event.id, name='Asha', email='taken@example.com', mobile='9876543210',
+                               course='BCA', branch='Civil')
+        self.assertEqual(ingest.flush(), 3)
+        self.assertEqual([self.status(r)['status'] for r in responses], [ingest.ACCEPTED, ingest.WAITLISTED])
+        self.assertEqual(ingest.status(token)['status'], ingest.DUPLICATE)
+        self.assertEqual(self.event.registrations.count(), 2)
+
+    def test_queue_file_is_not_created_while_ingestion_is_off(self):
+        with override_settings(REGISTRATION_INGEST=False):
+            response = self.client.get(reverse('registration_status_api', args=['PRV-unknown']))
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual((ingest.flush(), ingest.prune(0)), (0, 0))
+        self.assertFalse(os.path.exists(settings.REGISTRATION_QUEUE_PATH))
+
+    def test_rerun_of_an_applied_row_counts_as_accepted(self):
+        token = ingest.enqueue(self.event.id, name='Asha', email='asha@example.com', mobile='9876543210',
+                               course='BCA', branch='Civil')
+        make_registration(self.event, 1, email='asha@example.com', name='Asha')
+        ingest.flush()
+        self.assertEqual(ingest.status(token)['status'], ingest.ACCEPTED)
+
+
+class AsyncApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = make_event()
+        self.student = User.objects.create_user('stud', password='pass12345', email='stud@example.com')
+        make_registration(self.event, 1, user=self.student)
+
+    async def test_async_endpoints_under_an_async_client(self):
+        await self.async_client.aforce_login(self.student)
+        mine = (await self.async_client.get(reverse('api_my_registrations'))).json()
+        self.assertEqual(mine['registered_event_ids'], [self.event.id])
+        check = await self.async_client.get(reverse('api_check_registration'), {'event_id': self.event.id})
+        self.assertEqual(check.json(), {'registered': True})
+        profile = (await self.async_client.get(reverse('student_profile_api'))).json()
+        self.assertEqual((profile['authenticated'], profile['email']), (True, 'stud@example.com'))
+        events = await self.async_client.get(reverse('get_events_api'))
+        again = await self.async_client.get(reverse('get_events_api'), headers={'if-none-match': events['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+    async def test_anonymous_requests(self):
+        self.assertEqual((await self.async_client.get(reverse('student_profile_api'))).json(),
+                         {'authenticated': False})
+        response = await self.async_client.get(reverse('api_my_registrations'))
+        self.assertEqual(response.status_code, 302)
+
+
+class PublicCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.past = make_event(days_from_today=-2, name='Old Fest')
+
+    def test_completed_page_is_cached_until_an_event_changes(self):
+        self.client.get(reverse('completed_events'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('completed_events'))
+        with self.captureOnCommitCallbacks(execute=True):
+            make_event(days_from_today=-1, name='Yesterday Meetup')
+        response = self.client.get(reverse('completed_events'))
+        self.assertEqual(len(response.context['events']), Event.objects.filter(date__lt=datetime.date.today()).count())
+
+    def test_concurrent_misses_build_once(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.2)
+            return ['fresh']
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(caching.get_or_build('probe', build, 60)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((len(calls), results), (1, [['fresh']] * 8))
+
+    def test_coalesced_miss_serves_the_previous_value_while_rebuilding(self):
+        caching.get_or_build('probe', lambda: ['old'], 60)
+        caching.invalidate_public()
+        key, _ = caching._keys('probe', datetime.date.today(), caching.public_version())
+        cache.add(f'{key}:lock', 1)  # someone else is rebuilding
+        self.assertEqual(caching.get_or_build('probe', lambda: ['new'], 60), ['old'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                           'LOCATION': tempfile.gettempdir() + '/college-events-test-cache'}})
+    def test_file_backend(self):
+        cache.clear()
+        self.assertEqual(caching.public_events('completed')[0].name, 'Old Fest')
+        with self.assertNumQueries(0):
+            self.assertEqual(caching.public_events('completed')[0].name, 'Old Fest')
+        cache.clear()
+
+
+class EventCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = make_event(days_from_today=-3, name='Robotics Expo')
+
+    def render(self, event):
+        return render_to_string('events/includes/completed_event_card.html', {'event': event})
+
+    def test_card_is_rendered_once_per_version(self):
+        first = self.render(self.event)
+        Event.objects.filter(pk=self.event.pk).update(name='Renamed Behind Its Back')
+        self.assertEqual(self.render(Event.objects.get(pk=self.event.pk)), first)
+
+    def test_edit_or_new_registration_renders_a_fresh_card(self):
+        self.assertIn('0 attended', self.render(self.event))
+        Registration.objects.create(event=self.event, name='A', email='a@example.com',
+                                    mobile='9876543210', course='BCA', branch='CS')
+        self.assertIn('1 attended', self.render(Event.objects.get(pk=self.event.pk)))
+        self.event.refresh_from_db()
+        self.event.name = 'Robotics Expo 2'
+        self.event.save()
+        self.assertIn('Robotics Expo 2', self.render(self.event))
+
+    def test_completed_and_featured_cards_are_cached_separately(self):
+        featured = render_to_string('events/includes/event_card.html', {'event': self.event})
+        self.assertIn('Register Now', featured)
+        self.assertNotIn('Register Now', self.render(self.event))
+
+
+class SqliteProfileTests(TestCase):
+    def test_production_profile_applies_pragmas_to_new_connections(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        wrapper = SQLiteDatabaseWrapper({
+            **connection.settings_dict, **settings.DB_PROFILES['production'], 'NAME': f'{tmpdir}/profile.sqlite3',
+        }, alias='profile-check')
+        try:
+            with wrapper.cursor() as cursor:
+                pragmas = {}
+                for name in settings.SQLITE_PRAGMAS:
+                    cursor.execute(f'PRAGMA {name}')
+                    pragmas[name] = cursor.fetchone()[0]
+        finally:
+            wrapper.close()
+        # synchronous NORMAL = 1, temp_store MEMORY = 2
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000,
+                                   'mmap_size': 256 * 2 ** 20, 'cache_size': -32000, 'temp_store': 2})
+        self.assertEqual(wrapper.transaction_mode, 'IMMEDIATE')
+
+
+@replica.read_replica
+def _replica_probe(request):
+    """Reports where an Event read and a session read would be routed."""
+    router = replica.ReplicaRouter()
+    return HttpResponse(f'{router.db_for_read(Event) or "default"},{router.db_for_read(Session) or "default"}')
+
+
+class ReplicaRoutingTests(TestCase):
+    @override_settings(REPLICA_DATABASE='replica')
+    def test_read_only_views_use_the_replica_unless_the_browser_just_wrote(self):
+        view = ReplicaStickinessMiddleware(_replica_probe)
+        self.assertEqual(view(RequestFactory().get('/')).content, b'replica,default')
+        self.assertIsNone(replica.ReplicaRouter().db_for_read(Event))  # outside the view
+        pinned = RequestFactory().get('/', HTTP_COOKIE=f'{replica.STICKY_COOKIE}=1')
+        self.assertEqual(view(pinned).content, b'default,default')
+
+    @override_settings(REPLICA_DATABASE='default')  # an alias the test database has
+    def test_a_write_pins_the_browser_to_the_primary(self):
+        event = make_event()
+        response = self.client.get(reverse('completed_events'))
+        self.assertNotIn(replica.STICKY_COOKIE, response.cookies)
+        response = self.client.post(reverse('register', args=[event.id]), {
+            'name': 'A', 'email': 'a@example.com', 'mobile': '9876543210', 'course': 'BCA', 'branch': 'CS',
+        })
+        self.assertEqual(response.cookies[replica.STICKY_COOKIE]['max-age'], settings.REPLICA_STICKY_SECONDS)
+
+    @override_settings(REPLICA_DATABASE='default')
+    def test_a_read_that_only_asks_for_the_write_database_does_not_pin(self):
+        student = User.objects.create_user('stud', password='pass12345')
+        StudentProfile.objects.create(user=student)
+        self.client.force_login(student)
+        # The dashboard's get_or_create finds the profile and writes nothing
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(replica.STICKY_COOKIE, response.cookies)
+
+
+class InstrumentationTests(AdminTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        metrics.registry.reset()
+        make_event(days_from_today=-1)
+
+    def test_server_timing_header_counts_queries_and_template_time(self):
+        response = self.client.get(reverse('completed_events'))
+        timing = dict(part.strip().split(';', 1) for part in response['Server-Timing'].split(','))
+        self.assertEqual(set(timing), {'app', 'db', 'tpl'})
+        self.assertRegex(timing['db'], r'desc="[1-9]\d* queries"')
+        self.assertNotEqual(timing['tpl'], 'dur=0.0')
+
+    def test_prometheus_dump_reports_percentiles_per_url_name(self):
+        for _ in range(3):
+            self.client.get(reverse('completed_events'))
+        body = self.client.get(reverse('metrics_api')).content.decode()
+        self.assertIn('# TYPE college_events_request_seconds summary', body)
+        self.assertIn('college_events_db_queries{view="completed_events",quantile="0.99"}', body)
+        self.assertIn('college_events_response_bytes_count{view="completed_events"} 3', body)
+
+    @override_settings(METRICS_TOKEN='scrape-me')
+    def test_metrics_need_an_admin_or_the_scrape_token(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('metrics_api')).status_code, 403)
+        response = self.client.get(reverse('metrics_api'), HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+
+
+class DashboardTests(AdminTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        make_registration(make_event(days_from_today=0, name='Today'), 0, user=self.admin)
+        make_registration(make_event(days_from_today=5, name='Soon'), 1, user=self.admin)
+        for n in range(12):
+            make_registration(make_event(days_from_today=-1 - n, name=f'Past {n}'), 10 + n, user=self.admin)
+
+    def test_split_counts_and_days_remaining_come_from_the_query(self):
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertEqual(response.context['counts'], {'total': 14, 'upcoming': 2, 'completed': 12})
+        days = {reg.event.name: reg.days_remaining.days for reg in response.context['upcoming']}
+        self.assertEqual(days, {'Today': 0, 'Soon': 5})
+        self.assertContains(response, '5 days left')
+        self.assertEqual(len(response.context['completed']), views.DASHBOARD_HISTORY_PAGE)
+        self.assertEqual(response.context['completed'][0].event.name, 'Past 0')
+
+    def test_history_endpoint_continues_from_the_dashboard_cursor(self):
+        cursor = self.client.get(reverse('student_dashboard')).context['history_cursor']
+        data = self.client.get(reverse('api_registration_history'), {'cursor': cursor}).json()
+        self.assertEqual([reg['event_name'] for reg in data['results']], ['Past 10', 'Past 11'])
+        self.assertIsNone(data['next_cursor'])
+        response = self.client.get(reverse('api_registration_history'), {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BootstrapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = make_event(name='Hackathon')
+        self.other = make_event(name='Quiz')
+        self.student = User.objects.create_user('stu', email='stu@example.com', password='pw')
+        StudentProfile.objects.create(user=self.student, mobile='9876543210', course='BCA')
+        make_registration(self.event, 0, user=self.student)
+
+    def test_payload_carries_events_registrations_and_profile(self):
+        self.client.force_login(self.student)
+        data = self.client.get(reverse('bootstrap_api')).json()
+        self.assertLessEqual({'Hackathon', 'Quiz'}, {event['name'] for event in data['events']})
+        self.assertEqual(data['registered_event_ids'], [self.event.pk])
+        self.assertEqual(data['registrations'][0]['email'], 'student0@example.com')
+        self.assertEqual((data['profile']['email'], data['profile']['course']), ('stu@example.com', 'BCA'))
+
+    def test_event_list_embeds_the_payload_for_anonymous_visitors(self):
+        response = self.client.get(reverse('event_list'))
+        embedded = response.content.decode().split('id="events-bootstrap" type="application/json">')[1]
+        data = json.loads(embedded.split('</script>')[0])
+        self.assertEqual(len(data['events']), Event.objects.filter(date__gte=timezone.localdate()).count())
+        self.assertEqual((data['registrations'], data['profile']), ([], {'authenticated': False}))
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.robotics = make_event(name='Robotics Workshop', venue='Innovation Lab')
+        self.quiz = make_event(name='Science Quiz', description='Rounds on robotics and space.')
+        self.old = make_event(days_from_today=-3, name='Robotics Expo')
+
+    def names(self, query, **kwargs):
+        return [event.name for event in search.search(query, **kwargs)[0]]
+
+    def test_prefix_terms_are_ranked_name_first_and_indexed_by_triggers(self):
+        self.assertTrue(search.fts_available('default'))
+        self.assertEqual(self.names('robot', event_filter='upcoming'), ['Robotics Workshop', 'Science Quiz'])
+        self.assertEqual(self.names('robo work'), ['Robotics Workshop'])
+        Event.objects.filter(pk=self.quiz.pk).update(venue='Innovation Hub')
+        self.assertEqual(self.names('innov', event_filter='upcoming'), ['Robotics Workshop', 'Science Quiz'])
+        self.robotics.delete()
+        # FTS5 query syntax in the input is treated as plain words
+        self.assertEqual(self.names('"robotics*'), ['Robotics Expo', 'Science Quiz'])
+
+    def test_like_fallback_without_fts5(self):
+        with mock.patch.dict(search._fts_tables, {'default': False}):
+            self.assertEqual(self.names('robot', event_filter='upcoming'), ['Robotics Workshop', 'Science Quiz'])
+            self.assertEqual(self.names('robot', event_filter='completed'), ['Robotics Expo'])
+
+    def test_api_pages_through_results(self):
+        response = self.client.get(reverse('search_events_api'), {'q': 'robot', 'limit': 2})
+        data = response.json()
+        self.assertEqual([event['name'] for event in data['results']], ['Robotics Expo', 'Robotics Workshop'])
+        self.assertEqual(data['next_page'], 2)
+        data = self.client.get(reverse('search_events_api'), {'q': 'robot', 'limit': 2, 'page': 2}).json()
+        self.assertEqual(([event['name'] for event in data['results']], data['next_page']), (['Science Quiz'], None))
+
+    def test_sync_triggers_exist_after_migrate_and_are_checked(self):
+        self.assertEqual(search.missing_fts_triggers('default'), [])
+        self.assertEqual(checks.check_fts_triggers(None, databases=['default']), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {search.FTS_TABLE}_au')   # as a table rebuild would
+        self.assertEqual([error.id for error in checks.check_fts_triggers(None, databases=['default'])], ['events.E001'])
+
+
+class RegistrationSearchTests(AdminTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event()
+        self.rahul = make_registration(self.event, 1, name='Rahul  Sharma', email='Rahul.S@Example.com',
+                                       mobile='9876501234')
+        self.priya, = Registration.objects.bulk_create([Registration(
+            event=self.event, name='Priya Verma', email='priya@example.com', mobile='9123456780',
+            course='BCA', branch='Civil',
+        )])
+
+    def names(self, query):
+        return sorted(reg.name for reg in search.registrations(query))
+
+    def test_prefix_lookups_on_normalised_keys(self):
+        self.assertEqual(self.names('rah'), ['Rahul  Sharma'])
+        self.assertEqual(self.names('SHAR'), ['Rahul  Sharma'])
+        self.assertEqual(self.names('rahul sh'), ['Rahul  Sharma'])
+        self.assertEqual(self.names('rahul.s@ex'), ['Rahul  Sharma'])
+        self.assertEqual(self.names('+91 91234'), ['Priya Verma'])
+        self.assertEqual(self.names('verma'), ['Priya Verma'])
+        self.assertEqual(self.names(format_ticket_id(self.event.pk, self.priya.pk)), ['Priya Verma'])
+        self.assertEqual(self.names(format_ticket_id(self.event.pk + 1, self.priya.pk)), [])
+
+    def test_keys_follow_edits(self):
+        self.rahul.name = 'Rohan Mehta'
+        self.rahul.save(update_fields=['name'])
+        self.assertEqual(self.names('meh'), ['Rohan Mehta'])
+        self.assertEqual(self.names('sharma'), [])
+
+    def test_admin_changelist_and_panel_api(self):
+        User.objects.filter(pk=self.admin.pk).update(is_superuser=True)
+        response = self.client.get(reverse('admin:events_registration_changelist'), {'q': 'verm'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.priya])
+        data = self.client.get(reverse('search_registrations_api'), {'q': '98765'}).json()
+        self.assertEqual([reg['ticket_id'] for reg in data['results']],
+                         [format_ticket_id(self.event.pk, self.rahul.pk)])
+        make_registration(self.event, 2, name='Vikram Rao')
+        data = self.client.get(reverse('search_registrations_api'), {'q': 'v'}).json()
+        self.assertEqual([reg['name'] for reg in data['results']], ['Vikram Rao', 'Priya Verma'])
+        other = make_event(name='Other')
+        make_registration(other, 3, name='Vivek Das')
+        data = self.client.get(reverse('search_registrations_api'), {'q': 'viv'}).json()
+        self.assertEqual([reg['name'] for reg in data['results']], ['Vivek Das'])
+        data = self.client.get(reverse('search_registrations_api'), {'q': 'viv', 'event': self.event.pk}).json()
+        self.assertEqual(data['results'], [])
+
+
+class QueryInspectionTests(AdminTestMixin, TestCase):
+    def test_dashboard_waitlist_positions_do_not_scale_with_entries(self):
+        for n in range(5):
+            event = make_event(name=f'Full {n}', capacity=0)
+            waitlist.join(event.pk, user=self.admin, name='A', email='a@example.com',
+                          mobile='9876543210', course='BCA', branch='CS')
+        with self.assertNoLogs('events.querycheck', level='WARNING'):
+            response = self.client.get(reverse('student_dashboard'))
+        self.assertEqual([entry.position for entry in response.context['waitlist']], [1] * 5)
+
+    def test_repeated_query_shape_is_reported_with_its_call_site(self):
+        events = [make_event(name=f'E{n}') for n in range(4)]
+        token = querycheck.begin()
+        for event in events:
+            Event.objects.get(pk=event.pk)
+        request = RequestFactory().get('/')
+        request.resolver_match = None
+        with self.assertLogs('events.querycheck', level='WARNING') as logs:
+            querycheck.finish(token, request)
+        self.assertIn('4 x SELECT', logs.output[0])
+        self.assertIn('events/tests.py:', logs.output[0])
+
+    def test_view_over_its_budget_fails(self):
+        with mock.patch.dict(QUERY_BUDGETS, {'completed_events': 1}):
+            with self.assertRaisesMessage(querycheck.QueryBudgetExceeded, 'its budget is 1'):
+                self.client.get(reverse('completed_events'))
+
+
+class SeedDataTests(TestCase):
+    def test_seed_data_builds_students_and_skewed_registrations(self):
+        events_before = Event.objects.count()
+        call_command('seed_data', events=20, students=40, registrations=300, stdout=io.StringIO())
+        self.assertEqual(Event.objects.count(), events_before + 20)
+        self.assertEqual(User.objects.filter(student_profile__isnull=False).count(), 40)
+        self.assertTrue(self.client.login(username=User.objects.last().username, password='student123'))
+
+        counts = sorted(Event.objects.values_list('registration_count', flat=True), reverse=True)
+        self.assertEqual(sum(counts), Registration.objects.count())
+        self.assertGreater(Registration.objects.count(), 250)
+        self.assertGreater(counts[0], 3 * counts[len(counts) // 2])
+
+
+class JobTests(TestCase):
+    def test_registration_email_is_sent_by_the_job_not_the_request(self):
+        event = make_event(capacity=5)
+        self.client.post(reverse('register', args=[event.id]), {
+            'name': 'Asha', 'email': 'asha@example.com', 'mobile': '9876543210', 'course': 'BCA', 'branch': 'Civil',
+        })
+        self.assertEqual(mail.outbox, [])
+        reg = event.registrations.get()
+        job = Job.objects.get()
+        self.assertEqual((job.name, job.payload), (notifications.REGISTRATION_CONFIRMATION, {'registration_id': reg.pk}))
+        # Queuing it again (e.g. a retried request) reuses the job
+        self.assertEqual(notifications.queue_registration_confirmation(reg).pk, job.pk)
+
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+        self.assertEqual(mail.outbox[0].to, ['asha@example.com'])
+        self.assertIn(format_ticket_id(event.id, reg.id), mail.outbox[0].body)
+        self.assertEqual(jobs.run_pending(), 0)
+
+    def test_email_text_is_not_html_escaped(self):
+        event = make_event(name='AI & Machine Learning Workshop')
+        make_registration(event, 1, name="Anita D'Souza")
+        jobs.run_pending()
+        self.assertIn("Hi Anita D'Souza,", mail.outbox[0].body)
+        self.assertIn('AI & Machine Learning Workshop', mail.outbox[0].body)
+
+    def test_rolled_back_registration_queues_nothing(self):
+        event = make_event(capacity=1)
+        make_registration(event, 1)
+        with self.assertRaises(EventFull):
+            make_registration(event, 2)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_failing_job_backs_off_then_fails(self):
+        def flaky(**payload):
+            raise ConnectionError('SMTP down')
+
+        with mock.patch.dict(jobs.HANDLERS, {'flaky': flaky}):
+            job = jobs.enqueue('flaky', max_attempts=2)
+            self.assertEqual(jobs.run_pending(), 1)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+            self.assertIn('SMTP down', job.last_error)
+            self.assertGreater(job.run_at, timezone.now())
+            self.assertEqual(jobs.run_pending(), 0)   # not due yet
+
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            self.assertEqual(jobs.run_pending(), 1)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_abandoned_claim_is_run_again(self):
+        event = make_event()
+        make_registration(event, 1)
+        stale = timezone.now() - datetime.timedelta(seconds=jobs.CLAIM_TIMEOUT + 1)
+        Job.objects.update(status=Job.RUNNING, claimed_by='dead-worker', claimed_at=stale, attempts=1)
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class TicketTests(TestCase):
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        overrides = override_settings(TICKET_QR_CACHE_DIR=tmpdir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.token = tickets.sign(7, 42)
+
+    def test_signature_is_what_an_offline_scanner_computes(self):
+        # The formula admin-script.js reimplements with WebCrypto
+        ticket_id, signature = self.token.split(':')
+        self.assertEqual(ticket_id, 'TKT-007-0042')
+        key = hashlib.sha256((tickets.SALT + 'signer' + tickets.event_key(7)).encode()).digest()
+        mac = hmac.new(key, ticket_id.encode(), hashlib.sha256).digest()
+        self.assertEqual(signature, base64.urlsafe_b64encode(mac).decode().rstrip('='))
+        self.assertEqual(tickets.verify(self.token), (7, 42))
+        self.assertIsNone(tickets.verify(self.token.replace('0042', '0043')))
+
+    def test_tokens_survive_secret_key_rotation(self):
+        with override_settings(SECRET_KEY='new-secret', SECRET_KEY_FALLBACKS=[settings.SECRET_KEY]):
+            self.assertEqual(tickets.verify(self.token), (7, 42))
+        with override_settings(SECRET_KEY='new-secret', SECRET_KEY_FALLBACKS=[]):
+            self.assertIsNone(tickets.verify(self.token))
+
+    def test_qr_png_is_rendered_once_and_served_immutable(self):
+        url = reverse('ticket_qr', args=[self.token])
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(Image.open(io.BytesIO(response.content)).format, 'PNG')
+
+        with mock.patch.object(tickets, 'render_qr') as render:
+            self.assertEqual(self.client.get(url).content, response.content)
+            render.assert_not_called()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(reverse('ticket_qr', args=['TKT-007-0042:forged'])).status_code, 404)
+
+    def test_eviction_drops_least_recently_used_images(self):
+        tokens = [tickets.sign(7, n) for n in range(4)]
+        sizes = []
+        for n, token in enumerate(tokens):
+            sizes.append(len(tickets.qr_png(token)))
+            path = next(Path(settings.TICKET_QR_CACHE_DIR).glob(f'*/{tickets.qr_digest(token)}.png'))
+            os.utime(path, (1000 + n, 1000 + n))
+        # Just too small for three images once eviction stops at EVICT_TO of the limit
+        self.assertEqual(tickets.evict(max_bytes=int(sum(sizes[2:]) / tickets.EVICT_TO) + 1), 2)
+        cached = {p.stem for p in Path(settings.TICKET_QR_CACHE_DIR).glob('*/*.png')}
+        self.assertEqual(cached, {tickets.qr_digest(token) for token in tokens[2:]})
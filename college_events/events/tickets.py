@@ -0,0 +1,183 @@
+"""Signed ticket tokens and their QR code images.
+
+A ticket id (``TKT-<event>-<registration>``) is easy to guess, so passes
+carry a token instead: ``<ticket id>:<signature>``, signed with a key
+derived from SECRET_KEY for that one event. Checking a token needs that
+key and nothing else: the server rejects forgeries before any query, and a
+gate scanner holding the keys for today's events (scanner_keys()) can tell
+a forged pass from a real one while offline. A leaked scanner key only
+lets someone sign tickets for that event.
+
+The signature is django.core.signing's, so a scanner can recompute it:
+base64url without padding of HMAC-SHA256(key=SHA256(SALT + 'signer' +
+event key), msg=ticket id). Keys derived from SECRET_KEY_FALLBACKS are
+accepted too, so rotating SECRET_KEY doesn't void issued passes.
+
+QR images are rendered with qrcode and Pillow and kept in a
+content-addressed cache on disk (TICKET_QR_CACHE_DIR). A file is named
+after the hash of what it encodes, so it never goes stale. Once the cache
+outgrows TICKET_QR_CACHE_MAX_BYTES the least recently used files are
+deleted; a cache hit refreshes the file's mtime at most once an hour.
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import qrcode
+from qrcode.image.pil import PilImage
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import salted_hmac
+
+from .models import format_ticket_id
+
+SALT = 'events.tickets'
+EVENT_KEY_SALT = 'events.tickets.event-key'
+TICKET_RE = re.compile(r'^TKT-(\d+)-(\d+)$')
+
+# Part of every cache file's name; bump it when the rendering below changes
+RENDER_VERSION = 1
+TOUCH_INTERVAL = 3600   # seconds between mtime refreshes of a cached file
+EVICT_TO = 0.8          # eviction stops at this fraction of the size limit
+
+_cache_lock = threading.Lock()
+_cache_size = None      # bytes in TICKET_QR_CACHE_DIR as this process last saw it
+
+
+def parse_ticket_id(ticket_id):
+    """Return ``(event_id, registration_id)`` or None for a malformed id."""
+    match = TICKET_RE.match(str(ticket_id or '').strip().upper())
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def event_key(event_id, secret=None):
+    """The key that signs (and verifies) one event's tickets, as hex."""
+    return salted_hmac(EVENT_KEY_SALT, str(event_id), secret=secret or settings.SECRET_KEY,
+                       algorithm='sha256').hexdigest()
+
+
+def _signer(event_id):
+    return signing.Signer(
+        key=event_key(event_id),
+        fallback_keys=[event_key(event_id, secret) for secret in settings.SECRET_KEY_FALLBACKS],
+        salt=SALT,
+    )
+
+
+def sign(event_id, reg_id):
+    """The token printed on a pass and encoded in its QR code."""
+    return _signer(event_id).sign(format_ticket_id(event_id, reg_id))
+
+
+def verify(token):
+    """``(event_id, registration_id)`` for a genuine token, else None. Never queries the database."""
+    token = str(token or '').strip()
+    parsed = parse_ticket_id(token.partition(':')[0])
+    if parsed is None:
+        return None
+    try:
+        _signer(parsed[0]).unsign(token)
+    except signing.BadSignature:
+        return None
+    return parsed
+
+
+def scanner_keys(event_ids):
+    """Event id -> verification key, for a scanner that must check tickets offline."""
+    return {str(event_id): event_key(event_id) for event_id in event_ids}
+
+
+def qr_digest(token):
+    """Content hash of the QR image for ``token``: its cache file name and ETag."""
+    return hashlib.sha256(f'{RENDER_VERSION}:{token}'.encode()).hexdigest()
+
+
+def render_qr(token):
+    """PNG bytes of a QR code encoding ``token``."""
+    code = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M,
+                         box_size=settings.TICKET_QR_BOX_SIZE, border=4)
+    code.add_data(token)
+    code.make(fit=True)
+    buffer = io.BytesIO()
+    code.make_image(image_factory=PilImage).save(buffer)
+    return buffer.getvalue()
+
+
+def qr_png(token):
+    """PNG bytes of the QR code for ``token``, rendered once and then read from the disk cache."""
+    digest = qr_digest(token)
+    path = Path(settings.TICKET_QR_CACHE_DIR) / digest[:2] / f'{digest}.png'
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        data = render_qr(token)
+        _store(path, data)
+        return data
+    try:
+        if time.time() - path.stat().st_mtime > TOUCH_INTERVAL:
+            os.utime(path)
+    except FileNotFoundError:
+        pass   # evicted meanwhile
+    return data
+
+
+def _store(path, data):
+    global _cache_size
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so a concurrent reader never sees half a file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fileobj:
+        fileobj.write(data)
+    os.replace(tmp, path)
+    with _cache_lock:
+        if _cache_size is None:
+            _cache_size = _cache_usage()[1]
+        else:
+            _cache_size += len(data)
+        over = _cache_size > settings.TICKET_QR_CACHE_MAX_BYTES
+    if over:
+        evict()
+
+
+def _cache_usage():
+    """``(files as (mtime, size, path), total bytes)`` for the cache directory."""
+    files = []
+    for path in Path(settings.TICKET_QR_CACHE_DIR).glob('*/*.png'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    return files, sum(size for _, size, _ in files)
+
+
+def evict(max_bytes=None):
+    """Delete the least recently used images until the cache is well under its limit.
+
+    Returns how many files were removed.
+    """
+    global _cache_size
+    max_bytes = settings.TICKET_QR_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    with _cache_lock:
+        files, total = _cache_usage()
+        removed = 0
+        if total > max_bytes:
+            for _, size, path in sorted(files):
+                if total <= max_bytes * EVICT_TO:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass   # another process evicted it
+                total -= size
+                removed += 1
+        _cache_size = total
+    return removed
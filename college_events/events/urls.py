@@ -25,14 +25,57 @@ urlpatterns = [
     path('accounts/profile/update/', views.student_update_profile, name='student_update_profile'),
     path('accounts/registration/<int:reg_id>/update/', views.update_registration, name='update_registration'),
     path('accounts/registration/<int:reg_id>/cancel/', views.cancel_registration, name='cancel_registration'),
+    path('accounts/waitlist/<int:entry_id>/leave/', views.leave_waitlist, name='leave_waitlist'),
 
     # ── JSON API Endpoints ───────────────────────────────────────
     path('api/events/', views.get_events_api, name='get_events_api'),
+    path('api/events/search/', views.search_events_api, name='search_events_api'),
     path('api/registrations/', views.get_registrations_api, name='get_registrations_api'),
+    path('api/registrations/search/', views.search_registrations_api, name='search_registrations_api'),
+    path('api/registrations/export/', views.export_registrations_api, name='export_registrations_api'),
     path('api/events/create/', views.create_event_api, name='create_event_api'),
     path('api/events/<int:event_id>/update/', views.update_event_api, name='update_event_api'),
     path('api/events/<int:event_id>/delete/', views.delete_event_api, name='delete_event_api'),
     path('api/user/profile/', views.student_profile_api, name='student_profile_api'),
+    path('api/bootstrap/', views.bootstrap_api, name='bootstrap_api'),
     path('api/user/registrations/', views.api_my_registrations, name='api_my_registrations'),
+    path('api/user/registrations/history/', views.api_registration_history, name='api_registration_history'),
     path('api/check-registration/', views.api_check_registration, name='api_check_registration'),
+    path('api/registrations/status/<str:token>/', views.registration_status_api, name='registration_status_api'),
+    path('api/checkin/', views.checkin_api, name='checkin_api'),
+    path('api/checkin/batch/', views.checkin_batch_api, name='checkin_batch_api'),
+    path('api/checkin/keys/', views.scanner_keys_api, name='scanner_keys_api'),
+    path('tickets/<str:token>.png', views.ticket_qr, name='ticket_qr'),
+    path('api/metrics/', views.metrics_api, name='metrics_api'),
 ]
+
+# Most queries each view may run per request, enforced by events.querycheck
+# (the test suite fails on an overrun). Counts include the session and user
+# lookups; rows a streaming response fetches after the view returns are not
+# counted. Waitlist promotion adds ~9 queries per batch it promotes.
+QUERY_BUDGETS = {
+    'homepage': 4,
+    'event_list': 5,
+    'completed_events': 4,
+    'register': 12,
+    'admin_panel': 6,
+    'get_events_api': 3,
+    'search_events_api': 2,
+    'get_registrations_api': 5,
+    'search_registrations_api': 4,
+    'export_registrations_api': 3,
+    'update_event_api': 24,
+    'student_dashboard': 8,
+    'cancel_registration': 18,
+    'student_profile_api': 3,
+    'bootstrap_api': 5,
+    'api_my_registrations': 6,
+    'api_registration_history': 3,
+    'api_check_registration': 3,
+    'registration_status_api': 2,
+    'checkin_api': 6,
+    'checkin_batch_api': 8,
+    'scanner_keys_api': 3,
+    'ticket_qr': 2,
+    'metrics_api': 2,
+}
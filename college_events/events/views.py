@@ -1,50 +1,54 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
+from django.conf import settings
 from django.contrib import messages
-from django.http import JsonResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Max, Q, Sum, Value
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.template.defaultfilters import date as format_date
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
-from .models import Event, Registration, StudentProfile
+from .models import Event, EventFull, Registration, StudentProfile, WaitlistEntry, format_ticket_id
+from . import caching, checkin, exports, ingest, metrics, search, tickets, waitlist
+from .decorators import conditional_cache
+from .replica import read_replica
+import base64
+import binascii
 import json
 import datetime
 import random
+import secrets
 
 def is_admin(user):
     return user.is_authenticated and (user.is_staff or user.is_superuser)
 
+@read_replica
 def homepage(request):
     """Landing homepage — hero, stats, features only. No event lists."""
-    today = datetime.date.today()
-    total_events = Event.objects.count()
-    total_registrations = Registration.objects.count()
-    upcoming_count = Event.objects.filter(date__gte=today).count()
-    completed_count = Event.objects.filter(date__lt=today).count()
-    # 3 featured upcoming events shown as a preview teaser
-    featured_events = Event.objects.filter(date__gte=today).order_by('date')[:3]
-    context = {
-        'total_events': total_events,
-        'total_registrations': total_registrations,
-        'upcoming_count': upcoming_count,
-        'completed_count': completed_count,
-        'featured_events': featured_events,
-    }
+    # Counters plus 3 featured upcoming events, cached (see events.caching)
+    context = caching.homepage_stats()
     return render(request, 'events/homepage.html', context)
 
 
+@read_replica
 def event_list(request):
     """Upcoming events page — shows only future events."""
-    today = datetime.date.today()
-    events = Event.objects.filter(date__gte=today).order_by('date')
-    return render(request, 'events/event_list.html', {'events': events, 'page_title': 'Upcoming Events'})
+    # Cards are drawn by script.js from the embedded bootstrap payload
+    return render(request, 'events/event_list.html', {
+        'bootstrap':  _bootstrap_payload(request.user),
+        'page_title': 'Upcoming Events',
+    })
 
 
+@read_replica
 def completed_events(request):
     """Completed events page — shows only past events."""
-    today = datetime.date.today()
-    events = Event.objects.filter(date__lt=today).order_by('-date')
+    events = caching.public_events('completed')
     return render(request, 'events/completed_events.html', {'events': events})
 
 
@@ -60,6 +64,37 @@ def contact(request):
         return redirect('contact')
     return render(request, 'events/contact.html')
 
+
+def _registration_conflict(request, event, message):
+    """409 for a duplicate or full-event registration (JSON for the AJAX form)."""
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'success': False, 'error': message}, status=409)
+    messages.error(request, message)
+    return render(request, 'events/register.html', {'event': event}, status=409)
+
+
+def _waitlisted(request, entry):
+    """202 with the queue position when a full event put the student on its waitlist."""
+    position = waitlist.position(entry)
+    message = f'This event is full. You are #{position} on the waitlist.'
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'success': True, 'waitlisted': True, 'position': position, 'message': message}, status=202)
+    messages.info(request, message)
+    return redirect('event_list')
+
+
+def _queued(request, token):
+    """202 with a provisional token when the registration went to the ingest queue."""
+    message = f'Registration received (provisional ticket {token}). It will be confirmed in a moment.'
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'success': True, 'queued': True, 'token': token, 'message': message,
+            'status_url': reverse('registration_status_api', args=[token]),
+        }, status=202)
+    messages.info(request, message)
+    return redirect('event_list')
+
+
 @require_http_methods(["GET", "POST"])
 def register(request, event_id):
     """Register a student for a specific event via AJAX or form."""
@@ -78,8 +113,7 @@ def register(request, event_id):
 
         if name and email and mobile and course and branch:
             if Registration.objects.filter(event=event, email=email).exists():
-                messages.error(request, 'You have already registered for this event.')
-                return render(request, 'events/register.html', {'event': event})
+                return _registration_conflict(request, event, 'You have already registered for this event.')
 
             if not mobile.isdigit() or len(mobile) != 10:
                 messages.error(request, 'Please enter a valid 10-digit mobile number.')
@@ -88,11 +122,37 @@ def register(request, event_id):
             # Link to student account if logged in
             linked_user = request.user if request.user.is_authenticated else None
 
-            Registration.objects.create(
-                event=event, user=linked_user,
-                name=name, email=email,
-                mobile=mobile, course=course, branch=branch
-            )
+            if settings.REGISTRATION_INGEST:
+                try:
+                    token = ingest.enqueue(
+                        event.id, user_id=linked_user.pk if linked_user else None,
+                        name=name, email=email,
+                        mobile=mobile, course=course, branch=branch
+                    )
+                except IntegrityError:
+                    return _registration_conflict(request, event, 'You have already registered for this event.')
+                return _queued(request, token)
+
+            try:
+                Registration.objects.create(
+                    event=event, user=linked_user,
+                    name=name, email=email,
+                    mobile=mobile, course=course, branch=branch
+                )
+            except EventFull:
+                try:
+                    entry, promoted = waitlist.join(
+                        event.id, user=linked_user,
+                        name=name, email=email,
+                        mobile=mobile, course=course, branch=branch
+                    )
+                except IntegrityError:
+                    return _registration_conflict(request, event, 'You are already on the waitlist for this event.')
+                if not promoted:
+                    return _waitlisted(request, entry)
+            except IntegrityError:
+                # Lost a race with a duplicate submission of the same form
+                return _registration_conflict(request, event, 'You have already registered for this event.')
             messages.success(request, 'Registration successful!')
             return redirect('event_list')
         else:
@@ -138,33 +198,68 @@ def admin_logout_view(request):
     messages.success(request, 'You have been logged out successfully.')
     return redirect('homepage')
 
+async def _events_version(request):
+    """Cheap version stamp for get_events_api: one aggregate, no rows."""
+    today = datetime.date.today()
+    version = await Event.objects.for_filter(request.GET.get('filter', 'all'), today).order_by().aaggregate(
+        count=Count('id'), last=Max('updated_at'), registrations=Sum('registration_count'),
+    )
+    return (today, version['count'], version['last'], version['registrations']), version['last']
+
+
+def _serialize_event(event):
+    """Event as the events page's JavaScript expects it (dates and times as strings)."""
+    return {
+        'id': event.id,
+        'name': event.name,
+        'description': event.description,
+        'date': event.date.strftime('%Y-%m-%d'),
+        'time': event.time.strftime('%H:%M') if event.time else None,
+        'venue': event.venue,
+        'image': event.image,
+        'registration_count': event.registration_count,
+        'capacity': event.capacity,
+    }
+
+
+@read_replica
 @require_http_methods(["GET"])
-def get_events_api(request):
+@conditional_cache(_events_version, max_age=30, stale_while_revalidate=60)
+async def get_events_api(request):
     """JSON API endpoint to fetch events for frontend."""
     event_filter = request.GET.get('filter', 'all')  # 'upcoming', 'completed', or 'all'
-    today = datetime.date.today()
+    # Fresh data only: the ETag above was computed from the current rows
+    events = await caching.apublic_events(event_filter, stale_ok=False)
 
-    if event_filter == 'upcoming':
-        events_qs = Event.objects.filter(date__gte=today).order_by('date')
-    elif event_filter == 'completed':
-        events_qs = Event.objects.filter(date__lt=today).order_by('-date')
-    else:
-        events_qs = Event.objects.all()
+    return JsonResponse([_serialize_event(event) for event in events], safe=False)
 
-    events = events_qs.values('id', 'name', 'description', 'date', 'time', 'venue', 'image')
-    events_list = list(events)
-    
-    # Convert date and time objects to strings for JSON serialization
-    for event in events_list:
-        event['date'] = event['date'].strftime('%Y-%m-%d')
-        event['time'] = event['time'].strftime('%H:%M') if event['time'] else None
-    
-    response = JsonResponse(events_list, safe=False)
-    # Prevent caching so we always get latest data
-    response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response['Pragma'] = 'no-cache'
-    response['Expires'] = '0'
-    return response
+
+@read_replica
+@require_http_methods(["GET"])
+def search_events_api(request):
+    """Ranked, paginated event search (``q``, ``filter``, ``page``, ``limit``); see events.search."""
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+        limit = max(1, min(int(request.GET.get('limit', search.SEARCH_PAGE_SIZE)), search.SEARCH_MAX_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'page and limit must be integers.'}, status=400)
+
+    events, has_more = search.search(
+        request.GET.get('q', ''), request.GET.get('filter', 'all'), page=page, limit=limit
+    )
+    return JsonResponse({
+        'results': [_serialize_event(event) for event in events],
+        'next_page': page + 1 if has_more else None,
+    })
+
+def _parse_capacity(value):
+    """Capacity from the event form: blank means unlimited."""
+    if value in (None, ''):
+        return None
+    capacity = int(value)
+    if capacity < 0:
+        raise ValueError('Capacity cannot be negative.')
+    return capacity
 
 @login_required
 @csrf_exempt
@@ -180,7 +275,8 @@ def create_event_api(request):
             date=data['date'],
             time=data.get('time'),
             venue=data['venue'],
-            image=data.get('image', '')
+            image=data.get('image', ''),
+            capacity=_parse_capacity(data.get('capacity'))
         )
         return JsonResponse({
             'success': True,
@@ -191,7 +287,8 @@ def create_event_api(request):
                 'date': event.date.strftime('%Y-%m-%d') if hasattr(event.date, 'strftime') else str(event.date),
                 'time': event.time.strftime('%H:%M') if event.time and hasattr(event.time, 'strftime') else (str(event.time) if event.time else None),
                 'venue': event.venue,
-                'image': event.image
+                'image': event.image,
+                'capacity': event.capacity
             }
         })
     except Exception as e:
@@ -213,10 +310,19 @@ def update_event_api(request, event_id):
         event.time = data.get('time', event.time)
         event.venue = data.get('venue', event.venue)
         event.image = data.get('image', event.image)
-        event.save()
+        if 'capacity' in data:
+            event.capacity = _parse_capacity(data['capacity'])
+            if event.capacity is not None and event.capacity < event.registration_count:
+                raise ValueError(f'Capacity cannot be below the {event.registration_count} existing registrations.')
+        with transaction.atomic():
+            # registration_count is owned by the seat allocator; never write back a stale copy
+            event.save(update_fields=['name', 'description', 'date', 'time', 'venue', 'image', 'capacity', 'updated_at'])
+            # Raising the capacity promotes from the waitlist in the same transaction
+            promoted = waitlist.promote(event.id)
         
         return JsonResponse({
             'success': True,
+            'promoted': len(promoted),
             'event': {
                 'id': event.id,
                 'name': event.name,
@@ -224,7 +330,8 @@ def update_event_api(request, event_id):
                 'date': event.date.strftime('%Y-%m-%d') if hasattr(event.date, 'strftime') else str(event.date),
                 'time': event.time.strftime('%H:%M') if event.time and hasattr(event.time, 'strftime') else (str(event.time) if event.time else None),
                 'venue': event.venue,
-                'image': event.image
+                'image': event.image,
+                'capacity': event.capacity
             }
         })
     except Exception as e:
@@ -243,29 +350,248 @@ def delete_event_api(request, event_id):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
+REGISTRATION_API_FIELDS = (
+    'id', 'name', 'email', 'mobile', 'course', 'branch', 'timestamp',
+    'event__id', 'event__name', 'event__date', 'event__venue',
+)
+REGISTRATIONS_PAGE_SIZE = 500
+REGISTRATIONS_MAX_PAGE_SIZE = 2000
+# Rows fetched per database round-trip (and per chunk written) while streaming
+REGISTRATIONS_STREAM_CHUNK = 1000
+
+
+def _encode_cursor(timestamp, reg_id):
+    """Opaque keyset cursor pointing just past (timestamp, id)."""
+    raw = f"{timestamp.isoformat()}|{reg_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """Inverse of _encode_cursor — raises ValueError on anything malformed."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        ts, reg_id = raw.rsplit('|', 1)
+        return datetime.datetime.fromisoformat(ts), int(reg_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError('Invalid cursor.') from e
+
+
+def _serialize_registration(reg):
+    """Format a values() row from Registration.objects.filtered() for the admin panel."""
+    reg['timestamp']   = reg['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
+    reg['event__date'] = reg['event__date'].strftime('%Y-%m-%d')
+    # Generate a professional looking ticket ID for the scanner
+    reg['ticket_id'] = format_ticket_id(reg['event__id'], reg['id'])
+    return reg
+
+
+def _stream_json_array(rows, chunk_size=REGISTRATIONS_STREAM_CHUNK):
+    """Yield a JSON array piece by piece so the full list never sits in memory."""
+    yield '['
+    buffer = []
+    first = True
+    for row in rows:
+        buffer.append(('' if first else ',') + json.dumps(row))
+        first = False
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    yield ''.join(buffer) + ']'
+
+
+def _admin_filtered_registrations(request):
+    return Registration.objects.filtered(
+        event=request.GET.get('event'),
+        course=request.GET.get('course'),
+        branch=request.GET.get('branch'),
+    )
+
+
+def _registrations_version(request):
+    """Version stamp for get_registrations_api (rows include event details too)."""
+    version = _admin_filtered_registrations(request).order_by().aggregate(
+        count=Count('id'), last=Max('updated_at'), event_last=Max('event__updated_at'),
+    )
+    last_modified = max(filter(None, [version['last'], version['event_last']]), default=None)
+    return (version['count'], version['last'], version['event_last']), last_modified
+
+
+@read_replica
 @user_passes_test(is_admin)
 @require_http_methods(["GET"])
-def get_registrations_api(request):
-    """JSON API endpoint to fetch all registrations for admin panel."""
-    registrations = Registration.objects.all().select_related('event').values(
-        'id', 'name', 'email', 'mobile', 'course', 'branch', 'timestamp',
-        'event__id', 'event__name', 'event__date', 'event__venue'
+def search_registrations_api(request):
+    """Admin panel type-ahead: registrations by name, email, mobile or ticket id, in key order.
+
+    Takes the same ``event``, ``course`` and ``branch`` filters as get_registrations_api.
+    """
+    try:
+        limit = int(request.GET.get('limit', search.REGISTRATION_SEARCH_LIMIT))
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer.'}, status=400)
+    limit = max(1, min(limit, search.REGISTRATION_SEARCH_MAX_LIMIT))
+
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'results': []})
+    rows = search.first_registrations(
+        query, _admin_filtered_registrations(request).values(*REGISTRATION_API_FIELDS), limit,
     )
-    registrations_list = list(registrations)
+    return JsonResponse({'results': [_serialize_registration(row) for row in rows]})
+
+
+@read_replica
+@user_passes_test(is_admin)
+@require_http_methods(["GET"])
+@conditional_cache(_registrations_version, max_age=10, stale_while_revalidate=30, private=True)
+def get_registrations_api(request):
+    """JSON API endpoint to fetch registrations for admin panel.
+
+    Supports ``event``, ``course`` and ``branch`` filters. With ``limit`` (and
+    optionally ``cursor``) it returns one keyset page as
+    ``{"results": [...], "next_cursor": ...}``; otherwise the whole filtered
+    list is streamed as a JSON array straight from a server-side iterator.
+    """
+    registrations = _admin_filtered_registrations(request)
+
+    if 'limit' in request.GET or 'cursor' in request.GET:
+        try:
+            limit = int(request.GET.get('limit', REGISTRATIONS_PAGE_SIZE))
+        except ValueError:
+            return JsonResponse({'error': 'limit must be an integer.'}, status=400)
+        limit = max(1, min(limit, REGISTRATIONS_MAX_PAGE_SIZE))
+
+        if request.GET.get('cursor'):
+            try:
+                last_ts, last_id = _decode_cursor(request.GET['cursor'])
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
+            registrations = registrations.filter(
+                Q(timestamp__lt=last_ts) | Q(timestamp=last_ts, id__lt=last_id)
+            )
 
-    for reg in registrations_list:
-        reg['timestamp']   = reg['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
-        reg['event__date'] = reg['event__date'].strftime('%Y-%m-%d')
-        # Generate a professional looking ticket ID for the scanner
-        reg['ticket_id'] = f"TKT-{reg['event__id']:03d}-{reg['id']:04d}"
+        # One extra row tells us whether another page exists
+        page = list(registrations.values(*REGISTRATION_API_FIELDS)[:limit + 1])
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = _encode_cursor(page[-1]['timestamp'], page[-1]['id'])
 
-    response = JsonResponse(registrations_list, safe=False)
+        response = JsonResponse({
+            'results': [_serialize_registration(reg) for reg in page],
+            'next_cursor': next_cursor,
+        })
+    else:
+        rows = registrations.values(*REGISTRATION_API_FIELDS).iterator(
+            chunk_size=REGISTRATIONS_STREAM_CHUNK
+        )
+        response = StreamingHttpResponse(
+            _stream_json_array(_serialize_registration(reg) for reg in rows),
+            content_type='application/json',
+        )
+    return response
+
+
+@read_replica
+@user_passes_test(is_admin)
+@require_http_methods(["GET"])
+def export_registrations_api(request):
+    """Stream registrations as CSV or XLSX, grouped per event.
+
+    Takes the same ``event``/``course``/``branch`` filters as
+    get_registrations_api plus ``format`` (``csv`` or ``xlsx``).
+    """
+    fmt = request.GET.get('format', 'xlsx')
+    if fmt not in exports.CONTENT_TYPES:
+        return JsonResponse({'error': 'format must be csv or xlsx.'}, status=400)
+
+    registrations = _admin_filtered_registrations(request)
+    response = StreamingHttpResponse(
+        exports.stream_export(registrations, fmt),
+        content_type=exports.CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="event_registrations.{fmt}"'
     response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response['Pragma'] = 'no-cache'
-    response['Expires'] = '0'
     return response
 
 
+CHECKIN_BATCH_LIMIT = 5000
+
+
+@login_required
+@require_http_methods(["POST"])
+@user_passes_test(is_admin, login_url="/admin-login/")
+def checkin_api(request):
+    """Admit one scanned ticket at a gate. Repeating a scan is harmless."""
+    try:
+        data = json.loads(request.body)
+        result = checkin.check_in(
+            data['ticket_id'], gate=data.get('gate', ''), scanned_at=data.get('scanned_at'),
+        )
+    except (ValueError, KeyError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    status = 404 if result['status'] == checkin.INVALID else 200
+    return JsonResponse({'success': status == 200, **result}, status=status)
+
+
+@login_required
+@require_http_methods(["POST"])
+@user_passes_test(is_admin, login_url="/admin-login/")
+def checkin_batch_api(request):
+    """Upload scans queued by a scanner while it was offline."""
+    try:
+        data = json.loads(request.body)
+        scans = data['scans']
+    except (ValueError, KeyError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    if not isinstance(scans, list) or len(scans) > CHECKIN_BATCH_LIMIT:
+        return JsonResponse({
+            'success': False, 'error': f'scans must be a list of at most {CHECKIN_BATCH_LIMIT} items.',
+        }, status=400)
+
+    results = checkin.check_in_batch(scans, default_gate=data.get('gate', ''))
+    return JsonResponse({'success': True, 'results': results})
+
+
+@login_required
+@require_http_methods(["GET"])
+@user_passes_test(is_admin, login_url="/admin-login/")
+def scanner_keys_api(request):
+    """Keys that let a gate scanner verify today's and upcoming tickets while offline."""
+    event_ids = Event.objects.filter(date__gte=datetime.date.today()).values_list('id', flat=True)
+    response = JsonResponse({'salt': tickets.SALT, 'keys': tickets.scanner_keys(event_ids)})
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+TICKET_QR_MAX_AGE = 365 * 24 * 3600
+
+
+@require_http_methods(["GET"])
+def ticket_qr(request, token):
+    """QR code PNG for a signed ticket token. The token is the credential: no session or database needed."""
+    if tickets.verify(token) is None:
+        return HttpResponse('Unknown ticket', status=404, content_type='text/plain')
+    # A token's image never changes, so its hash is a permanent ETag
+    etag = f'"{tickets.qr_digest(token)}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(tickets.qr_png(token), content_type='image/png')
+    response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={TICKET_QR_MAX_AGE}, immutable'
+    return response
+
+
+@require_http_methods(["GET"])
+def metrics_api(request):
+    """Request metrics in Prometheus text format, for admins or a scraper sending METRICS_TOKEN."""
+    token = settings.METRICS_TOKEN
+    bearer = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not (is_admin(request.user) or (token and secrets.compare_digest(bearer, token))):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # ══════════════════════════════════════════════════════════════
 # STUDENT ACCOUNT VIEWS
 # ══════════════════════════════════════════════════════════════
@@ -357,6 +683,29 @@ def student_logout_view(request):
     return redirect('homepage')
 
 
+DASHBOARD_HISTORY_PAGE = 10
+
+
+def _registration_history(user, today, after=None, limit=DASHBOARD_HISTORY_PAGE):
+    """One page of the user's registrations for past events, latest event first.
+
+    Returns ``(registrations, next_cursor)``; ``after`` is a decoded cursor.
+    """
+    history = Registration.objects.filter(
+        user=user, event__date__lt=today
+    ).select_related('event').order_by('-event__date', '-id')
+    if after is not None:
+        last_date, last_id = after
+        history = history.filter(Q(event__date__lt=last_date) | Q(event__date=last_date, id__lt=last_id))
+    page = list(history[:limit + 1])
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = _encode_cursor(page[-1].event.date, page[-1].id)
+    return page, next_cursor
+
+
+@read_replica
 @login_required(login_url='/accounts/login/')
 def student_dashboard(request):
     """Student profile + registered events dashboard."""
@@ -364,35 +713,35 @@ def student_dashboard(request):
         user=request.user,
         defaults={'avatar_color': random.choice(AVATAR_COLORS)}
     )
-    my_registrations = Registration.objects.filter(
-        user=request.user
-    ).select_related('event').order_by('-timestamp')
-
     today = datetime.date.today()
-    upcoming = []
-    completed = []
-
-    for r in my_registrations:
-        if isinstance(r.event.date, str):
-            try:
-                 ev_date = datetime.datetime.strptime(r.event.date, "%Y-%m-%d").date()
-            except ValueError:
-                 ev_date = r.event.date
-        else:
-            ev_date = r.event.date
-
-        if ev_date >= today:
-            r.days_remaining = (ev_date - today).days
-            upcoming.append(r)
-        else:
-            completed.append(r)
-
+    my_registrations = Registration.objects.filter(user=request.user)
+    counts = my_registrations.aggregate(
+        total=Count('id'),
+        upcoming=Count('id', filter=Q(event__date__gte=today)),
+        completed=Count('id', filter=Q(event__date__lt=today)),
+    )
+    # days_remaining is a timedelta computed by the database
+    upcoming = list(my_registrations.filter(event__date__gte=today).select_related('event').annotate(
+        days_remaining=F('event__date') - Value(today, output_field=DateField())
+    ).order_by('-timestamp')) if counts['upcoming'] else []
+    for reg in upcoming:
+        reg.ticket_id = format_ticket_id(reg.event_id, reg.id)
+        reg.ticket_token = tickets.sign(reg.event_id, reg.id)
+    completed, next_cursor = _registration_history(request.user, today) if counts['completed'] else ([], None)
+
+    waitlisted = list(WaitlistEntry.objects.filter(
+        user=request.user, status=WaitlistEntry.WAITING
+    ).select_related('event'))
+    for entry, position in zip(waitlisted, waitlist.positions(waitlisted)):
+        entry.position = position
 
     return render(request, 'events/student_dashboard.html', {
-        'profile':   profile,
-        'upcoming':  upcoming,
-        'completed': completed,
-        'total':     my_registrations.count(),
+        'profile':        profile,
+        'upcoming':       upcoming,
+        'completed':      completed,
+        'history_cursor': next_cursor,
+        'waitlist':       waitlisted,
+        'counts':         counts,
     })
 
 
@@ -421,19 +770,9 @@ def student_update_profile(request):
     return redirect('student_dashboard')
 
 
-@require_http_methods(["GET"])
-def student_profile_api(request):
-    """Return logged-in student profile as JSON — used to auto-fill registration modal."""
-    if not request.user.is_authenticated:
-        return JsonResponse({'authenticated': False})
-
-    user = request.user
-    try:
-        profile = user.student_profile
-    except StudentProfile.DoesNotExist:
-        profile = None
-
-    return JsonResponse({
+def _profile_payload(user, profile):
+    """Registration-form autofill data for a signed-in user (profile may be None)."""
+    return {
         'authenticated': True,
         'name':   user.get_full_name() or user.username,
         'email':  user.email,
@@ -441,18 +780,32 @@ def student_profile_api(request):
         'course': profile.course if profile else '',
         'branch': profile.branch if profile else '',
         'year':   profile.year   if profile else '',
-    })
+    }
 
 
+@read_replica
 @require_http_methods(["GET"])
-def api_check_registration(request):
+async def student_profile_api(request):
+    """Return logged-in student profile as JSON — used to auto-fill registration modal."""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'authenticated': False})
+
+    profile = await StudentProfile.objects.filter(user=user).afirst()
+    return JsonResponse(_profile_payload(user, profile))
+
+
+@read_replica
+@require_http_methods(["GET"])
+async def api_check_registration(request):
     """Check if the logged-in user is already registered for an event."""
     event_id = request.GET.get('event_id')
-    if not request.user.is_authenticated or not event_id:
+    user = await request.auser()
+    if not user.is_authenticated or not event_id:
         return JsonResponse({'registered': False})
-    registered = Registration.objects.filter(
-        event_id=event_id, user=request.user
-    ).exists()
+    registered = await Registration.objects.filter(
+        event_id=event_id, user=user
+    ).aexists()
     return JsonResponse({'registered': registered})
 
 
@@ -502,27 +855,108 @@ def cancel_registration(request, reg_id):
         messages.error(request, 'Cannot cancel registration for a completed event.')
     else:
         event_name = reg.event.name
-        reg.delete()
+        with transaction.atomic():
+            reg.delete()
+            # The freed seat goes to the front of the waitlist, or nobody
+            waitlist.promote(reg.event_id)
         messages.success(request, f'Registration for {event_name} has been cancelled. ❌')
         
     return redirect('student_dashboard')
 
 
+@require_http_methods(["GET"])
+def registration_status_api(request, token):
+    """Final outcome of a queued registration: queued, accepted, waitlisted, duplicate or rejected."""
+    result = ingest.status(token)
+    if result is None:
+        return JsonResponse({'success': False, 'error': 'Unknown registration token.'}, status=404)
+    if 'ticket_token' in result:
+        result['qr_url'] = reverse('ticket_qr', args=[result['ticket_token']])
+    return JsonResponse(result)
+
+
 @login_required(login_url='/accounts/login/')
-def api_my_registrations(request):
+@require_http_methods(["POST"])
+def leave_waitlist(request, entry_id):
+    """Withdraw from an event's waitlist."""
+    entry = get_object_or_404(WaitlistEntry, id=entry_id, user=request.user, status=WaitlistEntry.WAITING)
+    waitlist.withdraw(entry)
+    messages.success(request, f'You have left the waitlist for {entry.event.name}.')
+    return redirect('student_dashboard')
+
+
+MY_REGISTRATION_FIELDS = ('id', 'event_id', 'name', 'email', 'mobile', 'course', 'branch')
+
+
+@read_replica
+@login_required(login_url='/accounts/login/')
+async def api_my_registrations(request):
     """Return a detailed list of registrations for the current user."""
-    registrations = Registration.objects.filter(user=request.user)
+    user = await request.auser()
+    registrations = [
+        reg async for reg in Registration.objects.filter(user=user).values(*MY_REGISTRATION_FIELDS).aiterator()
+    ]
+    waitlisted = [
+        entry async for entry in WaitlistEntry.objects.filter(
+            user=user, status=WaitlistEntry.WAITING
+        ).select_related('event')
+    ]
     return JsonResponse({
-        'registered_event_ids': list(registrations.values_list('event_id', flat=True)),
-        'registrations': [
-            {
-                'id': reg.id,
-                'event_id': reg.event_id,
-                'name': reg.name,
-                'email': reg.email,
-                'mobile': reg.mobile,
-                'course': reg.course,
-                'branch': reg.branch
-            } for reg in registrations
-        ]
+        'registered_event_ids': [reg['event_id'] for reg in registrations],
+        'registrations': registrations,
+        'waitlist': [
+            {'id': entry.id, 'event_id': entry.event_id, 'position': position}
+            for entry, position in zip(waitlisted, await waitlist.apositions(waitlisted))
+        ],
     })
+
+
+@read_replica
+@login_required(login_url='/accounts/login/')
+@require_http_methods(["GET"])
+def api_registration_history(request):
+    """Later pages of the dashboard's "Events Attended" list (keyset cursor)."""
+    after = None
+    if request.GET.get('cursor'):
+        try:
+            last_date, last_id = _decode_cursor(request.GET['cursor'])
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        after = (last_date.date(), last_id)
+
+    page, next_cursor = _registration_history(request.user, datetime.date.today(), after=after)
+    return JsonResponse({
+        'results': [{
+            'id':           reg.id,
+            'event_id':     reg.event_id,
+            'event_name':   reg.event.name,
+            'date':         reg.event.date.isoformat(),
+            'date_display': format_date(reg.event.date),
+            'venue':        reg.event.venue,
+            'image_url':    reg.event.get_image_url,
+        } for reg in page],
+        'next_cursor': next_cursor,
+    })
+
+
+def _bootstrap_payload(user):
+    """Everything the events page needs on load: upcoming events and the user's registrations and profile."""
+    payload = {
+        'events':               [_serialize_event(event) for event in caching.public_events('upcoming')],
+        'registered_event_ids': [],
+        'registrations':        [],
+        'profile':              {'authenticated': False},
+    }
+    if user.is_authenticated:
+        registrations = list(Registration.objects.filter(user=user).values(*MY_REGISTRATION_FIELDS))
+        payload['registered_event_ids'] = [reg['event_id'] for reg in registrations]
+        payload['registrations'] = registrations
+        payload['profile'] = _profile_payload(user, StudentProfile.objects.filter(user=user).first())
+    return payload
+
+
+@read_replica
+@require_http_methods(["GET"])
+def bootstrap_api(request):
+    """The events page's load-time data in one request (the page itself embeds the same payload)."""
+    return JsonResponse(_bootstrap_payload(request.user))
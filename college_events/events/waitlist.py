@@ -0,0 +1,120 @@
+"""Per-event waitlist with in-order promotion.
+
+Joining hands out the next ``Event.waitlist_tail`` sequence number;
+promotion takes waiting entries off the front and advances
+``Event.waitlist_head``. A queue position is then arithmetic on those two
+counters minus the withdrawn entries still sitting between the head and the
+entry, counted on the ``(event, status, seq)`` index: the waiting entries
+themselves are never counted, however long the queue gets.
+
+Promotion must run in the transaction that freed the seats (after its
+write), so the event row is already locked when the free seats are read.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from . import notifications
+from .models import Event, Registration, WaitlistEntry
+
+REGISTRATION_FIELDS = ['name', 'email', 'mobile', 'course', 'branch']
+
+
+def join(event_id, **fields):
+    """Queue a student (``fields`` are WaitlistEntry fields); returns ``(entry, promoted)``.
+
+    ``promoted`` is True when a seat had already freed up and the entry went
+    straight through. Raises IntegrityError if the email is already waiting.
+    """
+    with transaction.atomic():
+        Event.objects.filter(pk=event_id).update(waitlist_tail=F('waitlist_tail') + 1)
+        seq = Event.objects.filter(pk=event_id).values_list('waitlist_tail', flat=True).get()
+        entry = WaitlistEntry.objects.create(event_id=event_id, seq=seq, **fields)
+        promoted = promote(event_id)
+    return entry, any(p.pk == entry.pk for p in promoted)
+
+
+def promote(event_id):
+    """Fill free seats from the front of the queue; returns the promoted entries.
+
+    Free seats are filled in one batch (a capacity increase can free many).
+    An entry whose email was registered some other way leaves the queue
+    without taking a seat, and the next one is tried instead.
+    """
+    promoted = []
+    with transaction.atomic():
+        event = Event.objects.select_for_update().get(pk=event_id)
+        while event.seats_left != 0:
+            waiting = WaitlistEntry.objects.filter(event_id=event_id, status=WaitlistEntry.WAITING).order_by('seq')
+            entries = list(waiting if event.capacity is None else waiting[:event.seats_left])
+            if not entries:
+                break
+            Registration.objects.bulk_create([
+                Registration(event_id=event_id, user_id=entry.user_id,
+                             **{field: getattr(entry, field) for field in REGISTRATION_FIELDS})
+                for entry in entries
+            ], ignore_conflicts=True)
+            # bulk_create sends no post_save, so the emails are queued here; a
+            # registration made some other way already has its job (same key)
+            notifications.queue_registration_confirmations(Registration.objects.filter(
+                event_id=event_id, email__in=[entry.email for entry in entries],
+            ).values_list('pk', flat=True))
+            head = entries[-1].seq
+            # Drops the promoted entries and any withdrawn ones the head has passed
+            WaitlistEntry.objects.filter(event_id=event_id, seq__lte=head).delete()
+            Event.objects.filter(pk=event_id).update(waitlist_head=head)
+            promoted.extend(entries)
+            event.refresh_from_db(fields=['capacity', 'registration_count'])
+    return promoted
+
+
+def withdraw(entry):
+    """Leave the queue; the row stays as a tombstone until the head passes it."""
+    return bool(WaitlistEntry.objects.filter(pk=entry.pk, status=WaitlistEntry.WAITING)
+                .update(status=WaitlistEntry.WITHDRAWN))
+
+
+def position(entry):
+    """1-based place in the queue.
+
+    Two index lookups; the only rows read are withdrawn tombstones ahead of
+    the entry, never the waiting entries.
+    """
+    head = Event.objects.filter(pk=entry.event_id).values_list('waitlist_head', flat=True).get()
+    withdrawn = WaitlistEntry.objects.filter(
+        event_id=entry.event_id, status=WaitlistEntry.WITHDRAWN, seq__gt=head, seq__lt=entry.seq,
+    ).count()
+    return entry.seq - head - withdrawn
+
+
+def _positions(entries, withdrawn_rows):
+    heads = {entry.event_id: entry.event.waitlist_head for entry in entries}
+    withdrawn = defaultdict(list)
+    for event_id, seq in withdrawn_rows:
+        withdrawn[event_id].append(seq)
+    return [
+        entry.seq - heads[entry.event_id]
+        - sum(heads[entry.event_id] < seq < entry.seq for seq in withdrawn[entry.event_id])
+        for entry in entries
+    ]
+
+
+def _withdrawn(entries):
+    return WaitlistEntry.objects.filter(
+        event_id__in={entry.event_id for entry in entries}, status=WaitlistEntry.WITHDRAWN,
+    ).values_list('event_id', 'seq')
+
+
+def positions(entries):
+    """position() for many entries in one query; each needs ``event`` loaded (select_related)."""
+    if not entries:
+        return []
+    return _positions(entries, list(_withdrawn(entries)))
+
+
+async def apositions(entries):
+    """Async positions()."""
+    if not entries:
+        return []
+    return _positions(entries, [row async for row in _withdrawn(entries)])
@@ -40,10 +40,12 @@ function showSection(sectionName, element = null) {
 // ── Data Loading & API Calls ──
 async function loadEvents() {
     try {
-        const response = await fetch('/api/events/');
+        // Always revalidate: a 304 is cheap and edits must show up immediately
+        const response = await fetch('/api/events/', { cache: 'no-cache' });
         if (response.ok) {
             events = await response.json();
             renderEventsTable();
+            renderEventFilter();
             updateStatsCounts();
         }
     } catch (error) {
@@ -51,23 +53,54 @@ async function loadEvents() {
     }
 }
 
-async function loadRegistrations() {
+const REGISTRATIONS_PAGE_SIZE = 200;
+
+// Filters sent with every registrations request (event / course / branch)
+let registrationFilters = {};
+let registrationsCursor = null;
+
+// One keyset page of /api/registrations/ at a time: the first page replaces
+// the list, "Load more" appends the next one using the cursor the API returned.
+async function loadRegistrations(filters = registrationFilters, append = false) {
+    registrationFilters = filters;
+    const params = new URLSearchParams({ ...filters, limit: REGISTRATIONS_PAGE_SIZE });
+    if (append && registrationsCursor) params.set('cursor', registrationsCursor);
     try {
-        const response = await fetch('/api/registrations/');
-        if (response.ok) {
-            const data = await response.json();
-            registrations = data;
-            window.registrations = data;
-            renderRegistrationsSection();
-            renderRecentActivity();
-            updateStatsCounts();
-            updateNotifBadge();
-        }
+        const response = await fetch(`/api/registrations/?${params}`, { cache: 'no-cache' });
+        if (!response.ok) return;
+        const page = await response.json();
+        registrations = append ? registrations.concat(page.results) : page.results;
+        window.registrations = registrations;
+        registrationsCursor = page.next_cursor;
+        renderRegistrationsSection();
+        renderRecentActivity();
+        updateStatsCounts();
+        updateNotifBadge();
     } catch (error) {
         console.error('Registrations load error:', error);
     }
 }
 
+function loadMoreRegistrations() {
+    return loadRegistrations(registrationFilters, true);
+}
+
+// The event filter applies to the pages and to a topbar search that is showing
+async function filterRegistrationsByEvent(eventId) {
+    await loadRegistrations(eventId ? { event: eventId } : {});
+    const search = document.getElementById('adminSearch');
+    if (search && search.value.trim()) await searchRegistrations(search.value.trim());
+}
+
+function renderEventFilter() {
+    const select = document.getElementById('registrationEventFilter');
+    if (!select) return;
+    const current = registrationFilters.event || '';
+    select.innerHTML = '<option value="">All events</option>' + events.map(event =>
+        `<option value="${event.id}" ${String(event.id) === String(current) ? 'selected' : ''}>${event.name}</option>`
+    ).join('');
+}
+
 async function refreshRegistrations() {
     await loadRegistrations();
     await loadEvents();
@@ -79,7 +112,8 @@ function updateStatsCounts() {
     const regCount = document.getElementById('count-registrations');
 
     if (evCount) evCount.textContent = events.length;
-    if (regCount) regCount.textContent = registrations.length;
+    // Only a page of registrations is loaded; the events carry the real totals
+    if (regCount) regCount.textContent = events.reduce((sum, event) => sum + event.registration_count, 0);
 }
 
 // ── Rendering Functions ──
@@ -88,7 +122,7 @@ function renderEventsTable() {
     if (!tableBody) return;
 
     tableBody.innerHTML = events.map(event => {
-        const regCount = registrations.filter(r => r.event__id === event.id).length;
+        const regCount = event.registration_count;
         return `
             <tr>
                 <td>
@@ -103,7 +137,7 @@ function renderEventsTable() {
                 </td>
                 <td>
                     <span class="badge badge-pill" style="background:#6366f115;color:#6366f1;padding:6px 14px;font-weight:700;">
-                        ${regCount} Registered
+                        ${regCount}${event.capacity != null ? ' / ' + event.capacity : ''} Registered
                     </span>
                 </td>
                 <td>
@@ -146,13 +180,23 @@ function renderRecentActivity() {
     `).join('') : '<tr><td colspan="4" class="text-center p-4">No recent activity</td></tr>';
 }
 
-function renderRegistrationsSection() {
+// Registrations for an event in total, not just in the pages loaded so far
+function groupTotal(eventId, loaded) {
+    const event = events.find(e => String(e.id) === String(eventId));
+    return event ? event.registration_count : loaded;
+}
+
+// `list` defaults to the loaded pages; the topbar search passes its matches
+// (and `more` = false, as a search returns a single page)
+function renderRegistrationsSection(list = registrations, more = Boolean(registrationsCursor)) {
     const eventTabs = document.getElementById('eventTabs');
     const eventTabContent = document.getElementById('eventTabContent');
     if (!eventTabs || !eventTabContent) return;
+    const loadMore = document.getElementById('loadMoreRegistrations');
+    if (loadMore) loadMore.classList.toggle('d-none', !more);
 
     // Group by Event
-    const groups = registrations.reduce((acc, reg) => {
+    const groups = list.reduce((acc, reg) => {
         const eid = reg.event__id;
         if (!acc[eid]) acc[eid] = { name: reg.event__name, list: [] };
         acc[eid].list.push(reg);
@@ -170,7 +214,7 @@ function renderRegistrationsSection() {
     eventTabs.innerHTML = eventIds.map((eid, idx) => `
         <li class="nav-item">
             <a class="nav-link ${idx === 0 ? 'active' : ''}" id="tab-${eid}" data-toggle="pill" href="#tab-content-${eid}">
-                ${groups[eid].name} (${groups[eid].list.length})
+                ${groups[eid].name} (${groupTotal(eid, groups[eid].list.length)})
             </a>
         </li>
     `).join('');
@@ -204,6 +248,28 @@ function renderRegistrationsSection() {
     `).join('');
 }
 
+// ── Topbar search: registrations by name, email, mobile or ticket id ──
+let registrationSearchSeq = 0;
+
+async function searchRegistrations(q) {
+    const seq = ++registrationSearchSeq;
+    if (!q) {
+        renderRegistrationsSection();
+        return;
+    }
+    try {
+        const params = new URLSearchParams({ ...registrationFilters, q });
+        const response = await fetch(`/api/registrations/search/?${params}`);
+        if (!response.ok) return;
+        const data = await response.json();
+        if (seq !== registrationSearchSeq) return;   // a newer keystroke has taken over
+        showSection('registrations');
+        renderRegistrationsSection(data.results, false);
+    } catch (error) {
+        console.error('Registration search error:', error);
+    }
+}
+
 // ── CRUD Operations ──
 function showEventModal(eventId = null) {
     const form = document.getElementById('eventForm');
@@ -220,6 +286,7 @@ function showEventModal(eventId = null) {
             document.getElementById('eventDescription').value = ev.description;
             document.getElementById('eventDate').value = ev.date;
             document.getElementById('eventImage').value = ev.image || '';
+            document.getElementById('eventCapacity').value = ev.capacity ?? '';
         }
     } else {
         title.textContent = 'Create New Event';
@@ -239,7 +306,8 @@ async function saveEvent() {
         venue: document.getElementById('eventVenue').value,
         description: document.getElementById('eventDescription').value,
         date: document.getElementById('eventDate').value,
-        image: document.getElementById('eventImage').value
+        image: document.getElementById('eventImage').value,
+        capacity: document.getElementById('eventCapacity').value
     };
 
     const url = id ? `/api/events/${id}/update/` : '/api/events/create/';
@@ -312,25 +380,127 @@ async function stopActiveScanner() {
     }
 }
 
-function onScanSuccess(ticketId) {
-    // Search in the live registrations array
-    const registration = registrations.find(r => r.ticket_id === ticketId);
+// Each scanner device keeps a stable gate id so the server can tell gates apart
+function getGateId() {
+    let gate = localStorage.getItem('scannerGate');
+    if (!gate) {
+        gate = 'gate-' + Math.random().toString(36).slice(2, 8);
+        localStorage.setItem('scannerGate', gate);
+    }
+    return gate;
+}
+
+// Scans that could not reach the server wait here until we are back online
+function getPendingScans() {
+    return JSON.parse(localStorage.getItem('pendingScans') || '[]');
+}
+
+function setPendingScans(scans) {
+    localStorage.setItem('pendingScans', JSON.stringify(scans));
+}
+
+async function flushPendingScans() {
+    const pending = getPendingScans();
+    if (!pending.length || !navigator.onLine) return;
+    try {
+        const res = await fetch('/api/checkin/batch/', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'X-CSRFToken': getCSRFToken() },
+            body: JSON.stringify({ gate: getGateId(), scans: pending })
+        });
+        if (res.ok) setPendingScans(getPendingScans().slice(pending.length));
+    } catch (e) { /* still offline — keep the queue */ }
+}
+
+// Per-event keys for checking ticket signatures offline (see events/tickets.py)
+async function loadScannerKeys() {
+    if (!navigator.onLine) return;
+    try {
+        const res = await fetch('/api/checkin/keys/');
+        if (res.ok) localStorage.setItem('scannerKeys', JSON.stringify(await res.json()));
+    } catch (e) { /* keep the keys we have */ }
+}
+
+function base64url(bytes) {
+    return btoa(String.fromCharCode(...bytes)).replace(/\+/g, '-').replace(/\//g, '_').replace(/=+$/, '');
+}
+
+// true / false for a genuine / forged token; null when this device can't tell
+async function verifyTicketOffline(token) {
+    const stored = JSON.parse(localStorage.getItem('scannerKeys') || 'null');
+    const match = /^(TKT-(\d+)-\d+):([\w-]+)$/.exec(token);
+    if (!match) return false;
+    const key = stored && stored.keys[String(parseInt(match[2], 10))];
+    if (!key || !window.crypto || !crypto.subtle) return null;
+
+    const enc = new TextEncoder();
+    const hmacKey = await crypto.subtle.importKey(
+        'raw', await crypto.subtle.digest('SHA-256', enc.encode(stored.salt + 'signer' + key)),
+        { name: 'HMAC', hash: 'SHA-256' }, false, ['sign']
+    );
+    const mac = await crypto.subtle.sign('HMAC', hmacKey, enc.encode(match[1]));
+    return base64url(new Uint8Array(mac)) === match[3];
+}
+
+let lastScan = { ticketId: null, at: 0 };
+
+async function onScanSuccess(ticketId) {
+    // The camera reports the same code many times a second; only act once
+    const now = Date.now();
+    if (ticketId === lastScan.ticketId && now - lastScan.at < 3000) return;
+    lastScan = { ticketId, at: now };
+
+    const scan = { ticket_id: ticketId, gate: getGateId(), scanned_at: new Date().toISOString() };
+    let result;
+    try {
+        const res = await fetch('/api/checkin/', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'X-CSRFToken': getCSRFToken() },
+            body: JSON.stringify(scan)
+        });
+        result = await res.json();
+    } catch (e) {
+        // Offline: forged passes are turned away now, genuine ones admitted on sync
+        const plainId = ticketId.split(':')[0];
+        if (await verifyTicketOffline(ticketId) === false) {
+            result = { status: 'invalid', ticket_id: plainId };
+        } else {
+            setPendingScans([...getPendingScans(), scan]);
+            result = { status: 'queued', ticket_id: plainId };
+        }
+    }
+    renderScanResult(result);
+}
+
+function renderScanResult(result) {
     const resultDiv = document.getElementById('scanResult');
     resultDiv.classList.remove('d-none');
+    const ticketId = result.ticket_id;
 
-    if (registration) {
-        resultDiv.className = 'scan-result-overlay result-valid';
+    if (result.status === 'checked_in' || result.status === 'already_checked_in') {
+        const first = result.status === 'checked_in';
+        resultDiv.className = 'scan-result-overlay ' + (first ? 'result-valid' : 'result-invalid');
         resultDiv.innerHTML = `
             <div class="d-flex align-items-center mb-3">
-                <i class="fas fa-circle-check mr-2 text-success" style="font-size:24px;"></i>
-                <h4 class="m-0 text-success">Valid Ticket</h4>
+                <i class="fas ${first ? 'fa-circle-check text-success' : 'fa-triangle-exclamation text-warning'} mr-2" style="font-size:24px;"></i>
+                <h4 class="m-0 ${first ? 'text-success' : 'text-warning'}">${first ? 'Valid Ticket' : 'Already Checked In'}</h4>
             </div>
             <div class="row">
-                <div class="col-6 mb-2"><small class="text-muted d-block uppercase">Attendee</small><strong>${registration.name}</strong></div>
-                <div class="col-6 mb-2"><small class="text-muted d-block uppercase">Event</small><strong>${registration.event__name}</strong></div>
+                <div class="col-6 mb-2"><small class="text-muted d-block uppercase">Attendee</small><strong>${result.name}</strong></div>
+                <div class="col-6 mb-2"><small class="text-muted d-block uppercase">Event</small><strong>${result.event}</strong></div>
                 <div class="col-12"><small class="text-muted d-block uppercase">Ticket ID</small><strong>${ticketId}</strong></div>
+                ${first ? '' : `<div class="col-12 mt-2"><small class="text-muted">First scanned at ${result.gate || 'a gate'} · ${new Date(result.scanned_at).toLocaleTimeString()}</small></div>`}
             </div>
         `;
+    } else if (result.status === 'queued') {
+        resultDiv.className = 'scan-result-overlay result-valid';
+        resultDiv.innerHTML = `
+            <div class="d-flex align-items-center mb-2">
+                <i class="fas fa-cloud-arrow-up mr-2 text-muted" style="font-size:24px;"></i>
+                <h4 class="m-0 text-muted">Saved Offline</h4>
+            </div>
+            <p class="mb-0 text-muted">Scan of <code>${ticketId}</code> will sync when the connection returns.</p>
+        `;
     } else {
         resultDiv.className = 'scan-result-overlay result-invalid';
         resultDiv.innerHTML = `
@@ -338,15 +508,19 @@ function onScanSuccess(ticketId) {
                 <i class="fas fa-circle-xmark mr-2 text-danger" style="font-size:24px;"></i>
                 <h4 class="m-0 text-danger">Invalid Ticket</h4>
             </div>
-            <p class="mb-0 text-muted">No registration found for ID: <code>${ticketId}</code></p>
+            <p class="mb-0 text-muted">Unknown or forged ticket: <code>${ticketId}</code></p>
         `;
     }
 }
 
+window.addEventListener('online', () => { flushPendingScans(); loadScannerKeys(); });
+
 // ── Initializers ──
 document.addEventListener('DOMContentLoaded', () => {
     loadRegistrations();
     loadEvents();
+    flushPendingScans();
+    loadScannerKeys();
 
     // Sidebar Toggle for Mobile
     const toggle = document.getElementById('sidebarToggle');
@@ -356,6 +530,17 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Registration search, debounced
+    const adminSearch = document.getElementById('adminSearch');
+    if (adminSearch) {
+        let searchTimer = null;
+        adminSearch.addEventListener('input', function () {
+            clearTimeout(searchTimer);
+            const q = this.value.trim();
+            searchTimer = setTimeout(() => searchRegistrations(q), 200);
+        });
+    }
+
     // Modal cleanup on hidden
     $('#eventModal').on('hidden.bs.modal', function () {
         document.getElementById('eventForm').reset();
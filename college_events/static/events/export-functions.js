@@ -1,46 +1,18 @@
 // Export functions for admin panel
-// These functions use the global 'registrations' array loaded by admin-script.js
+// Excel/CSV exports are streamed by the server; the PDF report still uses the
+// global 'registrations' array loaded by admin-script.js
 
-function exportToExcel() {
-    if (!window.registrations || registrations.length === 0) {
-        alert('No registrations to export.');
-        return;
-    }
+function downloadRegistrationsExport(format, filters = {}) {
+    const params = new URLSearchParams({ ...filters, format });
+    window.location.href = `/api/registrations/export/?${params}`;
+}
 
-    // Group registrations by event
-    const groupedRegistrations = {};
-    registrations.forEach(reg => {
-        const eventName = reg.event__name;
-        if (!groupedRegistrations[eventName]) {
-            groupedRegistrations[eventName] = [];
-        }
-        groupedRegistrations[eventName].push(reg);
-    });
-
-    const wb = XLSX.utils.book_new();
-
-    Object.entries(groupedRegistrations).forEach(([eventName, eventRegistrations]) => {
-        const wsData = eventRegistrations.map(reg => ({
-            'Ticket ID': reg.ticket_id,
-            'Student Name': reg.name,
-            'Email': reg.email,
-            'Course': reg.course,
-            'Branch': reg.branch,
-            'Mobile': reg.mobile,
-            'Registration Date': reg.timestamp,
-            'Event': reg.event__name,
-            'Event Date': reg.event__date,
-            'Venue': reg.event__venue
-        }));
-
-        const ws = XLSX.utils.json_to_sheet(wsData);
-
-        // Truncate sheet name to 31 characters (Excel limit)
-        const sheetName = eventName.substring(0, 31);
-        XLSX.utils.book_append_sheet(wb, ws, sheetName);
-    });
-
-    XLSX.writeFile(wb, 'event_registrations.xlsx');
+function exportToExcel(filters = {}) {
+    downloadRegistrationsExport('xlsx', filters);
+}
+
+function exportToCSV(filters = {}) {
+    downloadRegistrationsExport('csv', filters);
 }
 
 function exportToPDF() {
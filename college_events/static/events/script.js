@@ -15,8 +15,25 @@ function getCSRFToken() {
 }
 
 let _allEvents = []; // Global cache for events
+let _bootstrap = null;
+
+// Upcoming events plus the user's registrations and profile. The events page
+// embeds them; refresh (after an edit) or any other page fetches /api/bootstrap/.
+function getBootstrap(refresh = false) {
+    if (_bootstrap && !refresh) return _bootstrap;
+    const embedded = document.getElementById('events-bootstrap');
+    if (embedded && !refresh) {
+        _bootstrap = Promise.resolve(JSON.parse(embedded.textContent));
+    } else {
+        _bootstrap = fetch('/api/bootstrap/', { cache: 'no-store' }).then(function (r) {
+            if (!r.ok) throw new Error('Bootstrap request failed: ' + r.status);
+            return r.json();
+        });
+    }
+    return _bootstrap;
+}
 
-async function loadEvents() {
+async function loadEvents(refresh = false) {
     const eventList = document.getElementById('event-list');
     const noEvents = document.getElementById('no-events');
     if (!eventList) return;
@@ -29,23 +46,12 @@ async function loadEvents() {
     window.myRegistrations = [];
 
     try {
-        // Load upcoming events
-        const response = await fetch('/api/events/?filter=upcoming');
-        if (response.ok) {
-            const data = await response.json();
-            events = data;
-            window._allEvents = data;
-        }
-
-        // Load current user's registrations if logged in
-        if (window.userLoggedIn) {
-            const regResponse = await fetch('/api/user/registrations/');
-            if (regResponse.ok) {
-                const regData = await regResponse.json();
-                registeredEventIds = regData.registered_event_ids || [];
-                window.myRegistrations = regData.registrations || [];
-            }
-        }
+        // Upcoming events and the current user's registrations, in one payload
+        const data = await getBootstrap(refresh);
+        events = data.events;
+        window._allEvents = data.events;
+        registeredEventIds = data.registered_event_ids;
+        window.myRegistrations = data.registrations;
     } catch (error) {
         console.warn('Error loading data from API:', error);
     }
@@ -63,6 +69,7 @@ async function loadEvents() {
         var registration = isRegistered ? window.myRegistrations.find(r => r.event_id === event.id) : null;
 
         var card = '<div class="col-md-4 mb-5 event-item"'
+            + ' data-event-id="' + event.id + '"'
             + ' data-name="' + event.name.toLowerCase() + '"'
             + ' data-venue="' + event.venue.toLowerCase() + '"'
             + ' data-aos="fade-up" data-aos-delay="' + ((index % 3) * 100) + '">'
@@ -95,6 +102,10 @@ async function loadEvents() {
             + '<div class="detail-item"><i class="fas fa-calendar-alt"></i> <span>' + formatDate(event.date) + '</span></div>'
             + (event.time ? '<div class="detail-item"><i class="fas fa-clock"></i> <span>' + formatTime(event.time) + '</span></div>' : '')
             + '<div class="detail-item"><i class="fas fa-map-marker-alt"></i> <span>' + event.venue + '</span></div>'
+            + (event.capacity != null
+                ? '<div class="detail-item"><i class="fas fa-chair"></i> <span>'
+                  + Math.max(event.capacity - event.registration_count, 0) + ' seats left</span></div>'
+                : '')
             + '</div>'
 
             // Primary Action
@@ -143,21 +154,65 @@ async function loadEvents() {
     // Re-initialise AOS for dynamically added cards
     if (window.AOS) AOS.refresh();
 
-    // Live search filtering
+    // Live search: ranked server-side matches (names, venues and descriptions)
     const searchInput = document.getElementById('eventSearch');
-    if (searchInput) {
+    if (searchInput && !searchInput.dataset.wired) {
+        searchInput.dataset.wired = '1';
+        let searchTimer = null;
         searchInput.addEventListener('input', function () {
-            const q = this.value.toLowerCase();
-            document.querySelectorAll('.event-item').forEach(item => {
-                const match = item.dataset.name.includes(q) || item.dataset.venue.includes(q);
-                item.style.display = match ? '' : 'none';
-            });
-            const visible = document.querySelectorAll('.event-item[style=""]');
-            if (noEvents) noEvents.style.display = visible.length === 0 ? 'block' : 'none';
+            clearTimeout(searchTimer);
+            const q = this.value.trim();
+            searchTimer = setTimeout(() => filterEvents(q), 150);
         });
     }
 }
 
+let _searchSeq = 0;
+const SEARCH_PAGE_LIMIT = 100;   // search.SEARCH_MAX_PAGE_SIZE
+
+async function filterEvents(q) {
+    const eventList = document.getElementById('event-list');
+    const noEvents = document.getElementById('no-events');
+    const items = Array.from(document.querySelectorAll('.event-item'));
+    const seq = ++_searchSeq;
+
+    let ranked = null;   // event ids, best match first; null = show everything
+    if (q) {
+        try {
+            // Follow next_page until the results run out (pages keep the rank order)
+            const matches = [];
+            let page = 1;
+            while (page) {
+                const params = new URLSearchParams({ q: q, filter: 'upcoming', limit: SEARCH_PAGE_LIMIT, page: page });
+                const response = await fetch(`/api/events/search/?${params}`);
+                if (!response.ok) throw new Error('Search failed: ' + response.status);
+                const data = await response.json();
+                if (seq !== _searchSeq) return;   // a newer keystroke has taken over
+                matches.push(...data.results.map(event => String(event.id)));
+                page = data.next_page;
+            }
+            ranked = matches;
+        } catch (error) {
+            // Offline or server error: match what is already on the page
+            const needle = q.toLowerCase();
+            ranked = items.filter(item => item.dataset.name.includes(needle) || item.dataset.venue.includes(needle))
+                .map(item => item.dataset.eventId);
+        }
+        if (seq !== _searchSeq) return;   // a newer keystroke has taken over
+    }
+
+    items.forEach(item => {
+        item.style.display = ranked === null || ranked.includes(item.dataset.eventId) ? '' : 'none';
+    });
+    if (ranked !== null) {
+        ranked.forEach(id => {
+            const item = eventList.querySelector(`.event-item[data-event-id="${id}"]`);
+            if (item) eventList.appendChild(item);
+        });
+    }
+    if (noEvents) noEvents.style.display = ranked !== null && ranked.length === 0 ? 'block' : 'none';
+}
+
 
 function formatDate(dateStr) {
     const options = { year: 'numeric', month: 'long', day: 'numeric' };
@@ -266,7 +321,18 @@ async function submitRegistration(event) {
         console.log('Response OK:', response.ok);
         console.log('Response redirected:', response.redirected);
 
-        if (response.ok || response.redirected) {
+        if (response.status === 202) {
+            // Event is full (waitlisted), or the registration was queued for the writer
+            const data = await response.json();
+            $('#registrationModal').modal('hide');
+            Swal.fire({
+                icon: 'info',
+                title: data.queued ? 'Registration Received' : 'Added to Waitlist',
+                text: data.message,
+                confirmButtonColor: '#007bff'
+            });
+            if (data.queued) waitForConfirmation(data.status_url);
+        } else if (response.ok || response.redirected) {
             // Registration successful
             $('#registrationModal').modal('hide');
 
@@ -280,6 +346,10 @@ async function submitRegistration(event) {
                 // Reload page to show updated registration count
                 window.location.reload();
             });
+        } else if (response.status === 409) {
+            // Duplicate registration or the event just filled up
+            const data = await response.json();
+            throw new Error(data.error);
         } else {
             const text = await response.text();
             console.error('Registration failed. Response:', text);
@@ -298,6 +368,26 @@ async function submitRegistration(event) {
     }
 }
 
+// Poll a queued registration until the writer has decided it
+async function waitForConfirmation(statusUrl, attempts = 30) {
+    for (let i = 0; i < attempts; i++) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const res = await fetch(statusUrl, { cache: 'no-store' });
+        if (!res.ok) return;
+        const result = await res.json();
+        if (result.status === 'queued') continue;
+
+        const outcomes = {
+            accepted: ['success', 'Registration Confirmed!', 'Your ticket is ' + result.ticket_id + '.'],
+            waitlisted: ['info', 'Added to Waitlist', 'This event is full. You are #' + result.position + ' on the waitlist.'],
+        };
+        const [icon, title, text] = outcomes[result.status] || ['error', 'Registration Not Accepted', result.error];
+        Swal.fire({ icon, title, text, confirmButtonColor: '#007bff' })
+            .then(() => { if (result.status === 'accepted') window.location.reload(); });
+        return;
+    }
+}
+
 /* ══════════════════════════════════════════════════════════════
    ADMIN CRUD OPERATIONS (for side-by-side buttons)
    ══════════════════════════════════════════════════════════════ */
@@ -352,7 +442,7 @@ async function saveEvent() {
                 timer: 1500,
                 showConfirmButton: false,
                 confirmButtonColor: '#6366f1'
-            }).then(() => loadEvents());
+            }).then(() => loadEvents(true));
         } else {
             Swal.fire({
                 icon: 'error',
@@ -395,7 +485,7 @@ async function deleteEvent(eventId) {
                     text: 'The event has been successfully removed.',
                     timer: 1500,
                     showConfirmButton: false
-                }).then(() => loadEvents());
+                }).then(() => loadEvents(true));
             } else {
                 Swal.fire('Error', data.error || 'Failed to delete event.', 'error');
             }
@@ -778,14 +868,17 @@ document.addEventListener('DOMContentLoaded', function () {
     // Nothing extra needed.
 
     // ── Auto-fill registration modal from student profile ────
-    // Fetches /api/user/profile/ once and stores result.
+    // Read from the bootstrap payload on the events page, otherwise
+    // fetched from /api/user/profile/; either way once.
     // When the modal opens (openRegistrationModal called), fills fields.
     var _cachedProfile = null;
 
     function fetchStudentProfile() {
         if (_cachedProfile !== null) return Promise.resolve(_cachedProfile);
-        return fetch('/api/user/profile/')
-            .then(function (r) { return r.json(); })
+        var source = document.getElementById('events-bootstrap')
+            ? getBootstrap().then(function (data) { return data.profile; })
+            : fetch('/api/user/profile/').then(function (r) { return r.json(); });
+        return source
             .then(function (data) {
                 _cachedProfile = data;
                 return data;